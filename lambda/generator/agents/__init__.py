@@ -1,4 +1,17 @@
-from .connectivityagent import ConnectivityAgent
-from .triageagent import TriageAgent
-from .knowledgeagent import KnowledgeAgent
-from .escalationagent import EscalationAgent
\ No newline at end of file
+# Agents are imported on first access, so `import agents.state` (used by the
+# tools) does not pull in every agent and their tool dependencies
+_AGENTS = {
+    "ConnectivityAgent": ".connectivityagent",
+    "TriageAgent": ".triageagent",
+    "KnowledgeAgent": ".knowledgeagent",
+    "EscalationAgent": ".escalationagent",
+}
+
+__all__ = list(_AGENTS)
+
+
+def __getattr__(name):
+    if name in _AGENTS:
+        from importlib import import_module
+        return getattr(import_module(_AGENTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,109 @@
+import threading
+import time
+from typing import Optional
+
+# LangChain imports
+from langchain_core.messages import ToolMessage
+
+from agents.history import truncate
+import settings
+
+LLM_CALLS = "llm_calls"
+TOOL_CALLS = "tool_calls"
+DEADLINE = "deadline"
+
+# Sent to the agent for its last turn once the tool calls ran out
+FINAL_TURN_PROMPT = "The tool call budget is exhausted, do not use any more tools. Give the Final Answer with what you found."
+
+_lock = threading.Lock()
+_stats = {"requests": 0, "exhausted": 0, LLM_CALLS: 0, TOOL_CALLS: 0, DEADLINE: 0}
+
+
+def new_budget(deadline: Optional[float] = None) -> dict:
+    """
+    Execution budget of one request, stored in the graph state. `deadline`
+    is a time.time() timestamp, e.g. derived from the Lambda remaining time;
+    it is never later than BUDGET_MAX_SECONDS from now.
+    """
+    latest = time.time() + settings.BUDGET_MAX_SECONDS
+    return {
+        "deadline": min(deadline, latest) if deadline else latest,
+        "max_llm_calls": settings.BUDGET_MAX_LLM_CALLS,
+        "max_tool_calls": settings.BUDGET_MAX_TOOL_CALLS,
+        LLM_CALLS: 0,
+        TOOL_CALLS: 0,
+    }
+
+
+def charge(state: dict, kind: str, amount: int = 1) -> None:
+    """Counts LLM or tool calls against the budget of the request"""
+    budget = state.get("budget")
+    if budget:
+        state["budget"] = {**budget, kind: budget.get(kind, 0) + amount}
+
+
+def remaining_seconds(state: dict) -> float:
+    budget = state.get("budget")
+    if not budget:
+        return float("inf")
+    return budget["deadline"] - time.time()
+
+
+def remaining_tool_calls(state: dict) -> int:
+    budget = state.get("budget")
+    if not budget:
+        return 1 << 30
+    return max(budget["max_tool_calls"] - budget[TOOL_CALLS], 0)
+
+
+def exhausted(state: dict, tools: bool = False) -> str:
+    """
+    Returns what ran out (llm_calls, tool_calls or deadline), or an empty
+    string. The tool call cap only counts with `tools`: it stops routing to
+    the tool node, not the model turn that answers with what the tools found.
+    """
+    budget = state.get("budget")
+    if not budget:
+        return ""
+    if budget[LLM_CALLS] >= budget["max_llm_calls"]:
+        return LLM_CALLS
+    if time.time() >= budget["deadline"]:
+        return DEADLINE
+    if tools and budget[TOOL_CALLS] >= budget["max_tool_calls"]:
+        return TOOL_CALLS
+    return ""
+
+
+def best_effort_answer(state: dict) -> str:
+    """
+    Answer for a request stopped by its budget: says so and lists what the
+    tools found, so the user gets the partial diagnosis instead of nothing.
+    """
+    findings = []
+    for message in state.get("messages", []) + state.get("escalation_messages", []) + state.get("tool_messages", []):
+        if isinstance(message, ToolMessage) and message.status != "error":
+            findings.append(f"- {message.name}: {truncate(str(message.content), 200)}")
+    sources = sorted({doc.get("source", "") for doc in state.get("knowledge_docs") or [] if doc.get("source")})
+
+    answer = "Lo siento, no pude completar tu solicitud a tiempo."
+    if findings:
+        answer += "\nEsto es lo que encontré:\n" + "\n".join(dict.fromkeys(findings))
+    if sources:
+        answer += f"\nPuedes consultar: {', '.join(sources)}"
+    return answer
+
+
+def record_request(reason: str) -> None:
+    """Counts a finished request and, if its budget ran out, what ran out"""
+    with _lock:
+        _stats["requests"] += 1
+        if reason:
+            _stats["exhausted"] += 1
+            _stats[reason] += 1
+
+
+def budget_stats() -> dict:
+    with _lock:
+        stats = dict(_stats)
+    stats["exhausted_rate"] = stats["exhausted"] / stats["requests"] if stats["requests"] else 0.0
+    return stats
@@ -0,0 +1,146 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+# LangGraph imports
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import MemorySaver
+
+import settings
+
+MEMORY_BACKEND = "memory"
+SQLITE_BACKEND = "sqlite"
+NO_BACKEND = "none"
+
+
+def create_checkpointer(backend: str = "", path: str = "") -> Optional[BaseCheckpointSaver]:
+    """
+    Returns the checkpointer of the graph for the configured backend:
+    "memory" (MemorySaver), "sqlite" (SqliteSaver on `path`) or "none" for
+    stateless deployments, in which case the graph is compiled without one.
+    """
+    backend = (backend or settings.CHECKPOINT_BACKEND).lower()
+    if backend == NO_BACKEND:
+        return None
+    if backend == SQLITE_BACKEND:
+        try:
+            return sqlite_checkpointer(path or settings.CHECKPOINT_PATH)
+        except ImportError:
+            print("langgraph-checkpoint-sqlite is not installed, using the memory checkpointer")
+            return MemorySaver()
+    if backend != MEMORY_BACKEND:
+        print(f"Unknown checkpoint backend '{backend}', using the memory checkpointer")
+    return MemorySaver()
+
+
+def sqlite_checkpointer(path: str) -> BaseCheckpointSaver:
+    """
+    SqliteSaver whose async methods run the sync ones on a worker thread, so
+    the same checkpointer serves invoke and ainvoke.
+    """
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+    class ThreadedSqliteSaver(SqliteSaver):
+        async def aget_tuple(self, config):
+            return await asyncio.to_thread(self.get_tuple, config)
+
+        async def alist(self, config, *, filter=None, before=None, limit=None):
+            items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+            for item in items:
+                yield item
+
+        async def aput(self, config, checkpoint, metadata, new_versions):
+            return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+        async def aput_writes(self, config, writes, task_id, task_path=""):
+            return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+        async def adelete_thread(self, thread_id):
+            return await asyncio.to_thread(self.delete_thread, thread_id)
+
+    saver = ThreadedSqliteSaver(sqlite3.connect(path, check_same_thread=False))
+    saver.setup()
+    return saver
+
+
+def thread_config(thread_id: str) -> dict:
+    return {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+
+
+class CheckpointStore:
+    """
+    Keeps the checkpoints of a graph bounded.
+
+    After every turn the thread is compacted to its latest checkpoint, and
+    threads idle for longer than `ttl` seconds, or beyond the `max_threads`
+    most recently used ones, are deleted. Works with any checkpointer that
+    implements delete_thread; threads already stored in a durable backend
+    are picked up when the store is created.
+    """
+
+    def __init__(self, checkpointer: BaseCheckpointSaver, ttl: float = None, max_threads: int = None, compact: bool = None):
+        self.checkpointer = checkpointer
+        self.ttl = settings.CHECKPOINT_TTL if ttl is None else ttl
+        self.max_threads = settings.CHECKPOINT_MAX_THREADS if max_threads is None else max_threads
+        self.compact_threads = settings.CHECKPOINT_COMPACT if compact is None else compact
+        self._lock = threading.Lock()
+        self._threads = OrderedDict()
+        self._stats = {"compactions": 0, "evicted_threads": 0}
+        self._load_threads()
+
+    def _load_threads(self) -> None:
+        """Registers the threads a durable backend already holds, oldest first"""
+        if isinstance(self.checkpointer, MemorySaver):
+            return
+        last_used = {}
+        for item in self.checkpointer.list(None):
+            thread_id = item.config["configurable"]["thread_id"]
+            ts = datetime.fromisoformat(item.checkpoint["ts"]).timestamp()
+            last_used[thread_id] = max(ts, last_used.get(thread_id, 0))
+        now, wall = time.monotonic(), time.time()
+        for thread_id, ts in sorted(last_used.items(), key=lambda item: item[1]):
+            self._threads[thread_id] = now - (wall - ts)
+
+    def compact(self, thread_id: str) -> None:
+        """Drops every checkpoint of the thread except the latest one"""
+        config = thread_config(thread_id)
+        latest = self.checkpointer.get_tuple(config)
+        if latest is None or latest.parent_config is None:
+            return
+        self.checkpointer.delete_thread(thread_id)
+        self.checkpointer.put(config, latest.checkpoint, latest.metadata, latest.checkpoint["channel_versions"])
+        with self._lock:
+            self._stats["compactions"] += 1
+
+    def touch(self, thread_id: str) -> None:
+        """Records a finished turn of the thread, compacts it and evicts stale threads"""
+        if self.compact_threads:
+            self.compact(thread_id)
+        with self._lock:
+            self._threads[thread_id] = time.monotonic()
+            self._threads.move_to_end(thread_id)
+        self.evict()
+
+    def evict(self) -> int:
+        """Deletes expired threads and the least recently used ones above max_threads"""
+        expired = []
+        now = time.monotonic()
+        with self._lock:
+            while self._threads:
+                thread_id, last_used = next(iter(self._threads.items()))
+                if len(self._threads) <= self.max_threads and now - last_used <= self.ttl:
+                    break
+                del self._threads[thread_id]
+                expired.append(thread_id)
+            self._stats["evicted_threads"] += len(expired)
+        for thread_id in expired:
+            self.checkpointer.delete_thread(thread_id)
+        return len(expired)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"threads": len(self._threads), **self._stats}
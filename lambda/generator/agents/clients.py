@@ -0,0 +1,71 @@
+import threading
+from typing import Any, Callable
+
+import settings
+
+# boto3 clients per (service, region) and chat clients per (backend, model id, params)
+_aws_clients = {}
+_aws_lock = threading.Lock()
+_models = {}
+_models_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def aws_client(service_name: str, region_name: str = ""):
+    """
+    Returns the process-wide boto3 client of a service in a region. Its
+    connection pool holds BEDROCK_POOL_SIZE connections, so the agents of
+    concurrent requests (batch workers, async mode) share one pool.
+    """
+    region_name = region_name or settings.BEDROCK_REGION
+    key = (service_name, region_name)
+    with _aws_lock:
+        client = _aws_clients.get(key)
+        if client is None:
+            import boto3
+            from botocore.config import Config
+            config = Config(
+                connect_timeout=5,
+                read_timeout=60,
+                retries={"max_attempts": settings.BEDROCK_MAX_ATTEMPTS},
+                max_pool_connections=settings.BEDROCK_POOL_SIZE,
+            )
+            # Sessions are not thread safe, each client gets its own
+            client = boto3.session.Session().client(service_name, region_name=region_name, config=config)
+            _aws_clients[key] = client
+    return client
+
+
+def shared_model(backend: str, model_id: str, factory: Callable[..., Any], /, **params) -> Any:
+    """
+    Returns the client registered for (backend, model_id, params), building
+    it with factory(**params) the first time. Agents using the same model and
+    parameters get the same instance, which is safe to use concurrently.
+    """
+    key = (backend, model_id, tuple(sorted(params.items())))
+    with _models_lock:
+        model = _models.get(key)
+        if model is not None:
+            _stats["hits"] += 1
+            return model
+        _stats["misses"] += 1
+        model = factory(**params)
+        _models[key] = model
+    return model
+
+
+def client_stats() -> dict:
+    with _models_lock:
+        stats = dict(_stats)
+        stats["models"] = [f"{backend}:{model_id}" for backend, model_id, _ in _models]
+    with _aws_lock:
+        stats["aws_clients"] = [f"{service}@{region}" for service, region in _aws_clients]
+    return stats
+
+
+def reset_clients() -> None:
+    """Drops every cached client, the next model_selection call rebuilds them."""
+    with _models_lock:
+        _models.clear()
+    with _aws_lock:
+        _aws_clients.clear()
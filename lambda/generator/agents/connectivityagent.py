@@ -1,27 +1,43 @@
 # import asyncio
 
 # LangGraph imports
-from langgraph.prebuilt import ToolNode
 from langgraph.graph import END
 
 # LangChain imports
+from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 
 # App specific imports
-from tools.network import get_network_tools, get_network_tool_names
-from agents.state import AgentState, AgentNames, model_selection
+from tools.network import get_network_tools, get_network_tool_names, NETWORK_TOOL_CONCURRENCY
+from agents.toolnode import ParallelToolNode
+from agents.history import HistoryManager, record_step
+from agents.budget import charge, exhausted, LLM_CALLS, FINAL_TURN_PROMPT
+from agents.state import AgentState, AgentNames, LazyModel
 from tools.language import language_prompt
 from parser.connectivity import react_parse
 
 class ConnectivityAgent:
     """Performs network diagnostics like ping, nslookup, whois"""
 
-    def __init__(self, model_name: str = ""):
+    def __init__(self, model_name: str = "", llm: BaseChatModel = None, tools: list = None):
         self.name = AgentNames.CONNECTIVITY.value
-        self.llm = model_selection(model_name, use_huggingface=True)
-        self.tools = get_network_tools()
-        self.llm_with_tools = self.llm.bind_tools(self.tools)
-        self.tool_node = ToolNode(tools=self.tools, name="connectivity_tools", messages_key="tool_messages")
+        self.model = LazyModel(model_name, use_huggingface=True, llm=llm)
+        self.tools = tools if tools is not None else get_network_tools()
+        self.history = HistoryManager()
+        self.tool_node = ParallelToolNode(
+            tools=self.tools,
+            name="connectivity_tools",
+            messages_key="tool_messages",
+            concurrency_limits=NETWORK_TOOL_CONCURRENCY,
+        )
+
+    @property
+    def llm(self) -> BaseChatModel:
+        return self.model.get()
+
+    @property
+    def llm_with_tools(self):
+        return self.model.bind_tools(self.tools)
 
     def route_condition(self, state: AgentState) -> str:
         """Checks if the tools can be used in the current state"""
@@ -29,6 +45,9 @@ class ConnectivityAgent:
         Use in the conditional_edge to route to the ToolNode if the last message
         has tool calls. Otherwise, route to the end.
         """
+        # Stop the loop once the request is out of budget
+        if exhausted(state):
+            return END
         messages = state.get("messages", [])
         # If there are no messages, we cannot route
         if not messages:
@@ -36,16 +55,19 @@ class ConnectivityAgent:
 
         last_message = messages[-1]
 
+        # Once the tool calls ran out, the turn that just ran was the final one, without tools
         if hasattr(last_message, "tool_calls") and len(last_message.tool_calls) > 0:
-            return self.tool_node.name
+            return END if exhausted(state, tools=True) else self.tool_node.name
         # If the final answer is already set, we can end the conversation
         if state.get("final_answer", ""):
             return END
+        if exhausted(state, tools=True):
+            return END
 
         return self.name
 
-    def __call__(self, state: AgentState) -> AgentState:
-        """Executes the connectivity agent logic"""
+    def _prepare(self, state: AgentState) -> list:
+        """Adds the prompt or the last tool results to the state, returns the compacted messages to send"""
         user_question = state.get("user_question", "")
         user_language = state.get("user_language", "Spanish")
 
@@ -54,6 +76,14 @@ class ConnectivityAgent:
             [f"{tool.name}: {tool.description}" for tool in self.tools]
         )
 
+        entities = state.get("network_entities") or {}
+        entities_desc = "\n".join(
+            f"            - {key}: {', '.join(str(value) for value in values)}"
+            for key, values in entities.items() if values
+        )
+        if entities_desc:
+            entities_desc = f"Network entities detected in the question:\n{entities_desc}"
+
         if not state.get("tool_messages", []):
             system_message = SystemMessage(
                 content=f"""
@@ -88,6 +118,8 @@ class ConnectivityAgent:
             Important: You must eventually reach a final answer. Do not continue using tools indefinitely. 
             If after several steps you still cannot resolve the issue, summarize your findings and provide the best answer possible.
 
+            {entities_desc}
+
             {language_prompt(user_language)}
 
             Begin!
@@ -101,8 +133,15 @@ class ConnectivityAgent:
         else:
             state["messages"].extend(state["tool_messages"])
             state["tool_messages"] = []
+            if exhausted(state, tools=True):
+                state["messages"].append(HumanMessage(content=FINAL_TURN_PROMPT))
 
-        response = self.llm_with_tools.invoke(state["messages"])
+        charge(state, LLM_CALLS)
+        return self.history.compact(state["messages"])
+
+    def _process(self, state: AgentState, messages: list, response) -> AgentState:
+        """Records the LLM response, its token usage and the final answer, if any"""
+        record_step(state, self.name, messages, response)
         parsed_response = react_parse(response)
 
         # Process response
@@ -110,3 +149,23 @@ class ConnectivityAgent:
         state["final_answer"] = parsed_response.get("final_answer", "")
         state["tool_messages"].append(response)
         return state
+
+    def _turn_llm(self, state: AgentState):
+        """The model with the tools bound, or without them for the final turn once the tool calls ran out"""
+        return self.llm if exhausted(state, tools=True) else self.llm_with_tools
+
+    def __call__(self, state: AgentState) -> AgentState:
+        """Executes the connectivity agent logic"""
+        if exhausted(state):
+            return state
+        messages = self._prepare(state)
+        response = self._turn_llm(state).invoke(messages)
+        return self._process(state, messages, response)
+
+    async def acall(self, state: AgentState) -> AgentState:
+        """Async variant of __call__"""
+        if exhausted(state):
+            return state
+        messages = self._prepare(state)
+        response = await self._turn_llm(state).ainvoke(messages)
+        return self._process(state, messages, response)
@@ -0,0 +1,102 @@
+import json
+from typing import List
+
+# LangChain imports
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+
+import settings
+
+# Rough size of a token for the models we run, good enough for budgeting
+CHARS_PER_TOKEN = 4
+# Per-message overhead of the chat template (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def _message_chars(message: BaseMessage) -> int:
+    content = message.content if isinstance(message.content, str) else json.dumps(message.content, default=str)
+    chars = len(content)
+    if isinstance(message, AIMessage) and message.tool_calls:
+        chars += len(json.dumps(message.tool_calls, default=str))
+    return chars
+
+
+def estimate_tokens(messages: List[BaseMessage]) -> int:
+    """Estimates the prompt tokens of a message list from its length"""
+    return sum(_message_chars(message) // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+
+def truncate(text: str, max_chars: int) -> str:
+    """Cuts a text to max_chars, saying how much was left out"""
+    if max_chars <= 0 or len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}... [{len(text) - max_chars} characters truncated]"
+
+
+def cap_tool_message(message: ToolMessage, max_chars: int = None) -> ToolMessage:
+    """Returns the tool message with its content cut to max_chars"""
+    max_chars = settings.TOOL_OUTPUT_MAX_CHARS if max_chars is None else max_chars
+    if not isinstance(message.content, str) or len(message.content) <= max_chars:
+        return message
+    return message.model_copy(update={"content": truncate(message.content, max_chars)})
+
+
+class HistoryManager:
+    """
+    Keeps the prompt of a ReAct loop within a token budget.
+
+    The system prompt, the question and the last `keep_steps` tool steps are
+    sent as they are. When the history is over `token_budget`, observations
+    of older steps are cut to `observation_chars`, and if that is not enough
+    the reasoning of those steps as well. The tool calls themselves are kept,
+    so every tool message still answers a call.
+    """
+
+    def __init__(self, token_budget: int = None, keep_steps: int = None, observation_chars: int = None):
+        self.token_budget = settings.HISTORY_TOKEN_BUDGET if token_budget is None else token_budget
+        self.keep_steps = settings.HISTORY_KEEP_STEPS if keep_steps is None else keep_steps
+        self.observation_chars = settings.HISTORY_OBSERVATION_CHARS if observation_chars is None else observation_chars
+
+    def _recent_start(self, messages: List[BaseMessage]) -> int:
+        """Index of the first message of the last keep_steps tool steps, keep_steps 0 keeps none"""
+        if self.keep_steps <= 0:
+            return len(messages)
+        steps = 0
+        for index in range(len(messages) - 1, -1, -1):
+            message = messages[index]
+            if isinstance(message, AIMessage) and message.tool_calls:
+                steps += 1
+                if steps >= self.keep_steps:
+                    return index
+        return 0
+
+    def compact(self, messages: List[BaseMessage]) -> List[BaseMessage]:
+        """Returns the messages to send, the state keeps the full history"""
+        if self.token_budget <= 0 or estimate_tokens(messages) <= self.token_budget:
+            return messages
+        recent = self._recent_start(messages)
+        compacted = list(messages)
+        for kinds in ((ToolMessage,), (ToolMessage, AIMessage)):
+            for index in range(2, recent):
+                message = compacted[index]
+                if isinstance(message, kinds) and isinstance(message.content, str):
+                    compacted[index] = message.model_copy(
+                        update={"content": truncate(message.content, self.observation_chars)}
+                    )
+            if estimate_tokens(compacted) <= self.token_budget:
+                break
+        return compacted
+
+
+def record_step(state: dict, agent: str, messages: List[BaseMessage], response: BaseMessage) -> None:
+    """
+    Appends the tokens of one LLM call to state["step_tokens"], using the
+    usage reported by the model when there is one.
+    """
+    usage = getattr(response, "usage_metadata", None) or {}
+    entry = {
+        "agent": agent,
+        "input_tokens": usage.get("input_tokens") or estimate_tokens(messages),
+        "output_tokens": usage.get("output_tokens") or estimate_tokens([response]),
+        "estimated": not usage,
+    }
+    state["step_tokens"] = (state.get("step_tokens") or []) + [entry]
@@ -1,27 +1,45 @@
-# import asyncio
+import asyncio
+import time
 
 # LangGraph imports
 from langgraph.graph import END
 
 # LangChain imports
+from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langchain_core.output_parsers import PydanticOutputParser
 from langchain.output_parsers import OutputFixingParser
 
 # App specific imports
-from tools.vectordb import knowledge_base
-from parser.knowledge import KnowledgeRankParser, KnowledgeQAParser
-from agents.state import AgentState, AgentNames, model_selection
+from tools.vectordb import retrieve_documents, format_documents, KNOWLEDGE_NUM_RESULTS
+from tools.speculation import get_speculative_retrieval
+from parser.knowledge import KnowledgeRankParser, KnowledgeQAParser, KnowledgeGradeAnswerParser
+from agents.state import AgentState, AgentNames, LazyModel
+from agents.budget import charge, exhausted, LLM_CALLS
+from agents.metrics import report_retrieval
 from tools.language import language_prompt
 from langchain_core.output_parsers import PydanticOutputParser, JsonOutputParser
+import settings
+
+COMBINED_MODE = "combined"
+
+# Steps of the knowledge agent, each one is a single LLM call
+GRADE_STEP = "grade"
+ANSWER_STEP = "answer"
+GRADE_ANSWER_STEP = "grade_answer"
 
 
 class KnowledgeAgent:
     """Performs network diagnostics like ping, nslookup, whois"""
 
-    def __init__(self, model_name: str = ""):
+    def __init__(self, model_name: str = "", mode: str = "", llm: BaseChatModel = None):
         self.name = AgentNames.KNOWLEDGE.value
-        self.llm = model_selection(model_name)
+        self.model = LazyModel(model_name, llm=llm)
+        self.mode = mode or settings.KNOWLEDGE_MODE
+
+    @property
+    def llm(self) -> BaseChatModel:
+        return self.model.get()
 
     def route_condition(self, state: AgentState) -> str:
         """Checks if the tools can be used in the current state"""
@@ -29,6 +47,9 @@ class KnowledgeAgent:
         Use in the conditional_edge to route to the ToolNode if the last message
         has tool calls. Otherwise, route to the end.
         """
+        # Stop once the request is out of budget
+        if exhausted(state):
+            return END
         score = state.get("knowledge_score", -1)
         action = state.get("knowledge_action", "")
         final_answer = state.get("final_answer", "")
@@ -49,13 +70,34 @@ class KnowledgeAgent:
 
         return self.name
 
-    def __call__(self, state: AgentState) -> AgentState:
-        """Executes the knowledge agent logic"""
+    def retrieve(self, state: AgentState) -> list:
+        """
+        Returns the documents retrieved for the current question, querying
+        the knowledge base only if no earlier node in this run already did.
+        Documents retrieved speculatively while triage ran are used first.
+        """
+        docs = state.get("knowledge_docs") or []
+        if not docs:
+            start = time.perf_counter()
+            speculation = get_speculative_retrieval()
+            docs = None
+            if speculation is not None and state.get("speculation_id"):
+                docs = speculation.claim(state["speculation_id"])
+            if docs is None:
+                docs = retrieve_documents(question=state.get("user_question", ""), num_results=KNOWLEDGE_NUM_RESULTS)
+            report_retrieval(time.perf_counter() - start, len(docs))
+            state["knowledge_docs"] = docs
+        return docs
+
+    def _prepare(self, state: AgentState, facts: str) -> tuple:
+        """Builds the prompt of the next step, returns (messages, parser, step)"""
+        charge(state, LLM_CALLS)
         user_question = state.get("user_question", "")
         user_language = state.get("user_language", "Spanish")
         score = state.get("knowledge_score", -1)
-        docs = knowledge_base(question=user_question, num_results=3)
         knowledge_message = []
+        if score == -1 and self.mode == COMBINED_MODE:
+            return self._grade_and_answer_messages(state, facts)
         if score == -1:
             parser = PydanticOutputParser(pydantic_object=KnowledgeRankParser)
             system_message = SystemMessage(
@@ -89,15 +131,13 @@ class KnowledgeAgent:
             {parser.get_format_instructions()}
 
             # FACTS:               
-            {"\n\n\n -ENTRY: ".join(docs)}
+            {facts}
             """
             )
             knowledge_message.append(system_message)
             user_message = HumanMessage(content=f"QUESTION: {user_question}")
             knowledge_message.append(user_message)
-            response = self.llm.invoke(knowledge_message)
-            score = int(parser.invoke(response).score)
-            state["knowledge_score"] = score
+            return knowledge_message, parser, GRADE_STEP
         else:
             parser = JsonOutputParser(pydantic_object=KnowledgeQAParser)
             system_message = SystemMessage(
@@ -128,7 +168,7 @@ class KnowledgeAgent:
             "final_answer": "the final answer to the question. Provide a clear and concise answer based solely on the CONTEXT."
             }}
             # CONTEXT:
-            {"\n\n\n -ENTRY: ".join(docs)}
+            {facts}
             """
             )
             state["messages"].append(system_message)
@@ -136,20 +176,90 @@ class KnowledgeAgent:
             # Add user question
             user_message = HumanMessage(content=f"QUESTION: {user_question}")
             state["messages"].append(user_message)
+            return state["messages"], parser, ANSWER_STEP
 
-            response = self.llm.invoke(state["messages"])
-            try:
-                values = parser.parse(response.content)
-                state["final_answer"] = values["final_answer"]
-                state["knowledge_action"] = values["action"]
-            except Exception as e:
-                # If the output is not valid JSON, use OutputFixingParser to fix it
-                fixing_parser = OutputFixingParser.from_llm(
-                    self.llm, parser=parser
-                )
-                values = fixing_parser.parse(response.content)
-                state["final_answer"] = values["final_answer"]
-                state["knowledge_action"] = values["action"]
-
-            state["messages"].append(response)
+    def _parse(self, parser, response):
+        """Parses the response, asking the LLM to fix it if it is not valid"""
+        try:
+            return parser.parse(response.content)
+        except Exception as e:
+            fixing_parser = OutputFixingParser.from_llm(self.llm, parser=parser)
+            return fixing_parser.parse(response.content)
+
+    async def _aparse(self, parser, response):
+        """Async variant of _parse"""
+        try:
+            return parser.parse(response.content)
+        except Exception as e:
+            fixing_parser = OutputFixingParser.from_llm(self.llm, parser=parser)
+            return await fixing_parser.aparse(response.content)
+
+    def _process(self, state: AgentState, step: str, response, values) -> AgentState:
+        """Applies the parsed output of a step to the state"""
+        if step == GRADE_STEP:
+            state["knowledge_score"] = int(values.score)
+            return state
+        if step == ANSWER_STEP:
+            state["final_answer"] = values["final_answer"]
+            state["knowledge_action"] = values["action"]
+        else:
+            state["knowledge_score"] = int(values.score)
+            state["knowledge_action"] = values.action
+            if values.action == "respond":
+                state["final_answer"] = values.final_answer
+        state["messages"].append(response)
         return state
+
+    def __call__(self, state: AgentState) -> AgentState:
+        """Executes the knowledge agent logic"""
+        if exhausted(state):
+            return state
+        facts = format_documents(self.retrieve(state))
+        messages, parser, step = self._prepare(state, facts)
+        response = self.llm.invoke(messages)
+        return self._process(state, step, response, self._parse(parser, response))
+
+    async def acall(self, state: AgentState) -> AgentState:
+        """Async variant of __call__, retrieval runs on a worker thread"""
+        if exhausted(state):
+            return state
+        facts = format_documents(await asyncio.to_thread(self.retrieve, state))
+        messages, parser, step = self._prepare(state, facts)
+        response = await self.llm.ainvoke(messages)
+        return self._process(state, step, response, await self._aparse(parser, response))
+
+    def _grade_and_answer_messages(self, state: AgentState, facts: str) -> tuple:
+        """Prompt that grades the FACTS and answers the question with a single LLM call"""
+        user_question = state.get("user_question", "")
+        user_language = state.get("user_language", "Spanish")
+        parser = PydanticOutputParser(pydantic_object=KnowledgeGradeAnswerParser)
+        system_message = SystemMessage(
+            content=f"""
+            You are a knowledge agent. You will be given a QUESTION and a block of FACTS retrieved from a knowledge source.
+            These FACTS may be unstructured, containing incomplete sentences, lists, bullet points, or unrelated fragments.
+
+            # Your job:
+
+            1. Grade: evaluate the FACTS as a whole and produce an int score in the range [0, 10] for how well they cover the QUESTION.
+            - 10 — Direct, accurate, and comprehensive coverage of the QUESTION.
+            - 8–9 — Highly relevant: most aspects addressed, minor gaps or small omissions.
+            - 6–7 — Moderately relevant: useful information present but important parts missing or incomplete.
+            - 3–5 — Low relevance: mentions some related keywords or concepts but lacks meaningful substance.
+            - 0–2 — Minimal or no relevance to the QUESTION.
+            2. Decide: "action" must be "respond" if the FACTS contain enough relevant details to answer the QUESTION, otherwise "escalate".
+            3. Answer: if the action is "respond", write a clear and concise "final_answer" based only on the FACTS, with no outside knowledge.
+            If the action is "escalate", leave "final_answer" empty.
+
+            {language_prompt(user_language)}
+
+            # Output Format:
+
+            Your response MUST follow the format below and contain nothing else:
+            {parser.get_format_instructions()}
+
+            # FACTS:
+            {facts}
+            """
+        )
+        user_message = HumanMessage(content=f"QUESTION: {user_question}")
+        return [system_message, user_message], parser, GRADE_ANSWER_STEP
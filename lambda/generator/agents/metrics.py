@@ -0,0 +1,186 @@
+import json
+import threading
+import time
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+# LangChain imports
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.callbacks.manager import dispatch_custom_event
+from langchain_core.messages import BaseMessage
+
+from agents.history import estimate_tokens
+import settings
+
+# Custom event fired by the knowledge agent around vector store queries
+RETRIEVAL_EVENT = "retrieval"
+
+# Metrics published through CloudWatch embedded metric format, the rest of the record is searchable context
+EMF_METRICS = [
+    ("RequestLatency", "Milliseconds"),
+    ("LLMCalls", "Count"),
+    ("LLMLatency", "Milliseconds"),
+    ("InputTokens", "Count"),
+    ("OutputTokens", "Count"),
+    ("ToolCalls", "Count"),
+    ("ToolErrors", "Count"),
+    ("RetrievalLatency", "Milliseconds"),
+]
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 1)
+
+
+def report_retrieval(seconds: float, documents: int) -> None:
+    """Reports a vector store query to the metrics of the running request, if any"""
+    try:
+        dispatch_custom_event(RETRIEVAL_EVENT, {"seconds": seconds, "documents": documents})
+    except RuntimeError:
+        # Called outside a graph run (e.g. from a script), nothing to report to
+        pass
+
+
+class RequestMetrics(BaseCallbackHandler):
+    """
+    Callback handler that collects the timings of one request: wall time per
+    graph node, latency and tokens per LLM call, latency per tool call,
+    retrieval time and the route taken. emit() prints them as one CloudWatch
+    EMF JSON line.
+    """
+
+    run_inline = True
+
+    def __init__(self, thread_id: str = ""):
+        self.thread_id = thread_id
+        self.started = time.perf_counter()
+        self.route = []
+        self.nodes = {}
+        self.llm_calls = []
+        self.tools = {}
+        self.retrievals = []
+        self._runs = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID, **info) -> None:
+        with self._lock:
+            self._runs[run_id] = {"start": time.perf_counter(), **info}
+
+    def _end(self, run_id: UUID) -> Optional[dict]:
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is not None:
+            run["seconds"] = time.perf_counter() - run["start"]
+        return run
+
+    # Graph nodes are chains named after the node
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs: Any) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node:
+            self._start(run_id, node=node)
+            with self._lock:
+                self.route.append(node)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs: Any) -> None:
+        run = self._end(run_id)
+        if run is not None:
+            with self._lock:
+                self.nodes[run["node"]] = self.nodes.get(run["node"], 0.0) + run["seconds"]
+
+    def on_chain_error(self, error, *, run_id, **kwargs: Any) -> None:
+        self.on_chain_end(None, run_id=run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs: Any) -> None:
+        self._start(
+            run_id,
+            node=(metadata or {}).get("langgraph_node", ""),
+            input_tokens=estimate_tokens(messages[0]) if messages else 0,
+        )
+
+    def _llm_done(self, run_id: UUID, message: Optional[BaseMessage], error: bool) -> None:
+        run = self._end(run_id)
+        if run is None:
+            return
+        usage = getattr(message, "usage_metadata", None) or {}
+        with self._lock:
+            self.llm_calls.append({
+                "node": run["node"],
+                "ms": _ms(run["seconds"]),
+                "input_tokens": usage.get("input_tokens") or run["input_tokens"],
+                "output_tokens": usage.get("output_tokens") or (estimate_tokens([message]) if message else 0),
+                "estimated": not usage,
+                "error": error,
+            })
+
+    def on_llm_end(self, response, *, run_id, **kwargs: Any) -> None:
+        generations = response.generations[0] if response.generations else []
+        self._llm_done(run_id, getattr(generations[0], "message", None) if generations else None, error=False)
+
+    def on_llm_error(self, error, *, run_id, **kwargs: Any) -> None:
+        self._llm_done(run_id, None, error=True)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs: Any) -> None:
+        self._start(run_id, tool=kwargs.get("name") or (serialized or {}).get("name", "tool"))
+
+    def _tool_done(self, run_id: UUID, error: bool) -> None:
+        run = self._end(run_id)
+        if run is None:
+            return
+        with self._lock:
+            tool = self.tools.setdefault(run["tool"], {"calls": 0, "errors": 0, "ms": 0.0})
+            tool["calls"] += 1
+            tool["errors"] += int(error)
+            tool["ms"] = round(tool["ms"] + _ms(run["seconds"]), 1)
+
+    def on_tool_end(self, output, *, run_id, **kwargs: Any) -> None:
+        self._tool_done(run_id, error=getattr(output, "status", "success") == "error")
+
+    def on_tool_error(self, error, *, run_id, **kwargs: Any) -> None:
+        self._tool_done(run_id, error=True)
+
+    def on_custom_event(self, name: str, data: Any, *, run_id, **kwargs: Any) -> None:
+        if name == RETRIEVAL_EVENT:
+            with self._lock:
+                self.retrievals.append({"ms": _ms(data["seconds"]), "documents": data["documents"]})
+
+    def record(self, **context) -> Dict[str, Any]:
+        """Builds the EMF record of the request, `context` adds searchable properties"""
+        with self._lock:
+            llm_calls = list(self.llm_calls)
+            tools = {name: dict(values) for name, values in self.tools.items()}
+            route = list(self.route)
+            nodes = {node: _ms(seconds) for node, seconds in self.nodes.items()}
+            retrievals = list(self.retrievals)
+        values = {
+            "RequestLatency": _ms(time.perf_counter() - self.started),
+            "LLMCalls": len(llm_calls),
+            "LLMLatency": round(sum(call["ms"] for call in llm_calls), 1),
+            "InputTokens": sum(call["input_tokens"] for call in llm_calls),
+            "OutputTokens": sum(call["output_tokens"] for call in llm_calls),
+            "ToolCalls": sum(tool["calls"] for tool in tools.values()),
+            "ToolErrors": sum(tool["errors"] for tool in tools.values()),
+            "RetrievalLatency": round(sum(retrieval["ms"] for retrieval in retrievals), 1),
+        }
+        return {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [{
+                    "Namespace": settings.METRICS_NAMESPACE,
+                    "Dimensions": [["Route"]],
+                    "Metrics": [{"Name": name, "Unit": unit} for name, unit in EMF_METRICS],
+                }],
+            },
+            "Route": ">".join(dict.fromkeys(node for node in route if not node.endswith("_tools"))) or "NONE",
+            **values,
+            "thread_id": self.thread_id,
+            "nodes_ms": nodes,
+            "llm_calls": llm_calls,
+            "tools": tools,
+            "retrievals": retrievals,
+            **context,
+        }
+
+    def emit(self, **context) -> None:
+        """Prints the record as a single JSON line for CloudWatch Logs"""
+        if settings.METRICS_ENABLED:
+            print(json.dumps(self.record(**context), separators=(",", ":"), default=str))
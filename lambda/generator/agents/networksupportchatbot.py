@@ -1,47 +1,90 @@
-# import asyncio
+import asyncio
 import re
+from typing import Callable, Iterator
 
 # LangGraph imports
 from langgraph.graph import StateGraph, START, END
-from langgraph.checkpoint.memory import MemorySaver
 
 # LangChain imports
 from langchain.callbacks.tracers import ConsoleCallbackHandler
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk
+from langchain_core.runnables import RunnableLambda
 
 # App specific imports
-from agents.state import AgentState
+from agents.state import AgentState, AgentNames, embedding_cache_stats
+from agents.clients import client_stats
 from agents import ConnectivityAgent, TriageAgent, KnowledgeAgent, EscalationAgent
+from agents.checkpointer import create_checkpointer, CheckpointStore
+from agents.budget import new_budget, exhausted, best_effort_answer, record_request, budget_stats
+from agents.metrics import RequestMetrics
 from tools.language import detect_language
+from tools.answercache import get_answer_cache
+from tools.speculation import get_speculative_retrieval
+from tools.vectordb import get_vector_store_manager
+from tools.network import tool_cache_stats
+from parser.streaming import partial_answer
 import settings
 
+# Progress shown while an agent works and has not started writing its answer
+NODE_STATUS = {
+    AgentNames.CONNECTIVITY.value: "Ejecutando diagnósticos de red...",
+    AgentNames.KNOWLEDGE.value: "Buscando en la documentación...",
+    AgentNames.ESCALATION.value: "Revisando tu solicitud con soporte...",
+}
+
 class NetworkSupportChatbot:
     """Main chatbot class that orchestrates the multi-agent system"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        model_factory: Callable[[str], BaseChatModel] = None,
+        network_tools: list = None,
+        escalation_tools: list = None,
+    ):
+        """
+        `model_factory` builds the chat model of an agent from its model name
+        and the tool lists replace the real ones, e.g. to run the graph with
+        fakes in benchmarks. By default models come from model_selection.
+        """
+        def llm(model_name: str):
+            return model_factory(model_name) if model_factory is not None else None
+
         # Initialize agents
-        self.triage_agent = TriageAgent(model_name=settings.TRIAGE_MODEL_ARN)
-        self.connectivity_agent = ConnectivityAgent(model_name=settings.LLAMA31_MODEL_ARN)
-        self.knowledge_agent = KnowledgeAgent(model_name=settings.LLAMA31_MODEL_ARN)
-        self.escalation_agent = EscalationAgent(model_name=settings.LLAMA32_MODEL_ARN)
+        self.triage_agent = TriageAgent(model_name=settings.TRIAGE_MODEL_ARN, llm=llm(settings.TRIAGE_MODEL_ARN))
+        self.connectivity_agent = ConnectivityAgent(
+            model_name=settings.LLAMA31_MODEL_ARN, llm=llm(settings.LLAMA31_MODEL_ARN), tools=network_tools
+        )
+        self.knowledge_agent = KnowledgeAgent(model_name=settings.LLAMA31_MODEL_ARN, llm=llm(settings.LLAMA31_MODEL_ARN))
+        self.escalation_agent = EscalationAgent(
+            model_name=settings.LLAMA32_MODEL_ARN, llm=llm(settings.LLAMA32_MODEL_ARN), tools=escalation_tools
+        )
 
         # Create workflow
         self.workflow = self._create_workflow()
 
-        # Create app with checkpointer
-        memory = MemorySaver()
-        self.app = self.workflow.compile(checkpointer=memory)
+        # Create app with checkpointer, None for stateless deployments
+        self.checkpointer = create_checkpointer()
+        self.app = self.workflow.compile(checkpointer=self.checkpointer)
+        self.checkpoints = CheckpointStore(self.checkpointer) if self.checkpointer is not None else None
+
+        # Semantic cache of knowledge answers, None when disabled
+        self.answer_cache = get_answer_cache()
+
+        # Knowledge retrieval started while triage runs, None when disabled
+        self.speculation = get_speculative_retrieval()
 
     def _create_workflow(self) -> StateGraph:
         """Create the LangGraph workflow"""
         workflow = StateGraph(AgentState)
 
         # Add nodes
-        workflow.add_node(self.connectivity_agent.name, self.connectivity_agent)
-        workflow.add_node(self.connectivity_agent.tool_node.name, self.connectivity_agent.tool_node)
-        workflow.add_node(self.triage_agent.name, self.triage_agent)
-        workflow.add_node(self.knowledge_agent.name, self.knowledge_agent)
-        workflow.add_node(self.escalation_agent.name, self.escalation_agent)
-        workflow.add_node(self.escalation_agent.tool_node.name, self.escalation_agent.tool_node)
+        workflow.add_node(self.connectivity_agent.name, self._runnable(self.connectivity_agent))
+        workflow.add_node(self.connectivity_agent.tool_node.name, self._runnable(self.connectivity_agent.tool_node))
+        workflow.add_node(self.triage_agent.name, self._runnable(self.triage_agent))
+        workflow.add_node(self.knowledge_agent.name, self._runnable(self.knowledge_agent))
+        workflow.add_node(self.escalation_agent.name, self._runnable(self.escalation_agent))
+        workflow.add_node(self.escalation_agent.tool_node.name, self._runnable(self.escalation_agent.tool_node))
         
         # Add Triage Edges
         workflow.add_edge(START, self.triage_agent.name)
@@ -78,41 +121,255 @@ class NetworkSupportChatbot:
         # workflow.add_edge(END, self.connectivity_agent.name)
         return workflow
 
-    def process_question(self, question: str, thread_id: str = "default", debug: bool = False) -> str:
-        """Process a user question through the multi-agent system"""
+    def _runnable(self, node) -> RunnableLambda:
+        """Wraps an agent or tool node so invoke uses __call__ and ainvoke its acall coroutine"""
+        return RunnableLambda(node, afunc=node.acall, name=node.name)
 
-        # Initialize state
-        initial_state = AgentState(
+    def _initial_state(
+        self, question: str, user_language: str, deadline: float = None, speculation_id: str = ""
+    ) -> AgentState:
+        """Builds the state a new question enters the graph with"""
+        return AgentState(
             messages=[],
             tool_messages=[],
             escalation_messages=[],
             user_question=question,
             knowledge_score=-1,
             knowledge_action="",
+            knowledge_docs=[],
+            speculation_id=speculation_id,
+            network_entities={},
             final_answer="",
-            user_language=detect_language(question),
+            user_language=user_language,
             triage_message="",
+            step_tokens=[],
+            budget=new_budget(deadline),
         )
 
-        # Configure thread
-        config = {
+    def _config(self, thread_id: str, metrics: RequestMetrics, debug: bool = False) -> dict:
+        """Graph config for one conversation thread, the console tracer only runs in debug mode"""
+        callbacks = [metrics]
+        if debug:
+            callbacks.append(ConsoleCallbackHandler())
+        return {
             "configurable": {
                 "thread_id": thread_id
             },
-            "callbacks": [ConsoleCallbackHandler()]
+            "callbacks": callbacks
         }
 
+    def process_question(
+        self, question: str, thread_id: str = "default", debug: bool = False, deadline: float = None
+    ) -> str:
+        """
+        Process a user question through the multi-agent system. `deadline`
+        (a time.time() timestamp) bounds the run together with the LLM and
+        tool call limits of the request budget.
+        """
+        metrics = RequestMetrics(thread_id)
+        user_language = detect_language(question)
+        cached_answer, question_embedding = self._lookup_cache(question, user_language)
+        if cached_answer:
+            metrics.emit(cached=True)
+            return cached_answer
+
         # Run workflow
-        result = self.app.invoke(initial_state, config=config)
+        speculation_id = self._speculate(question)
+        try:
+            result = self.app.invoke(
+                self._initial_state(question, user_language, deadline, speculation_id),
+                config=self._config(thread_id, metrics, debug),
+            )
+        finally:
+            self._end_speculation(speculation_id)
+        self._finish_thread(thread_id)
+        self._report_tokens(result, debug)
+        metrics.emit(**self._outcome(result))
+        final_answer = self._answer(result)
+        if result.get("final_answer", ""):
+            self._store_cache(question, user_language, result, question_embedding)
+        return final_answer
+
+    async def aprocess_question(
+        self, question: str, thread_id: str = "default", debug: bool = False, deadline: float = None
+    ) -> str:
+        """
+        Async variant of process_question. The graph runs with ainvoke, so the
+        agents await their chat models and many questions can share one event loop.
+        """
+        metrics = RequestMetrics(thread_id)
+        user_language = detect_language(question)
+        cached_answer, question_embedding = await asyncio.to_thread(self._lookup_cache, question, user_language)
+        if cached_answer:
+            metrics.emit(cached=True)
+            return cached_answer
+
+        speculation_id = self._speculate(question)
+        try:
+            result = await self.app.ainvoke(
+                self._initial_state(question, user_language, deadline, speculation_id),
+                config=self._config(thread_id, metrics, debug),
+            )
+        finally:
+            self._end_speculation(speculation_id)
+        await asyncio.to_thread(self._finish_thread, thread_id)
+        self._report_tokens(result, debug)
+        metrics.emit(**self._outcome(result))
+        final_answer = self._answer(result)
+        if result.get("final_answer", ""):
+            await asyncio.to_thread(self._store_cache, question, user_language, result, question_embedding)
+        return final_answer
+
+    def stream_question(
+        self, question: str, thread_id: str = "default", debug: bool = False, deadline: float = None
+    ) -> Iterator[str]:
+        """
+        Streaming variant of process_question. Yields progressively more
+        complete replies while the graph runs: a status line when an agent
+        starts, then the final answer as the LLM writes it. The last value
+        yielded is always the complete answer.
+        """
+        metrics = RequestMetrics(thread_id)
+        user_language = detect_language(question)
+        cached_answer, question_embedding = self._lookup_cache(question, user_language)
+        if cached_answer:
+            metrics.emit(cached=True)
+            yield cached_answer
+            return
+
+        config = self._config(thread_id, metrics, debug)
+        outputs = {}
+        last_reply = ""
+        result = {}
+        speculation_id = self._speculate(question)
+        try:
+            stream = self.app.stream(
+                self._initial_state(question, user_language, deadline, speculation_id),
+                config=config,
+                stream_mode=["messages", "values"],
+            )
+            for mode, event in stream:
+                if mode == "values":
+                    result = event
+                    continue
+                chunk, metadata = event
+                if chunk.type not in ("ai", "AIMessageChunk"):
+                    continue
+                node = metadata.get("langgraph_node", "")
+                if node not in NODE_STATUS:
+                    continue
+                # Chunks of one LLM call share an id, complete messages replace the buffer
+                text = outputs.get(chunk.id, "") + chunk.content if isinstance(chunk, AIMessageChunk) else chunk.content
+                outputs[chunk.id] = text
+                reply = partial_answer(text) or NODE_STATUS[node]
+                if reply != last_reply:
+                    last_reply = reply
+                    yield reply
+        finally:
+            self._end_speculation(speculation_id)
+
+        self._finish_thread(thread_id)
+        self._report_tokens(result, debug)
+        metrics.emit(**self._outcome(result))
+        if result.get("final_answer", ""):
+            self._store_cache(question, user_language, result, question_embedding)
+        yield self._answer(result)
 
+    def _speculate(self, question: str) -> str:
+        """Starts the knowledge retrieval of the question before triage, returns its id or an empty string"""
+        # Questions the prerouter sends to the connectivity agent never need the documents
+        if self.speculation is None or self.triage_agent.prerouter.would_route(question):
+            return ""
+        try:
+            return self.speculation.start(question)
+        except Exception as e:
+            print(f"Speculative retrieval could not start: {e}")
+            return ""
+
+    def _end_speculation(self, speculation_id: str) -> None:
+        """Discards the speculative retrieval if the knowledge agent did not claim it"""
+        if speculation_id:
+            self.speculation.discard(speculation_id)
+
+    def _finish_thread(self, thread_id: str) -> None:
+        """Compacts the thread's checkpoints and evicts stale threads"""
+        if self.checkpoints is None:
+            return
+        try:
+            self.checkpoints.touch(thread_id)
+        except Exception as e:
+            print(f"Checkpoint maintenance failed: {e}")
+
+    def _report_tokens(self, result: dict, debug: bool) -> None:
+        """Records whether the budget stopped the run, prints the tokens per step in debug mode"""
+        reason = "" if result.get("final_answer", "") else exhausted(result, tools=True)
+        record_request(reason)
+        if reason:
+            print(f"Request stopped by its budget: {reason} {result.get('budget')}")
+        if debug and result.get("step_tokens"):
+            print(f"Tokens per step: {result['step_tokens']}")
+
+    def _outcome(self, result: dict) -> dict:
+        """Properties of the finished run added to its metrics record"""
+        return {
+            "cached": False,
+            "knowledge_action": result.get("knowledge_action", ""),
+            "budget_exhausted": "" if result.get("final_answer", "") else exhausted(result, tools=True),
+        }
+
+    def _answer(self, result: dict) -> str:
+        """Extracts the answer for the user from the final graph state"""
         messages = result.get("messages", [])
         final_answer = result.get("final_answer", "")
         if final_answer:
             return final_answer
+        if exhausted(result, tools=True):
+            return best_effort_answer(result)
         if messages:
             return self._parse(messages[-1].content)
         return "Lo siento, no pude procesar tu solicitud."
 
+    def _lookup_cache(self, question: str, user_language: str):
+        """Returns a cached answer (or None) and the question embedding, if computed"""
+        if self.answer_cache is None:
+            return None, None
+        try:
+            return self.answer_cache.lookup(question, user_language)
+        except Exception as e:
+            print(f"Answer cache lookup failed: {e}")
+            return None, None
+
+    def _store_cache(self, question: str, user_language: str, result: dict, embedding) -> None:
+        """Caches answers the knowledge agent gave from the documentation"""
+        if self.answer_cache is None:
+            return
+        # Connectivity results depend on live network state and escalations create tickets
+        if result.get("knowledge_action") != "respond" or result.get("escalation_messages"):
+            return
+        try:
+            self.answer_cache.store(question, user_language, result["final_answer"], embedding)
+        except Exception as e:
+            print(f"Answer cache store failed: {e}")
+
+    def stats(self) -> dict:
+        """Returns the counters of the routing, retrieval and caching layers"""
+        return {
+            "triage": self.triage_agent.stats(),
+            "prerouter": self.triage_agent.prerouter.stats(),
+            "vector_store": get_vector_store_manager().stats(),
+            "answer_cache": self.answer_cache.stats() if self.answer_cache else None,
+            "speculation": self.speculation.stats() if self.speculation else None,
+            "embedding_cache": embedding_cache_stats(),
+            "tool_cache": tool_cache_stats(),
+            "checkpoints": self.checkpoints.stats() if self.checkpoints else None,
+            "budget": budget_stats(),
+            "clients": client_stats(),
+            "models": {
+                agent.name: agent.model.stats()
+                for agent in (self.triage_agent, self.connectivity_agent, self.knowledge_agent, self.escalation_agent)
+            },
+        }
+
     def _parse(self, text: str) -> str:
         """Parse the final answer from the text"""
         if "Final Answer:" in text:
@@ -1,12 +1,13 @@
-from langchain_aws import ChatBedrock
-from langchain_ollama import ChatOllama
+# Provider SDKs are imported by the branch that uses them, so a cold start
+# only pays for the backend of its environment
 from langchain_core.language_models import BaseChatModel
-from langchain_aws.embeddings import BedrockEmbeddings
-from langchain_huggingface import HuggingFaceEndpoint, ChatHuggingFace
-from langchain_ollama.embeddings import OllamaEmbeddings
-from botocore.config import Config
 from typing import List, Any, TypedDict, Set
 from enum import Enum
+import threading
+import time
+
+from tools.embeddings import CachedEmbeddings, EmbeddingDiskStore
+from agents.clients import aws_client, shared_model
 
 import settings
 
@@ -19,7 +20,12 @@ class AgentState(TypedDict):
     user_language: str
     knowledge_score: int
     knowledge_action: str
+    knowledge_docs: List[dict]
+    speculation_id: str
+    network_entities: dict
     triage_message: str
+    step_tokens: List[dict]
+    budget: dict
 
 class AgentNames(Enum):
     CONNECTIVITY = "CONNECTIVITY"
@@ -43,45 +49,144 @@ class AgentNames(Enum):
         """Check if a string is a valid status."""
         return value in cls._value2member_map_
 
+HUGGING_FACE_MODEL = "meta-llama/Llama-3.2-3B-Instruct"
+
 def model_selection(model_name: str = "", use_huggingface: bool = False) -> BaseChatModel:
-    """Selects the appropriate model based on the environment."""
+    """
+    Selects the appropriate model based on the environment. Clients are
+    shared: agents asking for the same model and parameters get the same
+    instance, and every Bedrock model uses the region's shared boto3 client.
+    """
     if settings.ENVIRONMENT == "local":
-        if model_name:
-            return ChatOllama(model=model_name, temperature=0)
-        return ChatOllama(model=settings.LLAMA32_MODEL_ARN, temperature=0)
+        from langchain_ollama import ChatOllama
+        return shared_model(
+            "ollama", model_name or settings.LLAMA32_MODEL_ARN, ChatOllama,
+            model=model_name or settings.LLAMA32_MODEL_ARN, temperature=0,
+        )
     elif use_huggingface and settings.ENVIRONMENT == "production":
-        llm = HuggingFaceEndpoint(
-            repo_id="meta-llama/Llama-3.2-3B-Instruct",
-            task="text-generation",
-            max_new_tokens=4096,
-            temperature=0,
-            provider="novita",
-            huggingfacehub_api_token=settings.HUGGING_FACE_API_KEY,
+        from langchain_huggingface import HuggingFaceEndpoint, ChatHuggingFace
+
+        def chat_huggingface(repo_id: str, max_new_tokens: int, temperature: float, provider: str):
+            llm = HuggingFaceEndpoint(
+                repo_id=repo_id,
+                task="text-generation",
+                max_new_tokens=max_new_tokens,
+                temperature=temperature,
+                provider=provider,
+                huggingfacehub_api_token=settings.HUGGING_FACE_API_KEY,
+            )
+            return ChatHuggingFace(llm=llm, verbose=settings.DEBUG_MODE)
+
+        return shared_model(
+            "huggingface", HUGGING_FACE_MODEL, chat_huggingface,
+            repo_id=HUGGING_FACE_MODEL, max_new_tokens=4096, temperature=0, provider="novita",
         )
-        chat = ChatHuggingFace(llm=llm, verbose=settings.DEBUG_MODE)
-        return chat
     elif settings.ENVIRONMENT == "production":
-        config=Config(connect_timeout=5, read_timeout=60, retries={'max_attempts': 20})
-        max_token_limit = 4096
-        if model_name:
+        from langchain_aws import ChatBedrock
+
+        def chat_bedrock(**params):
             return ChatBedrock(
-                model=model_name, 
-                temperature=0, 
-                config=config, 
-                max_tokens=max_token_limit, 
-                provider="meta")
-        return ChatBedrock(
-            model=settings.LLAMA32_MODEL_ARN,
-            temperature=0, 
-            config=config, 
-            max_tokens=max_token_limit, 
-            provider="meta")
+                client=aws_client("bedrock-runtime", params["region_name"]),
+                bedrock_client=aws_client("bedrock", params["region_name"]),
+                **params,
+            )
+
+        return shared_model(
+            "bedrock", model_name or settings.LLAMA32_MODEL_ARN, chat_bedrock,
+            model=model_name or settings.LLAMA32_MODEL_ARN,
+            temperature=0,
+            max_tokens=4096,
+            provider="meta",
+            region_name=settings.BEDROCK_REGION,
+        )
+
 
+class LazyModel:
+    """
+    Chat model of an agent, built with model_selection on first use. A cold
+    start only creates the clients of the agents its questions are routed to.
+    """
+
+    def __init__(self, model_name: str = "", use_huggingface: bool = False, llm: BaseChatModel = None):
+        self.model_name = model_name
+        self.use_huggingface = use_huggingface
+        self._llm = llm
+        self._with_tools = None
+        self._lock = threading.Lock()
+        self.build_seconds = 0.0
+
+    def get(self) -> BaseChatModel:
+        if self._llm is None:
+            with self._lock:
+                if self._llm is None:
+                    start = time.perf_counter()
+                    self._llm = model_selection(self.model_name, use_huggingface=self.use_huggingface)
+                    self.build_seconds = time.perf_counter() - start
+        return self._llm
+
+    def bind_tools(self, tools: list):
+        """Returns the model bound to `tools`, binding it once"""
+        if self._with_tools is None:
+            llm = self.get()
+            with self._lock:
+                if self._with_tools is None:
+                    self._with_tools = llm.bind_tools(tools)
+        return self._with_tools
+
+    def stats(self) -> dict:
+        return {"built": self._llm is not None, "build_seconds": round(self.build_seconds, 4)}
+
+
+LOCAL_EMBEDDING_MODEL = "qllama/multilingual-e5-base:q4_k_m"
+BEDROCK_EMBEDDING_MODEL = "amazon.titan-embed-text-v2:0"
+
+def embedding_model_id() -> str:
+    """Returns the id of the embedding model used in the current environment."""
+    if settings.ENVIRONMENT == "local":
+        return LOCAL_EMBEDDING_MODEL
+    return BEDROCK_EMBEDDING_MODEL
+
+_embedding_model = None
+_embedding_lock = threading.Lock()
 
 def select_embedding_model():
+    """
+    Returns the process-wide embedding model for the environment, wrapped
+    in a query cache so repeated strings are embedded only once.
+    """
+    global _embedding_model
+    if _embedding_model is None:
+        with _embedding_lock:
+            if _embedding_model is None:
+                embeddings = build_embedding_model()
+                if settings.EMBEDDING_CACHE_ENABLED:
+                    disk_store = None
+                    if settings.EMBEDDING_CACHE_PATH:
+                        disk_store = EmbeddingDiskStore(settings.EMBEDDING_CACHE_PATH)
+                    embeddings = CachedEmbeddings(
+                        embeddings,
+                        model_id=embedding_model_id(),
+                        max_bytes=settings.EMBEDDING_CACHE_MAX_BYTES,
+                        disk_store=disk_store,
+                    )
+                _embedding_model = embeddings
+    return _embedding_model
+
+def embedding_cache_stats():
+    """Returns the query embedding cache counters, or None if it is not in use."""
+    if isinstance(_embedding_model, CachedEmbeddings):
+        return _embedding_model.stats()
+    return None
+
+def build_embedding_model():
     """Selects the appropriate embedding model based on the environment."""
     if settings.ENVIRONMENT == "local":
-        return OllamaEmbeddings(model="qllama/multilingual-e5-base:q4_k_m")
+        from langchain_ollama.embeddings import OllamaEmbeddings
+        return OllamaEmbeddings(model=LOCAL_EMBEDDING_MODEL)
     elif settings.ENVIRONMENT == "production":
-        config=Config(connect_timeout=5, read_timeout=60, retries={'max_attempts': 20})
-        return BedrockEmbeddings(model_id="amazon.titan-embed-text-v2:0", config=config)
\ No newline at end of file
+        from langchain_aws.embeddings import BedrockEmbeddings
+        return BedrockEmbeddings(
+            model_id=BEDROCK_EMBEDDING_MODEL,
+            region_name=settings.BEDROCK_REGION,
+            client=aws_client("bedrock-runtime"),
+        )
\ No newline at end of file
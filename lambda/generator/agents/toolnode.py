@@ -0,0 +1,154 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from typing import Dict, List, Optional
+
+# LangChain imports
+from langchain_core.messages import ToolMessage
+from langchain_core.tools import BaseTool
+
+from agents.history import cap_tool_message
+from agents.budget import charge, remaining_seconds, remaining_tool_calls, TOOL_CALLS
+import settings
+
+
+class ParallelToolNode:
+    """
+    Graph node that executes every tool call of the last AI message
+    concurrently, so a diagnostic step takes as long as its slowest probe
+    instead of the sum of all of them.
+
+    `concurrency_limits` caps how many calls of a given tool run at once
+    (e.g. WHOIS servers rate-limit aggressively), and `step_timeout` bounds
+    the wall time of the whole step: calls still running when it expires are
+    reported back to the model as errors. Outputs longer than
+    `max_output_chars` are cut before they enter the history.
+
+    Calls count against the request budget: the step never outlives the
+    request deadline, and calls beyond the remaining tool calls are not run.
+    """
+
+    def __init__(
+        self,
+        tools: List[BaseTool],
+        name: str,
+        messages_key: str = "messages",
+        concurrency_limits: Optional[Dict[str, int]] = None,
+        max_workers: int = 0,
+        step_timeout: float = 0,
+        max_output_chars: int = None,
+    ):
+        self.name = name
+        self.messages_key = messages_key
+        self.tools_by_name = {tool.name: tool for tool in tools}
+        self.step_timeout = step_timeout or settings.TOOL_STEP_TIMEOUT
+        self.max_output_chars = settings.TOOL_OUTPUT_MAX_CHARS if max_output_chars is None else max_output_chars
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.TOOL_MAX_WORKERS,
+            thread_name_prefix=name,
+        )
+        self.concurrency_limits = concurrency_limits or {}
+        self._semaphores = {
+            tool_name: threading.BoundedSemaphore(limit)
+            for tool_name, limit in self.concurrency_limits.items()
+        }
+
+    def _error(self, call: dict, content: str) -> ToolMessage:
+        return ToolMessage(
+            content=content,
+            name=call["name"],
+            tool_call_id=call["id"],
+            status="error",
+        )
+
+    def _invalid(self, call: dict) -> Optional[ToolMessage]:
+        if call["name"] in self.tools_by_name:
+            return None
+        return self._error(
+            call, f"Error: {call['name']} is not a valid tool, try one of [{', '.join(self.tools_by_name)}]."
+        )
+
+    def _timed_out(self, call: dict) -> ToolMessage:
+        return self._error(call, f"Error: {call['name']} did not finish in time.")
+
+    def _over_budget(self, call: dict) -> ToolMessage:
+        return self._error(call, f"Error: {call['name']} was not run, the tool call budget is exhausted.")
+
+    def _budgeted(self, state: dict, tool_calls: List[dict]) -> tuple:
+        """Splits the calls into those the budget allows and those it does not, returns the step timeout"""
+        allowed = remaining_tool_calls(state)
+        timeout = max(min(self.step_timeout, remaining_seconds(state)), 0)
+        return tool_calls[:allowed], tool_calls[allowed:], timeout
+
+    def _result(self, state: dict, outputs: List[ToolMessage], ran: int) -> dict:
+        update = {self.messages_key: outputs}
+        if state.get("budget"):
+            charge(state, TOOL_CALLS, ran)
+            update["budget"] = state["budget"]
+        return update
+
+    def _tool_calls(self, state: dict) -> List[dict]:
+        messages = state.get(self.messages_key, [])
+        if not messages:
+            raise ValueError(f"No messages found in state key '{self.messages_key}'")
+        return getattr(messages[-1], "tool_calls", None) or []
+
+    def _run_one(self, call: dict) -> ToolMessage:
+        invalid = self._invalid(call)
+        if invalid is not None:
+            return invalid
+        semaphore = self._semaphores.get(call["name"]) or nullcontext()
+        try:
+            with semaphore:
+                output = self.tools_by_name[call["name"]].invoke({**call, "type": "tool_call"})
+            return cap_tool_message(output, self.max_output_chars)
+        except Exception as e:
+            return self._error(call, f"Error: {repr(e)}\n Please fix your mistakes.")
+
+    async def _arun_one(self, call: dict, semaphores: Dict[str, asyncio.Semaphore]) -> ToolMessage:
+        invalid = self._invalid(call)
+        if invalid is not None:
+            return invalid
+        semaphore = semaphores.get(call["name"]) or nullcontext()
+        try:
+            async with semaphore:
+                output = await self.tools_by_name[call["name"]].ainvoke({**call, "type": "tool_call"})
+            return cap_tool_message(output, self.max_output_chars)
+        except Exception as e:
+            return self._error(call, f"Error: {repr(e)}\n Please fix your mistakes.")
+
+    def __call__(self, state: dict) -> dict:
+        tool_calls, skipped, timeout = self._budgeted(state, self._tool_calls(state))
+        # Each call runs in a copy of the current context so the run's callbacks see the tools
+        futures = [self._executor.submit(contextvars.copy_context().run, self._run_one, call) for call in tool_calls]
+        wait(futures, timeout=timeout)
+
+        outputs = []
+        for call, future in zip(tool_calls, futures):
+            if future.done():
+                outputs.append(future.result())
+            else:
+                future.cancel()
+                outputs.append(self._timed_out(call))
+        outputs.extend(self._over_budget(call) for call in skipped)
+        return self._result(state, outputs, len(tool_calls))
+
+    async def acall(self, state: dict) -> dict:
+        """Async variant of __call__, runs the tools' coroutines on the event loop"""
+        tool_calls, skipped, timeout = self._budgeted(state, self._tool_calls(state))
+        semaphores = {name: asyncio.Semaphore(limit) for name, limit in self.concurrency_limits.items()}
+        tasks = [asyncio.ensure_future(self._arun_one(call, semaphores)) for call in tool_calls]
+        if tasks:
+            await asyncio.wait(tasks, timeout=timeout)
+
+        outputs = []
+        for call, task in zip(tool_calls, tasks):
+            if task.done():
+                outputs.append(task.result())
+            else:
+                task.cancel()
+                outputs.append(self._timed_out(call))
+        outputs.extend(self._over_budget(call) for call in skipped)
+        return self._result(state, outputs, len(tool_calls))
@@ -1,18 +1,67 @@
+import asyncio
 import re
+import threading
 
 # LangChain imports
+from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import HumanMessage, SystemMessage
 
 # App specific imports
-from agents.state import AgentState, AgentNames, model_selection
+from agents.state import AgentState, AgentNames, LazyModel
+from agents.budget import charge, exhausted, LLM_CALLS
+from tools.triagerouter import get_triage_router
+from tools.prerouter import get_prerouter
+import settings
+
+# Agents the local router may send a question to without asking the LLM
+LOCAL_ROUTES = {
+    AgentNames.CONNECTIVITY.value,
+    AgentNames.KNOWLEDGE.value,
+    AgentNames.ESCALATION.value,
+}
 
 
 class TriageAgent:
     """Decides which agent to route the user question to based on the content of the question"""
 
-    def __init__(self, model_name: str = ""):
+    def __init__(self, model_name: str = "", router=None, threshold: float = None, llm: BaseChatModel = None):
         self.name = AgentNames.TRIAGE.value
-        self.llm = model_selection(model_name)
+        self.model = LazyModel(model_name, llm=llm)
+        self.prerouter = get_prerouter()
+        self.router = router if router is not None else get_triage_router()
+        self.threshold = settings.TRIAGE_ROUTER_THRESHOLD if threshold is None else threshold
+        self._lock = threading.Lock()
+        self._stats = {"prerouted": 0, "local_routes": 0, "llm_routes": 0}
+
+    def _count(self, route: str) -> None:
+        # Graph runs share the agent across threads (and asyncio.to_thread)
+        with self._lock:
+            self._stats[route] += 1
+
+    def stats(self) -> dict:
+        """Returns how many questions each router decided."""
+        with self._lock:
+            return dict(self._stats)
+
+    @property
+    def llm(self) -> BaseChatModel:
+        return self.model.get()
+
+    def local_route(self, user_question: str) -> str:
+        """
+        Returns the agent chosen by the local embedding router, or an empty
+        string when the router is unavailable or not confident enough.
+        """
+        if self.router is None:
+            return ""
+        try:
+            label, confidence = self.router.classify_text(user_question)
+        except Exception as e:
+            print(f"Triage router failed, falling back to LLM: {e}")
+            return ""
+        if confidence >= self.threshold and label in LOCAL_ROUTES:
+            return label
+        return ""
 
     def route_condition(self, state: AgentState) -> str:
         """
@@ -39,9 +88,30 @@ class TriageAgent:
             return agent_name
         return default_agent
 
-    def __call__(self, state: AgentState) -> AgentState:
-        """Executes the connectivity agent logic"""
+    def _route_locally(self, state: AgentState) -> bool:
+        """
+        Tries the prerouter and the local router, sets the triage message and
+        returns True if either of them routed the question.
+        """
         user_question = state.get("user_question", "")
+
+        prerouted, entities = self.prerouter.match(user_question)
+        state["network_entities"] = entities
+        if prerouted:
+            self._count("prerouted")
+            state["triage_message"] = f"Final Answer: {AgentNames.CONNECTIVITY.value}"
+            return True
+
+        agent_name = self.local_route(user_question)
+        if agent_name:
+            self._count("local_routes")
+            state["triage_message"] = f"Final Answer: {agent_name}"
+            return True
+        self._count("llm_routes")
+        return False
+
+    def _messages(self, user_question: str) -> list:
+        """Builds the routing prompt for the triage LLM"""
         messages = list()
         system_message = SystemMessage(
             content=f"""
@@ -67,12 +137,26 @@ class TriageAgent:
         messages.append(system_message)
         user_message = HumanMessage(content=f"Question: {user_question}")
         messages.append(user_message)
+        return messages
 
-        # Call the LLM with tools
-        response = self.llm.invoke(messages)
-        # Process response
-
+    def _process(self, state: AgentState, response) -> AgentState:
+        """Stores the routing decision of the triage LLM"""
         if hasattr(response, "content"):
             state["triage_message"] = response.content
-            
         return state
+
+    def __call__(self, state: AgentState) -> AgentState:
+        """Executes the triage agent logic"""
+        if self._route_locally(state) or exhausted(state):
+            return state
+        charge(state, LLM_CALLS)
+        response = self.llm.invoke(self._messages(state.get("user_question", "")))
+        return self._process(state, response)
+
+    async def acall(self, state: AgentState) -> AgentState:
+        """Async variant of __call__, the local routers run on a worker thread"""
+        if await asyncio.to_thread(self._route_locally, state) or exhausted(state):
+            return state
+        charge(state, LLM_CALLS)
+        response = await self.llm.ainvoke(self._messages(state.get("user_question", "")))
+        return self._process(state, response)
@@ -1,40 +1,173 @@
-from agents.networksupportchatbot import NetworkSupportChatbot
-from tools.telegram import send_message
+from tools.telegram import send_message, asend_message, StreamingReply
+import asyncio
+import httpx
 import json
+from concurrent.futures import ThreadPoolExecutor
+import time
+import runtime
 import settings
 
 def local_handler():
-    chatbot = NetworkSupportChatbot()
+    chatbot = runtime.get_chatbot()
     debug_mode = settings.DEBUG_MODE
     while True:
         user_input = input("You: ")
         if user_input.lower() in ["exit", "quit"]:
             break
-        response = chatbot.process_question(user_input, debug=debug_mode)
+        response = chatbot.process_question(user_input, thread_id="local", debug=debug_mode)
         print(f"Bot: {response}")
 
+ERROR_MESSAGE = "Un error a ocurrido al procesar tu mensaje. Por favor, inténtalo de nuevo más tarde."
+
+
+def parse_record(record):
+    """Returns (chat_id, text) for a Telegram record, or None for anything else."""
+    income_message = json.loads(record['body'])
+    if income_message.get("type") != "telegram":
+        return None
+    chat_id = income_message["message"]["message"]["chat"]["id"]
+    msg_text = income_message["message"]["message"].get("text", " ")
+    return chat_id, msg_text
+
+
+def request_deadline(context):
+    """time.time() by which a request must be answered to reply before the Lambda times out"""
+    if context is None or not hasattr(context, "get_remaining_time_in_millis"):
+        return None
+    return time.time() + context.get_remaining_time_in_millis() / 1000 - settings.BUDGET_DEADLINE_MARGIN
+
+
+def is_last_attempt(record):
+    """True when SQS will not redeliver the record if it fails again."""
+    attempts = int(record.get("attributes", {}).get("ApproximateReceiveCount", "1"))
+    return attempts >= settings.SQS_MAX_RECEIVE_COUNT
+
+
+def stream_reply(chatbot, reply, chat_id, msg_text, options):
+    """Edits the Telegram reply as the answer is generated"""
+    response = ""
+    for response in chatbot.stream_question(msg_text, thread_id=str(chat_id), **options):
+        reply.update(response)
+    reply.finish(response)
+
+
+def process_record(chatbot, token, record, chat_id, msg_text, options):
+    """Answers one message, returns False if it should be retried."""
+    reply = StreamingReply(token, chat_id) if settings.STREAMING_MODE else None
+    try:
+        if reply is not None:
+            stream_reply(chatbot, reply, chat_id, msg_text, options)
+        else:
+            response = chatbot.process_question(msg_text, thread_id=str(chat_id), **options)
+            send_message(token, chat_id, response)
+        return True
+    except Exception as e:
+        print(f"Error processing message: {msg_text}")
+        print(e)
+        if not is_last_attempt(record):
+            return False
+        try:
+            if reply is not None and reply.message_id is not None:
+                reply.finish(ERROR_MESSAGE)
+            else:
+                send_message(token, chat_id, ERROR_MESSAGE)
+        except Exception as err:
+            print(f"Failed to send error message: {err}")
+        return True
+
+
+def process_chat(chatbot, token, records, options):
+    """
+    Processes the records of one chat in arrival order and returns the message
+    ids that failed. Once a message fails the rest of the chat is retried too,
+    so the conversation is not answered out of order.
+    """
+    failures = []
+    for record, chat_id, msg_text in records:
+        if failures or not process_record(chatbot, token, record, chat_id, msg_text, options):
+            failures.append(record["messageId"])
+    return failures
+
+
+async def aprocess_record(chatbot, token, record, chat_id, msg_text, options, client):
+    """Async variant of process_record"""
+    try:
+        response = await chatbot.aprocess_question(msg_text, thread_id=str(chat_id), **options)
+        await asend_message(token, chat_id, response, client=client)
+        return True
+    except Exception as e:
+        print(f"Error processing message: {msg_text}")
+        print(e)
+        if not is_last_attempt(record):
+            return False
+        try:
+            await asend_message(token, chat_id, ERROR_MESSAGE, client=client)
+        except Exception as err:
+            print(f"Failed to send error message: {err}")
+        return True
+
+
+async def aprocess_chats(chatbot, token, chats, options):
+    """Processes every chat of the batch on one event loop, returns the failed message ids"""
+    semaphore = asyncio.Semaphore(settings.SQS_BATCH_WORKERS)
+
+    async def process_chat(records):
+        failures = []
+        async with semaphore:
+            for record, chat_id, msg_text in records:
+                if failures or not await aprocess_record(chatbot, token, record, chat_id, msg_text, options, client):
+                    failures.append(record["messageId"])
+        return failures
+
+    async with httpx.AsyncClient(timeout=30) as client:
+        results = await asyncio.gather(*(process_chat(records) for records in chats.values()))
+    return [message_id for failures in results for message_id in failures]
+
+
 def lambda_handler(event, context):
-    chatbot = NetworkSupportChatbot()
+    if event.get("action") == "health_check":
+        return runtime.health_check()
+
+    start = time.perf_counter()
+    cold = not runtime.is_initialized()
+    chatbot = runtime.get_chatbot()
     debug_mode = settings.DEBUG_MODE
     token = settings.TELEGRAM_KEY
-    for message in event['Records']:        
+    # Options of every question: all of them must finish before the Lambda times out
+    options = {"debug": debug_mode, "deadline": request_deadline(context)}
+
+    # Group the batch by chat: chats run concurrently, messages of a chat in order
+    chats = {}
+    for record in event['Records']:
         try:
-            print(f"Processed message {message['body']}")
-            income_message = json.loads(message['body'])
-            if income_message.get("type") == "telegram":
-                chat_id = income_message["message"]["message"]["chat"]["id"]
-                msg_text = income_message["message"]["message"].get("text", " ")
-                try:
-                    response = chatbot.process_question(msg_text, debug=debug_mode)
-                    send_message(token, chat_id, response)
-                except Exception as e:
-                    print(f"Error processing message: {msg_text}")
-                    print(e)
-                    send_message(token, chat_id, "Un error a ocurrido al procesar tu mensaje. Por favor, inténtalo de nuevo más tarde.")
+            print(f"Processed message {record['body']}")
+            parsed = parse_record(record)
         except Exception as err:
+            # Malformed bodies would fail the same way on every retry
             print("An error occurred")
             print(err)
+            continue
+        if parsed is not None:
+            chats.setdefault(parsed[0], []).append((record, *parsed))
+
+    failures = []
+    if chats and settings.ASYNC_MODE:
+        failures = asyncio.run(aprocess_chats(chatbot, token, chats, options))
+    elif chats:
+        workers = min(settings.SQS_BATCH_WORKERS, len(chats))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(process_chat, chatbot, token, records, options)
+                for records in chats.values()
+            ]
+            for future in futures:
+                failures.extend(future.result())
 
+    runtime.record_invocation(time.perf_counter() - start, cold)
+    if debug_mode:
+        print(f"Runtime latency: {json.dumps(runtime.latency_report())}")
+        print(f"Chatbot stats: {json.dumps(chatbot.stats())}")
+    return {"batchItemFailures": [{"itemIdentifier": message_id} for message_id in failures]}
 
 if __name__ == "__main__":
-    local_handler()
\ No newline at end of file
+    local_handler()
@@ -0,0 +1,126 @@
+"""
+Checkpoint storage growth over a long replay of conversations.
+
+Replays --turns questions spread over --chats Telegram chats through a
+graph with the chatbot's AgentState and a triage -> agent -> answer shape
+(no models involved), and reports the checkpoints kept and the memory or
+file size they use for:
+
+- shared_thread: every chat on thread "default" with MemorySaver, no
+  maintenance (the previous behaviour).
+- memory / sqlite: per-chat threads with agents.checkpointer.CheckpointStore
+  compacting and evicting.
+- none: no checkpointer.
+
+Usage:
+    python benchmark/checkpoint_growth.py --turns 2000 --chats 300 --max-threads 100
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage  # noqa: E402
+from langgraph.checkpoint.memory import MemorySaver  # noqa: E402
+from langgraph.graph import END, START, StateGraph  # noqa: E402
+
+from agents.checkpointer import CheckpointStore, create_checkpointer  # noqa: E402
+from agents.state import AgentState  # noqa: E402
+
+PROMPT = "You are a knowledge agent. " * 80
+FACTS = "A VLAN is a virtual LAN segment. " * 40
+
+
+def build_graph(checkpointer):
+    def triage(state):
+        state["triage_message"] = "Final Answer: KNOWLEDGE"
+        return state
+
+    def knowledge(state):
+        state["knowledge_docs"] = [{"page_content": FACTS, "source": "network_architecture.md", "score": 0.9}]
+        state["messages"].append(SystemMessage(content=PROMPT + FACTS))
+        state["messages"].append(HumanMessage(content=state["user_question"]))
+        state["messages"].append(AIMessage(content='{"action": "respond", "final_answer": "' + FACTS + '"}'))
+        state["knowledge_score"] = 8
+        state["knowledge_action"] = "respond"
+        state["final_answer"] = FACTS
+        return state
+
+    workflow = StateGraph(AgentState)
+    workflow.add_node("TRIAGE", triage)
+    workflow.add_node("KNOWLEDGE", knowledge)
+    workflow.add_edge(START, "TRIAGE")
+    workflow.add_edge("TRIAGE", "KNOWLEDGE")
+    workflow.add_edge("KNOWLEDGE", END)
+    return workflow.compile(checkpointer=checkpointer)
+
+
+def initial_state(question):
+    return AgentState(
+        messages=[], tool_messages=[], escalation_messages=[], user_question=question,
+        knowledge_score=-1, knowledge_action="", knowledge_docs=[], network_entities={},
+        final_answer="", user_language="English", triage_message="", step_tokens=[],
+    )
+
+
+def replay(label, checkpointer, store, turns, chats, per_chat, path=None):
+    rng = random.Random(7)
+    app = build_graph(checkpointer)
+    tracemalloc.start()
+    start = time.perf_counter()
+    for turn in range(turns):
+        thread_id = str(rng.randrange(chats)) if per_chat else "default"
+        app.invoke(initial_state(f"question {turn}"), config={"configurable": {"thread_id": thread_id}})
+        if store is not None:
+            store.touch(thread_id)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    report = {
+        "mode": label,
+        "turns": turns,
+        "seconds": round(elapsed, 2),
+        "traced_mb": round(current / 2**20, 2),
+        "peak_mb": round(peak / 2**20, 2),
+        "checkpoints": len(list(checkpointer.list(None))) if checkpointer is not None else 0,
+    }
+    if store is not None:
+        report.update(store.stats())
+    if path:
+        report["file_mb"] = round(os.path.getsize(path) / 2**20, 2)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=1000)
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--max-threads", type=int, default=100)
+    parser.add_argument("--ttl", type=float, default=3600)
+    args = parser.parse_args()
+
+    report = [replay("shared_thread", MemorySaver(), None, args.turns, args.chats, per_chat=False)]
+
+    checkpointer = create_checkpointer("memory")
+    store = CheckpointStore(checkpointer, ttl=args.ttl, max_threads=args.max_threads, compact=True)
+    report.append(replay("memory", checkpointer, store, args.turns, args.chats, per_chat=True))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "checkpoints.sqlite")
+        checkpointer = create_checkpointer("sqlite", path)
+        store = CheckpointStore(checkpointer, ttl=args.ttl, max_threads=args.max_threads, compact=True)
+        report.append(replay("sqlite", checkpointer, store, args.turns, args.chats, per_chat=True, path=path))
+
+    report.append(replay("none", None, None, args.turns, args.chats, per_chat=True))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Import time and cold start profile of the generator.
+
+Imports each of --modules in a fresh interpreter with `python -X importtime`
+and reports, as the median of --runs runs:
+
+- total: cumulative import time of the module.
+- top_modules: the --top modules with the highest cumulative import time.
+- packages: self import time summed per top-level package, which is what
+  deferring a dependency saves.
+- deferred_loaded: which of the SDKs the code imports lazily (provider
+  clients, Pinecone, DNS, WHOIS, language detection) were imported anyway.
+
+With --construct it also times runtime.get_chatbot() in a fresh interpreter
+and reports which agents' chat models it built (none, they are built on the
+first question routed to them).
+
+Usage:
+    python benchmark/cold_start.py --runs 5 --top 15
+    python benchmark/cold_start.py --modules runtime --construct
+"""
+import argparse
+import json
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from statistics import median
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Dependencies only imported by the code path that needs them
+DEFERRED = [
+    "langchain_aws", "langchain_ollama", "langchain_huggingface", "botocore",
+    "pinecone", "langchain_pinecone", "dns", "whois", "langdetect",
+]
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)")
+
+CONSTRUCT = """
+import json, sys, time
+start = time.perf_counter()
+import runtime
+imported = time.perf_counter()
+chatbot = runtime.get_chatbot()
+built = time.perf_counter()
+print(json.dumps({
+    "import_seconds": round(imported - start, 4),
+    "construct_seconds": round(built - imported, 4),
+    "models": {name: stats["built"] for name, stats in chatbot.stats()["models"].items()},
+    "deferred_loaded": sorted({m.split(".")[0] for m in sys.modules} & set(%r)),
+}))
+"""
+
+
+def profile_import(module):
+    """Returns {module: (self_us, cumulative_us)} for one fresh import of `module`"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}; import sys; print(' '.join(sys.modules))"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    timings = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            timings[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    loaded = {name.split(".")[0] for name in result.stdout.split()}
+    return timings, sorted(loaded & set(DEFERRED))
+
+
+def summarize(module, runs, top):
+    totals, per_module, per_package = [], defaultdict(list), defaultdict(list)
+    deferred_loaded = []
+    for _ in range(runs):
+        timings, deferred_loaded = profile_import(module)
+        totals.append(timings[module][1])
+        packages = defaultdict(int)
+        for name, (self_us, cumulative_us) in timings.items():
+            per_module[name].append(cumulative_us)
+            packages[name.split(".")[0]] += self_us
+        for package, self_us in packages.items():
+            per_package[package].append(self_us)
+
+    def ms(samples):
+        return round(median(samples) / 1000, 2)
+
+    top_modules = sorted(per_module.items(), key=lambda item: median(item[1]), reverse=True)
+    top_packages = sorted(per_package.items(), key=lambda item: median(item[1]), reverse=True)
+    return {
+        "module": module,
+        "total_ms": ms(totals),
+        "modules_imported": len(per_module),
+        "top_modules": {name: ms(samples) for name, samples in top_modules[:top] if name != module},
+        "packages": {name: ms(samples) for name, samples in top_packages[:top]},
+        "deferred_loaded": deferred_loaded,
+    }
+
+
+def construct():
+    result = subprocess.run(
+        [sys.executable, "-c", CONSTRUCT % DEFERRED], cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--modules", default="runtime,app")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--construct", action="store_true")
+    args = parser.parse_args()
+
+    report = {"python": sys.version.split()[0], "imports": []}
+    for module in args.modules.split(","):
+        report["imports"].append(summarize(module, args.runs, args.top))
+    if args.construct:
+        report["construct"] = construct()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
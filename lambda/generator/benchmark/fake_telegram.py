@@ -0,0 +1,111 @@
+"""
+Local stand-in for the Telegram Bot API.
+
+Implements sendMessage and editMessageText, records every call with its
+arrival time, and can answer with 429 (retry_after) or 502 to exercise the
+retry handling. Like Telegram, texts longer than 4096 characters are rejected. Point the generator at it with TELEGRAM_API_URL, e.g.:
+
+    server = FakeTelegramServer().start()
+    settings.TELEGRAM_API_URL = server.url
+"""
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class FakeTelegramServer:
+    def __init__(
+        self, latency: float = 0.0, rate_limit_every: int = 0, retry_after: float = 1, fail_every: int = 0
+    ):
+        """
+        latency: seconds to sleep before answering each call.
+        rate_limit_every: answer every Nth call with 429 (0 disables it).
+        fail_every: answer every Nth call with 502 (0 disables it).
+        """
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.fail_every = fail_every
+        self.connections = set()
+        self.calls = []
+        self.messages = {}
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+            self.messages.clear()
+            self.connections.clear()
+            self._next_id = 1
+
+    def _handle(self, method, params):
+        with self._lock:
+            self.calls.append({"method": method, "time": time.perf_counter(), **params})
+            if self.rate_limit_every and len(self.calls) % self.rate_limit_every == 0:
+                return 429, {"ok": False, "error_code": 429, "parameters": {"retry_after": self.retry_after}}
+            if self.fail_every and len(self.calls) % self.fail_every == 0:
+                return 502, {"ok": False, "error_code": 502, "description": "Bad Gateway"}
+            if len(params.get("text", "")) > 4096:
+                return 400, {"ok": False, "error_code": 400, "description": "Bad Request: message is too long"}
+            if method == "sendMessage":
+                message_id = self._next_id
+                self._next_id += 1
+                self.messages[message_id] = params.get("text", "")
+                return 200, {"ok": True, "result": {"message_id": message_id, "text": self.messages[message_id]}}
+            if method == "editMessageText":
+                message_id = int(params.get("message_id", 0))
+                if message_id not in self.messages:
+                    return 400, {"ok": False, "description": "Bad Request: message to edit not found"}
+                if self.messages[message_id] == params.get("text", ""):
+                    return 400, {"ok": False, "description": "Bad Request: message is not modified"}
+                self.messages[message_id] = params.get("text", "")
+                return 200, {"ok": True, "result": {"message_id": message_id}}
+        return 404, {"ok": False, "description": "Not Found"}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # Keep-alive responses are written in two parts, avoid Nagle delays
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def do_POST(self):
+                with server._lock:
+                    server.connections.add(self.client_address)
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+                if self.headers.get("Content-Type", "").startswith("application/json"):
+                    params = json.loads(body or "{}")
+                else:
+                    params = {key: values[-1] for key, values in parse_qs(body).items()}
+                if server.latency:
+                    time.sleep(server.latency)
+                status, payload = server._handle(self.path.rsplit("/", 1)[-1], params)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
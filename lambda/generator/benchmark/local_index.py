@@ -0,0 +1,148 @@
+"""
+Latency and recall of the local vector index (tools/localindex.py).
+
+Builds float32 and float16 indexes of --documents synthetic embeddings
+(--clusters topics with --spread noise, like chunks of a few manuals) in a
+temporary directory, or reads the rows of an existing --index, and queries
+them with perturbed rows. Each backend is compared with an exact float32
+in-memory brute force search:
+
+- recall: share of the brute force top --k found by nearest().
+- mmr_overlap: share of the documents search_vector() returns (MMR over
+  the top fetch_k) that the same MMR over the brute force candidates
+  returns too.
+- p50/p95/p99 query latency in ms, with and without MMR.
+
+Usage:
+    python benchmark/local_index.py --documents 5000 --dimension 768 --queries 500
+    python benchmark/local_index.py --index models/knowledge_index
+"""
+import argparse
+import json
+import math
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from tools.localindex import LocalVectorIndex, build_local_index, EMBEDDINGS_FILE  # noqa: E402
+from tools.vectordb import maximal_marginal_relevance, MMR_FETCH_K  # noqa: E402
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(math.ceil(p / 100 * len(ordered)) - 1, 0))]
+
+
+def synthetic_embeddings(documents, dimension, clusters, spread, rng):
+    centers = rng.standard_normal((clusters, dimension)).astype(np.float32)
+    labels = rng.integers(0, clusters, documents)
+    rows = centers[labels] + spread * rng.standard_normal((documents, dimension)).astype(np.float32)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+def make_queries(matrix, count, noise, rng):
+    rows = matrix[rng.integers(0, len(matrix), count)]
+    queries = rows + noise * rng.standard_normal(rows.shape).astype(np.float32) / math.sqrt(matrix.shape[1])
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def brute_force(matrix, query, k):
+    scores = matrix @ query
+    return np.argsort(-scores)[:k]
+
+
+def timed(function, queries):
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(function(query))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies, results
+
+
+def latency_report(latencies):
+    return {
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+    }
+
+
+def evaluate(name, index, file_bytes, queries, k, num_results, exact, exact_mmr):
+    nearest_latencies, nearest = timed(lambda query: index.nearest(query, k)[0], queries)
+    search_latencies, searched = timed(lambda query: index.search_vector(query, num_results), queries)
+    recall = np.mean([len(set(found) & set(truth)) / k for found, truth in zip(nearest, exact)])
+    overlap = np.mean([
+        len(set(truth.tolist()) & {int(doc["page_content"]) for doc in found}) / num_results
+        for found, truth in zip(searched, exact_mmr)
+    ])
+    return {
+        "backend": name,
+        "recall": round(float(recall), 4),
+        "mmr_overlap": round(float(overlap), 4),
+        "nearest": latency_report(nearest_latencies),
+        "search": latency_report(search_latencies),
+        "file_mb": round(file_bytes / 2 ** 20, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--index", type=Path, help="existing index directory instead of synthetic embeddings")
+    parser.add_argument("--documents", type=int, default=5000)
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=50)
+    parser.add_argument("--spread", type=float, default=0.05)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--noise", type=float, default=0.5)
+    parser.add_argument("--k", type=int, default=MMR_FETCH_K)
+    parser.add_argument("--num-results", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    if args.index:
+        matrix = np.asarray(np.load(args.index / EMBEDDINGS_FILE), dtype=np.float32)
+    else:
+        matrix = synthetic_embeddings(args.documents, args.dimension, args.clusters, args.spread, rng)
+    queries = make_queries(matrix, args.queries, args.noise, rng)
+
+    brute_latencies, exact = timed(lambda query: brute_force(matrix, query, args.k), queries)
+    exact_mmr = [
+        candidates[maximal_marginal_relevance(query, matrix[candidates], k=args.num_results, lambda_mult=0.25)]
+        for query, candidates in zip(queries, exact)
+    ]
+
+    # The row number is the content, to match the results of search_vector to brute force
+    documents = [{"page_content": str(i), "source": "benchmark"} for i in range(len(matrix))]
+    report = {
+        "documents": len(matrix),
+        "dimension": int(matrix.shape[1]),
+        "queries": len(queries),
+        "k": args.k,
+        "brute_force": latency_report(brute_latencies),
+        "backends": [],
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for dtype in ["float32", "float16"]:
+            path = Path(directory) / dtype
+            build_local_index(path, documents, matrix, embedding_model="benchmark", dtype=dtype)
+            start = time.perf_counter()
+            index = LocalVectorIndex(path)
+            load_ms = (time.perf_counter() - start) * 1000
+            report["backends"].append(
+                evaluate(f"local_{dtype}", index, (path / EMBEDDINGS_FILE).stat().st_size, queries, args.k, args.num_results, exact, exact_mmr)
+            )
+            report["backends"][-1]["load_ms"] = round(load_ms, 2)
+            del index
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Sync versus async throughput of the network diagnostic tools on loopback.
+
+Starts local TCP listeners on 127.0.0.1 and runs batches of check_port
+(open and closed ports) and ping_ip against loopback three ways:
+sequential sync calls, sync calls on a thread pool, and async calls
+gathered on one event loop. These modes bypass the tool result cache, so
+every call reaches the network. The sync_sequential_cached mode runs the
+same batch with the cache on (cleared first) and reports its hits.
+
+Usage:
+    python benchmark/network_tools.py --calls 200
+"""
+import argparse
+import asyncio
+import json
+import shutil
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.network import check_port, ping_ip, tool_cache  # noqa: E402
+
+
+def open_listeners(count):
+    listeners = []
+    for _ in range(count):
+        sck = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sck.bind(("127.0.0.1", 0))
+        sck.listen(512)
+        listeners.append(sck)
+    return listeners
+
+
+def closed_port():
+    sck = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sck.bind(("127.0.0.1", 0))
+    port = sck.getsockname()[1]
+    sck.close()
+    return port
+
+
+def measure(label, calls, run):
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": label,
+        "calls": calls,
+        "seconds": round(elapsed, 4),
+        "calls_per_second": round(calls / elapsed, 1) if elapsed else None,
+    }
+
+
+def bench(tool, inputs, workers):
+    async def gather():
+        await asyncio.gather(*(tool.ainvoke(args) for args in inputs))
+
+    def pooled():
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(tool.invoke, inputs))
+
+    tool_cache.enabled = False
+    results = [
+        measure("sync_sequential", len(inputs), lambda: [tool.invoke(args) for args in inputs]),
+        measure(f"sync_threads_{workers}", len(inputs), pooled),
+        measure("async_gather", len(inputs), lambda: asyncio.run(gather())),
+    ]
+
+    tool_cache.enabled = True
+    tool_cache.clear()
+    before = tool_cache.stats()["tools"].get(tool.name, {"hits": 0, "misses": 0})
+    results.append(measure("sync_sequential_cached", len(inputs), lambda: [tool.invoke(args) for args in inputs]))
+    after = tool_cache.stats()["tools"][tool.name]
+    results[-1]["cache_hits"] = after["hits"] - before["hits"]
+    results[-1]["cache_misses"] = after["misses"] - before["misses"]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--pings", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    listeners = open_listeners(8)
+    open_ports = [sck.getsockname()[1] for sck in listeners]
+    ports = open_ports + [closed_port()]
+    port_inputs = [{"host": "127.0.0.1", "port": ports[i % len(ports)]} for i in range(args.calls)]
+
+    report = {"check_port": bench(check_port, port_inputs, args.workers)}
+    if shutil.which("ping"):
+        ping_inputs = [{"ip_address": "127.0.0.1"} for _ in range(args.pings)]
+        report["ping_ip"] = bench(ping_ip, ping_inputs, args.workers)
+    else:
+        report["ping_ip"] = "skipped: ping binary not found"
+
+    for sck in listeners:
+        sck.close()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""
+Offline replay of question sets through NetworkSupportChatbot.
+
+Runs the real graph (triage, agents, tool node, budget, checkpointer) with
+deterministic fakes instead of Bedrock, Pinecone and the network:
+
+- ScriptedChatModel answers every agent prompt in the format its parser
+  expects, routing each question to the intent it is labeled with, after
+  --llm-ms of simulated latency.
+- InMemoryVectorStore scores the markdown documents of train/data/md by
+  word overlap, after --retrieval-ms.
+- Stub tools with the names and schemas of the network and escalation
+  tools return canned outputs after --tool-ms.
+
+Questions come from train/data/json/triage_train.json by default, or from
+--questions: a triage-style {"DataArray": [...]} file, Telegram updates
+(like receiver/telegram_test.json) or a list of strings. The report has
+p50/p95/p99 latency, throughput and LLM/tool/retrieval calls per question
+for the sequential, batched (thread pool, like lambda_handler) and async
+(aprocess_question on one event loop) modes.
+
+Usage:
+    python benchmark/offline_replay.py --limit 100 --llm-ms 50 --tool-ms 20 --retrieval-ms 30
+    python benchmark/offline_replay.py --modes async --concurrency 32 --questions ../receiver/telegram_test.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Keep the run offline and its output clean, explicit environment values win
+os.environ.setdefault("ANSWER_CACHE_ENABLED", "false")
+os.environ.setdefault("TRIAGE_ROUTER_ENABLED", "false")
+os.environ.setdefault("METRICS_ENABLED", "false")
+os.environ.setdefault("CHECKPOINT_BACKEND", "memory")
+
+from langchain_core.language_models import BaseChatModel  # noqa: E402
+from langchain_core.messages import AIMessage  # noqa: E402
+from langchain_core.outputs import ChatGeneration, ChatResult  # noqa: E402
+from langchain_core.tools import StructuredTool  # noqa: E402
+
+from agents.history import estimate_tokens  # noqa: E402
+from agents.networksupportchatbot import NetworkSupportChatbot  # noqa: E402
+from tools.escalation import get_escalation_tools  # noqa: E402
+from tools.network import get_network_tools  # noqa: E402
+from tools.vectordb import set_vector_store_manager  # noqa: E402
+
+DEFAULT_QUESTIONS = ROOT / "train" / "data" / "json" / "triage_train.json"
+DOCUMENTS = ROOT / "train" / "data" / "md"
+
+# Labels of the training set and the agent the fake triage sends them to
+ROUTES = {"connectivity": "CONNECTIVITY", "escalation": "ESCALATION"}
+
+TOOL_OUTPUTS = {
+    "ping_ip": "PING 8.8.8.8: 4 packets transmitted, 4 received, 0% packet loss, avg 12.3 ms",
+    "check_port": "Port 443 on example.com is open",
+    "query_dns_record": "example.com A 93.184.216.34 (ttl 300)",
+    "get_domain_metadata": {"domain": "example.com", "registrar": "RESERVED-IANA", "expires": "2026-08-13"},
+    "escalate_request": "Ticket TASK-1042 created",
+}
+
+counters = {"llm_calls": 0, "tool_calls": 0, "retrievals": 0}
+counters_lock = threading.Lock()
+
+
+def count(kind):
+    with counters_lock:
+        counters[kind] += 1
+
+
+def delay(mean_ms, jitter, key):
+    """Deterministic latency for a given call: mean_ms +/- jitter, seeded by the call content"""
+    if mean_ms <= 0:
+        return 0.0
+    rng = random.Random(zlib.crc32(key.encode()))
+    return max(mean_ms * (1 + rng.uniform(-jitter, jitter)), 0.0) / 1000
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Answers the prompts of every agent like a well-behaved model would"""
+
+    intents: dict = {}
+    latency_ms: float = 0.0
+    jitter: float = 0.2
+
+    @property
+    def _llm_type(self):
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _question(self, messages):
+        for message in messages:
+            if message.type == "human":
+                match = re.match(r"question:\s*(.*?)(\nThought:)?$", message.content, re.IGNORECASE | re.DOTALL)
+                if match:
+                    return match.group(1).strip()
+        return ""
+
+    def _reply(self, messages):
+        system = messages[0].content
+        question = self._question(messages)
+        route = ROUTES.get(self.intents.get(question, ""), "KNOWLEDGE")
+        used_tools = any(message.type == "tool" for message in messages)
+
+        # Prompts mention other agents, so match on how each one introduces itself
+        if "You are a routing triage agent" in system:
+            return AIMessage(content=f"Thought: the user needs the {route.lower()} agent.\nFinal Answer: {route}")
+        if "You are an escalation agent" in system:
+            if used_tools:
+                return AIMessage(content="Thought: the ticket exists.\nFinal Answer: I created ticket TASK-1042.")
+            return AIMessage(content="Thought: this needs a ticket.", tool_calls=[{
+                "name": "escalate_request",
+                "args": {"title": "User request", "description": question, "question": question},
+                "id": "call_ticket",
+            }])
+        if "You are a network connectivity agent" in system:
+            if used_tools:
+                return AIMessage(content="Thought: the host answers.\nFinal Answer: The host is reachable and resolves.")
+            return AIMessage(content="Thought: I should check reachability and DNS.", tool_calls=[
+                {"name": "ping_ip", "args": {"ip_address": "8.8.8.8"}, "id": "call_ping"},
+                {"name": "query_dns_record", "args": {"domain_name": "example.com", "record_type": "A"}, "id": "call_dns"},
+            ])
+        if "1. Grade:" in system:
+            return AIMessage(content=json.dumps({
+                "question": question, "thought": "The facts cover it.", "score": 8,
+                "action": "respond", "final_answer": f"Based on the documentation: {question}",
+            }))
+        if "You are a teacher grading" in system:
+            return AIMessage(content=json.dumps({"question": question, "thought": "Relevant facts.", "score": 8}))
+        if "You are a knowledge agent" in system:
+            return AIMessage(content=json.dumps({
+                "question": question, "action": "respond", "final_answer": f"Based on the documentation: {question}",
+            }))
+        return AIMessage(content="Final Answer: I can not help with that.")
+
+    def _result(self, messages):
+        count("llm_calls")
+        message = self._reply(messages)
+        message.usage_metadata = {
+            "input_tokens": estimate_tokens(messages),
+            "output_tokens": estimate_tokens([message]),
+            "total_tokens": estimate_tokens(messages) + estimate_tokens([message]),
+        }
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(delay(self.latency_ms, self.jitter, messages[-1].content))
+        return self._result(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(delay(self.latency_ms, self.jitter, messages[-1].content))
+        return self._result(messages)
+
+
+class InMemoryVectorStore:
+    """Word-overlap search over the markdown documents, with the manager's search/stats interface"""
+
+    def __init__(self, latency_ms=0.0, chunk_chars=800):
+        self.latency_ms = latency_ms
+        self.chunks = []
+        for path in sorted(DOCUMENTS.glob("*.md")):
+            text = path.read_text(encoding="utf-8")
+            for start in range(0, len(text), chunk_chars):
+                content = text[start:start + chunk_chars]
+                self.chunks.append((content, path.name, set(re.findall(r"\w+", content.lower()))))
+        self.queries = 0
+
+    def search(self, question, num_results=5, lambda_mult=0.25):
+        count("retrievals")
+        time.sleep(delay(self.latency_ms, 0.2, question))
+        words = set(re.findall(r"\w+", question.lower()))
+        scored = sorted(
+            ((len(words & chunk_words) / (len(words) or 1), content, source)
+             for content, source, chunk_words in self.chunks),
+            reverse=True,
+        )
+        self.queries += 1
+        return [
+            {"page_content": content, "source": source, "page": None, "score": score}
+            for score, content, source in scored[:num_results]
+        ]
+
+    def stats(self):
+        return {"queries": self.queries, "chunks": len(self.chunks)}
+
+
+def stub_tools(tools, latency_ms):
+    """Tools with the same names and schemas that return canned outputs"""
+    def make(real):
+        def run(**kwargs):
+            count("tool_calls")
+            time.sleep(delay(latency_ms, 0.2, real.name + json.dumps(kwargs, sort_keys=True)))
+            return TOOL_OUTPUTS.get(real.name, "ok")
+
+        async def arun(**kwargs):
+            count("tool_calls")
+            await asyncio.sleep(delay(latency_ms, 0.2, real.name + json.dumps(kwargs, sort_keys=True)))
+            return TOOL_OUTPUTS.get(real.name, "ok")
+
+        return StructuredTool.from_function(
+            func=run, coroutine=arun, name=real.name, description=real.description, args_schema=real.args_schema,
+        )
+    return [make(tool) for tool in tools]
+
+
+def load_questions(path):
+    """Returns (question, intent) pairs, intent is "" for unlabeled sets"""
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    if isinstance(data, dict) and "DataArray" in data:
+        return [(item["Question"], item.get("intent", "")) for item in data["DataArray"]]
+    if isinstance(data, dict):
+        data = [data]
+    questions = []
+    for item in data:
+        if isinstance(item, str):
+            questions.append((item, ""))
+        elif item.get("message", {}).get("text"):
+            questions.append((item["message"]["text"], ""))
+    return questions
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(math.ceil(p / 100 * len(ordered)) - 1, 0))]
+
+
+def summarize(mode, latencies, elapsed):
+    with counters_lock:
+        calls = dict(counters)
+        for kind in counters:
+            counters[kind] = 0
+    n = len(latencies)
+    return {
+        "mode": mode,
+        "questions": n,
+        "seconds": round(elapsed, 3),
+        "throughput_qps": round(n / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        **{f"{kind}_per_question": round(value / n, 2) for kind, value in calls.items()},
+    }
+
+
+def timed(chatbot, question, thread_id):
+    start = time.perf_counter()
+    chatbot.process_question(question, thread_id=thread_id)
+    return time.perf_counter() - start
+
+
+def run_sequential(chatbot, questions):
+    return [timed(chatbot, question, f"seq-{i}") for i, (question, _) in enumerate(questions)]
+
+
+def run_batched(chatbot, questions, batch_size, workers):
+    latencies = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for offset in range(0, len(questions), batch_size):
+            batch = questions[offset:offset + batch_size]
+            latencies.extend(executor.map(
+                lambda item: timed(chatbot, item[1][0], f"batch-{offset + item[0]}"), enumerate(batch)
+            ))
+    return latencies
+
+
+def run_async(chatbot, questions, concurrency):
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(i, question):
+            async with semaphore:
+                start = time.perf_counter()
+                await chatbot.aprocess_question(question, thread_id=f"async-{i}")
+                return time.perf_counter() - start
+
+        return await asyncio.gather(*(one(i, question) for i, (question, _) in enumerate(questions)))
+    return asyncio.run(main())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--questions", default=str(DEFAULT_QUESTIONS))
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--modes", default="sequential,batched,async")
+    parser.add_argument("--llm-ms", type=float, default=50)
+    parser.add_argument("--tool-ms", type=float, default=20)
+    parser.add_argument("--retrieval-ms", type=float, default=30)
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    questions = load_questions(args.questions)
+    random.Random(args.seed).shuffle(questions)
+    questions = questions[:args.limit] if args.limit else questions
+
+    model = ScriptedChatModel(intents=dict(questions), latency_ms=args.llm_ms)
+    set_vector_store_manager(InMemoryVectorStore(latency_ms=args.retrieval_ms))
+    start = time.perf_counter()
+    chatbot = NetworkSupportChatbot(
+        model_factory=lambda model_name: model,
+        network_tools=stub_tools(get_network_tools(), args.tool_ms),
+        escalation_tools=stub_tools(get_escalation_tools(), args.tool_ms),
+    )
+    build_seconds = time.perf_counter() - start
+
+    report = {"build_seconds": round(build_seconds, 3), "runs": []}
+    for mode in args.modes.split(","):
+        start = time.perf_counter()
+        if mode == "sequential":
+            latencies = run_sequential(chatbot, questions)
+        elif mode == "batched":
+            latencies = run_batched(chatbot, questions, args.batch_size, args.workers)
+        elif mode == "async":
+            latencies = run_async(chatbot, questions, args.concurrency)
+        else:
+            parser.error(f"unknown mode {mode}")
+        report["runs"].append(summarize(mode, latencies, time.perf_counter() - start))
+    report["stats"] = chatbot.stats()
+    print(json.dumps(report, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
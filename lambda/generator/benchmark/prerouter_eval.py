@@ -0,0 +1,66 @@
+"""
+Evaluates the connectivity pre-router against labeled questions.
+
+Reports how often it fires, its precision (fired questions that really
+are connectivity questions), its recall over the connectivity examples
+and every false positive, for two sets:
+
+- tuning: train/data/json/triage_train.json, the examples the rules were
+  written against, so its precision is optimistic.
+- held_out: train/data/json/prerouter_holdout.json, phrasings written
+  apart from the rules and never used to tune them. Keep it that way:
+  add a misroute found here to a regression test, not to the rules'
+  tuning loop.
+
+Usage:
+    python benchmark/prerouter_eval.py
+"""
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.prerouter import PreRouter  # noqa: E402
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "train" / "data" / "json"
+DATA_SETS = {"tuning": DATA_DIR / "triage_train.json", "held_out": DATA_DIR / "prerouter_holdout.json"}
+
+
+def evaluate(path):
+    with open(path, encoding="utf-8") as f:
+        examples = [(row["Question"], row["intent"].upper()) for row in json.load(f)["DataArray"]]
+
+    prerouter = PreRouter()
+    fired, false_positives = [], []
+    start = time.perf_counter()
+    for question, label in examples:
+        matched, _ = prerouter.match(question)
+        if matched:
+            fired.append(label)
+            if label != "CONNECTIVITY":
+                false_positives.append(f"[{label}] {question}")
+    elapsed = time.perf_counter() - start
+
+    connectivity = sum(label == "CONNECTIVITY" for _, label in examples)
+    true_positives = fired.count("CONNECTIVITY")
+    negatives = len(examples) - connectivity
+    return {
+        "examples": len(examples),
+        "fired": len(fired),
+        "fire_rate": round(len(fired) / len(examples), 4),
+        "precision": round(true_positives / len(fired), 4) if fired else None,
+        "connectivity_recall": round(true_positives / connectivity, 4) if connectivity else None,
+        "false_positive_rate": round(len(false_positives) / negatives, 4) if negatives else None,
+        "avg_us_per_question": round(elapsed / len(examples) * 1e6, 2),
+        "false_positives": false_positives,
+    }
+
+
+def main():
+    print(json.dumps({name: evaluate(path) for name, path in DATA_SETS.items()}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Input tokens per ReAct step with and without history compaction.
+
+Simulates a connectivity session of --steps tool steps, each returning an
+observation of --observation-chars characters (a raw WHOIS dump is several
+thousand), and reports the estimated prompt tokens sent at every step and
+in total, with the full history vs agents.history.HistoryManager.
+
+Usage:
+    python benchmark/react_history.py --steps 8 --observation-chars 4000 --budget 3000
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage  # noqa: E402
+
+from agents.history import HistoryManager, cap_tool_message, estimate_tokens  # noqa: E402
+
+SYSTEM_PROMPT = "You are a network connectivity agent. Use the following format. " * 40
+
+
+def session(steps, observation_chars, history, max_output_chars):
+    messages = [SystemMessage(content=SYSTEM_PROMPT), HumanMessage(content="Question: why can't I reach example.com?")]
+    per_step = []
+    for step in range(steps):
+        sent = history.compact(messages) if history else messages
+        per_step.append(estimate_tokens(sent))
+        call_id = f"call_{step}"
+        messages.append(AIMessage(
+            content=f"Thought: step {step}, I should check the domain.",
+            tool_calls=[{"name": "get_domain_metadata", "args": {"domain": "example.com"}, "id": call_id}],
+        ))
+        observation = ToolMessage(content="x" * observation_chars, tool_call_id=call_id)
+        messages.append(cap_tool_message(observation, max_output_chars) if max_output_chars else observation)
+    return {"tokens_per_step": per_step, "total_input_tokens": sum(per_step)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--steps", type=int, default=8)
+    parser.add_argument("--observation-chars", type=int, default=4000)
+    parser.add_argument("--budget", type=int, default=3000)
+    parser.add_argument("--max-output-chars", type=int, default=1500)
+    args = parser.parse_args()
+
+    report = {
+        "full_history": session(args.steps, args.observation_chars, None, 0),
+        "capped_outputs": session(args.steps, args.observation_chars, None, args.max_output_chars),
+        "capped_and_compacted": session(
+            args.steps, args.observation_chars, HistoryManager(token_budget=args.budget), args.max_output_chars
+        ),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
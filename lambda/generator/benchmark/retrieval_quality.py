@@ -0,0 +1,195 @@
+"""
+Retrieval quality of the vector, keyword and hybrid retrievers.
+
+Runs the labeled questions of train/data/json/retrieval_eval.json (each
+lists the source file and pages that answer it) against the knowledge base
+chunks with every retrieval mode:
+
+- vector: the current path, similarity search and MMR (lambda_mult=0.25).
+- keyword: BM25 over the chunks, reranked (RETRIEVAL_MODE=keyword).
+- hybrid_rrf: BM25 and vector rankings fused with reciprocal rank fusion.
+- hybrid: the fused ranking reranked by query term coverage
+  (RETRIEVAL_MODE=hybrid).
+
+and reports, overall and per question type (exact terms like model numbers
+and CLI commands, or paraphrased "semantic" questions):
+
+- hit@1, hit@N: share of questions with a relevant chunk first / in the N
+  chunks the knowledge agent gets (--num-results).
+- mrr: mean reciprocal rank of the first relevant chunk in the top --candidates.
+- chunks, context_tokens: chunks and estimated prompt tokens sent to the LLM.
+- p50_ms: retrieval latency, embedding included.
+
+Chunks are loaded like train/load_vectordb.py does, which needs pymupdf
+and langchain-community (requirements-full.txt), or from --documents (a
+keyword index or local index documents.json). Vectors come from --index
+(a local index built by load_vectordb.py --backend local) embedded with the
+runtime model, or with --embeddings hashing from a hashed bag of words and
+character trigrams: an offline stand-in that needs no model, but is far
+more lexical than a real embedding model, so it understates the gap between
+vector and hybrid retrieval on exact terms.
+
+Usage:
+    python benchmark/retrieval_quality.py --embeddings hashing
+    ENVIRONMENT=production python benchmark/retrieval_quality.py --index models/knowledge_index
+"""
+import argparse
+import json
+import math
+import sys
+import tempfile
+import time
+import zlib
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import settings  # noqa: E402
+from agents.history import CHARS_PER_TOKEN  # noqa: E402
+from tools.hybrid import HybridRetriever, KeywordIndex, TOKEN  # noqa: E402
+from tools.localindex import LocalVectorIndex, LocalVectorStoreManager, build_local_index  # noqa: E402
+from tools.vectordb import KNOWLEDGE_NUM_RESULTS  # noqa: E402
+
+EVAL_PATH = ROOT / "train" / "data" / "json" / "retrieval_eval.json"
+
+
+class HashingEmbeddings:
+    """Deterministic offline embeddings: hashed words and character trigrams, L2-normalized"""
+
+    def __init__(self, dimension: int = 1024):
+        self.dimension = dimension
+
+    def embed_query(self, text):
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        words = TOKEN.findall(text.lower())
+        grams = [word[i:i + 3] for word in words for i in range(max(len(word) - 2, 1))]
+        for feature in words + grams:
+            vector[zlib.crc32(feature.encode()) % self.dimension] += 1.0
+        return (vector / (np.linalg.norm(vector) or 1.0)).tolist()
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(math.ceil(p / 100 * len(ordered)) - 1, 0))]
+
+
+def load_chunks(path):
+    if path:
+        return json.loads(Path(path).read_text(encoding="utf-8"))["documents"]
+    sys.path.insert(0, str(ROOT / "train"))
+    try:
+        from load_vectordb import load_documents
+        documents = load_documents()
+    except ImportError as e:
+        sys.exit(
+            f"Loading the PDFs needs the ingestion dependencies ({e}): "
+            "pip install -r requirements-full.txt, or pass --documents models/knowledge_bm25.json"
+        )
+    return [{"page_content": doc.page_content, **doc.metadata} for doc in documents]
+
+
+def is_relevant(document, labels):
+    page = document.get("page")
+    page = int(page) if page is not None else None
+    return any(
+        document.get("source") == label["source"] and (label["page"] is None or label["page"] == page)
+        for label in labels
+    )
+
+
+def evaluate(name, search, questions, num_results, candidates):
+    rows = []
+    for question in questions:
+        start = time.perf_counter()
+        ranked = search(question["Question"], candidates)
+        elapsed = (time.perf_counter() - start) * 1000
+        returned = ranked[:num_results]
+        relevant = [is_relevant(document, question["relevant"]) for document in ranked]
+        first = relevant.index(True) + 1 if True in relevant else 0
+        rows.append({
+            "type": question["type"],
+            "hit@1": float(first == 1),
+            f"hit@{num_results}": float(0 < first <= num_results),
+            "mrr": 1.0 / first if first else 0.0,
+            "chunks": len(returned),
+            "context_tokens": sum(len(document["page_content"]) for document in returned) // CHARS_PER_TOKEN,
+            "ms": elapsed,
+        })
+
+    def summarize(selected):
+        metrics = [key for key in selected[0] if key not in ("type", "ms")]
+        summary = {key: round(sum(row[key] for row in selected) / len(selected), 3) for key in metrics}
+        summary["p50_ms"] = round(percentile([row["ms"] for row in selected], 50), 2)
+        summary["questions"] = len(selected)
+        return summary
+
+    by_type = defaultdict(list)
+    for row in rows:
+        by_type[row["type"]].append(row)
+    return {"mode": name, **summarize(rows), "by_type": {kind: summarize(selected) for kind, selected in by_type.items()}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--questions", type=Path, default=EVAL_PATH)
+    parser.add_argument("--documents", help="chunks from a keyword index or local index documents.json")
+    parser.add_argument("--index", type=Path, help="local vector index, queries embedded with the runtime model")
+    parser.add_argument("--embeddings", choices=["runtime", "hashing"], default="hashing")
+    parser.add_argument("--num-results", type=int, default=KNOWLEDGE_NUM_RESULTS)
+    parser.add_argument("--candidates", type=int, default=settings.HYBRID_CANDIDATES)
+    parser.add_argument("--rerank-weight", type=float, default=settings.HYBRID_RERANK_WEIGHT)
+    parser.add_argument("--min-score", type=float, default=settings.HYBRID_MIN_SCORE)
+    args = parser.parse_args()
+
+    with open(args.questions, encoding="utf-8") as f:
+        questions = json.load(f)["DataArray"]
+    if args.embeddings == "runtime" or args.index:
+        from agents.state import select_embedding_model
+        embeddings = select_embedding_model()
+    else:
+        embeddings = HashingEmbeddings()
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.index:
+            index = LocalVectorIndex(args.index)
+            chunks = index.documents
+        else:
+            chunks = load_chunks(args.documents)
+            start = time.perf_counter()
+            vectors = embeddings.embed_documents([chunk["page_content"] for chunk in chunks])
+            print(f"Embedded {len(chunks)} chunks in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+            build_local_index(directory, chunks, vectors, embedding_model=args.embeddings, dtype="float32")
+            index = LocalVectorIndex(directory)
+        vector = LocalVectorStoreManager(index, embeddings)
+        keyword_index = KeywordIndex.build(chunks)
+
+        def retriever(mode, rerank_weight):
+            return HybridRetriever(keyword_index, vector, mode, candidates=args.candidates,
+                                   rerank_weight=rerank_weight, min_score=args.min_score)
+
+        modes = {
+            "vector": lambda question, k: vector.search(question, num_results=k),
+            "keyword": retriever("keyword", args.rerank_weight).search,
+            "hybrid_rrf": retriever("hybrid", 0.0).search,
+            "hybrid": retriever("hybrid", args.rerank_weight).search,
+        }
+        report = {
+            "questions": len(questions),
+            "chunks": len(chunks),
+            "embeddings": str(args.index) if args.index else args.embeddings,
+            "num_results": args.num_results,
+            "modes": [evaluate(name, search, questions, args.num_results, args.candidates)
+                      for name, search in modes.items()],
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Cold versus warm latency of the generator runtime.
+
+Compares rebuilding NetworkSupportChatbot for every event (the old
+lambda_handler behaviour) against reusing the container-wide instance
+from runtime.get_chatbot(). Optionally replays questions through both
+paths to include the graph execution time.
+
+Usage:
+    python benchmark/runtime_latency.py --iterations 5
+    python benchmark/runtime_latency.py --iterations 3 --question "What is a VLAN?"
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from statistics import median
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from agents.networksupportchatbot import NetworkSupportChatbot  # noqa: E402
+import runtime  # noqa: E402
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "n": len(samples),
+        "p50_ms": round(median(samples) * 1000, 2),
+        "max_ms": round(samples[-1] * 1000, 2),
+    }
+
+
+def rebuild_per_event(iterations, question):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        chatbot = NetworkSupportChatbot()
+        if question:
+            chatbot.process_question(question)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def reuse_warm(iterations, question):
+    runtime.reset_chatbot()
+    samples = []
+    for i in range(iterations + 1):
+        start = time.perf_counter()
+        chatbot = runtime.get_chatbot()
+        if question:
+            chatbot.process_question(question)
+        elapsed = time.perf_counter() - start
+        runtime.record_invocation(elapsed, cold=(i == 0))
+        if i > 0:
+            samples.append(elapsed)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--question", default="")
+    args = parser.parse_args()
+
+    rebuild = rebuild_per_event(args.iterations, args.question)
+    warm = reuse_warm(args.iterations, args.question)
+    report = {
+        "rebuild_per_event": summarize(rebuild),
+        "warm_reuse": summarize(warm),
+        "runtime": runtime.latency_report(),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
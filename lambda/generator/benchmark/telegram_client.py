@@ -0,0 +1,118 @@
+"""
+Throughput and resilience of tools.telegram.TelegramClient.
+
+Runs against the local fake Telegram server in benchmark/fake_telegram.py:
+
+- throughput: a bare requests.post per reply (the old send_message) vs the
+  pooled client sending sequentially vs send_batch, with the number of TCP
+  connections each one opened.
+- long replies: a reply several times Telegram's limit is split and delivered.
+- resilience: with 429 and 502 answers injected every few calls, every
+  reply is still delivered.
+
+Usage:
+    python benchmark/telegram_client.py --messages 200 --latency 0.005
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import settings  # noqa: E402
+from fake_telegram import FakeTelegramServer  # noqa: E402
+from tools.telegram import MAX_MESSAGE_LENGTH, TelegramClient, api_url  # noqa: E402
+
+
+def measure(server, label, run, messages):
+    server.reset()
+    start = time.perf_counter()
+    run(messages)
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": label,
+        "messages": len(messages),
+        "seconds": round(elapsed, 3),
+        "messages_per_second": round(len(messages) / elapsed, 1),
+        "connections": len(server.connections),
+    }
+
+
+def throughput(server, count):
+    messages = [(chat_id % 10, f"reply {chat_id}") for chat_id in range(count)]
+
+    def bare(messages):
+        for chat_id, text in messages:
+            requests.post(api_url("token", "sendMessage"), data={"chat_id": chat_id, "text": text})
+
+    def pooled(messages):
+        client = TelegramClient("token")
+        for chat_id, text in messages:
+            client.send_message(chat_id, text)
+
+    def batch(messages):
+        TelegramClient("token").send_batch(messages)
+
+    return [
+        measure(server, "bare_requests_post", bare, messages),
+        measure(server, "client_sequential", pooled, messages),
+        measure(server, f"client_send_batch_{settings.TELEGRAM_POOL_SIZE}", batch, messages),
+    ]
+
+
+def long_reply(server):
+    server.reset()
+    paragraphs = [f"Paragraph {i}: " + "lorem ipsum dolor sit amet " * 30 for i in range(40)]
+    text = "\n\n".join(paragraphs)
+    TelegramClient("token").send_message(1, text)
+    sent = [call["text"] for call in server.calls]
+    return {
+        "characters": len(text),
+        "messages": len(sent),
+        "longest": max(len(chunk) for chunk in sent),
+        "within_limit": all(len(chunk) <= MAX_MESSAGE_LENGTH for chunk in sent),
+        "content_preserved": " ".join(sent).split() == text.split(),
+    }
+
+
+def resilience(count):
+    server = FakeTelegramServer(rate_limit_every=6, retry_after=0.05, fail_every=13).start()
+    settings.TELEGRAM_API_URL = server.url
+    try:
+        client = TelegramClient("token")
+        results = client.send_batch((chat_id, f"reply {chat_id}") for chat_id in range(count))
+        return {
+            "messages": count,
+            "delivered": sum(1 for result in results if not isinstance(result, Exception)),
+            "client": client.stats(),
+        }
+    finally:
+        server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.005, help="fake server latency per call")
+    args = parser.parse_args()
+
+    server = FakeTelegramServer(latency=args.latency).start()
+    settings.TELEGRAM_API_URL = server.url
+    try:
+        report = {
+            "throughput": throughput(server, args.messages),
+            "long_reply": long_reply(server),
+        }
+    finally:
+        server.stop()
+    report["resilience"] = resilience(args.messages // 4)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Time to first visible output and Telegram API volume, blocking vs streaming.
+
+Replays a simulated answer (a status line after --think seconds, then the
+answer written word by word at --tokens-per-second) against the local fake
+Telegram server. The blocking mode sends one message when the answer is
+complete, the streaming mode uses tools.telegram.StreamingReply with each
+of the given edit intervals.
+
+Usage:
+    python benchmark/telegram_streaming.py --think 8 --words 120 --intervals 0.5 1 2
+    python benchmark/telegram_streaming.py --rate-limit-every 5
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import settings  # noqa: E402
+from fake_telegram import FakeTelegramServer  # noqa: E402
+from tools.telegram import StreamingReply, send_message  # noqa: E402
+
+
+def simulated_stream(think, words, tokens_per_second):
+    """Yields replies the way NetworkSupportChatbot.stream_question does."""
+    yield "Ejecutando diagnósticos de red..."
+    time.sleep(think)
+    text = ""
+    for i in range(words):
+        text = f"{text} word{i}".strip()
+        time.sleep(1 / tokens_per_second)
+        yield text
+    yield text
+
+
+def run(server, mode, args, interval=None):
+    server.reset()
+    start = time.perf_counter()
+    if mode == "blocking":
+        response = ""
+        for response in simulated_stream(args.think, args.words, args.tokens_per_second):
+            pass
+        send_message("token", 1, response)
+    else:
+        reply = StreamingReply("token", 1, min_interval=interval, max_edits=args.max_edits)
+        response = ""
+        for response in simulated_stream(args.think, args.words, args.tokens_per_second):
+            reply.update(response)
+        reply.finish(response)
+    total = time.perf_counter() - start
+    calls = list(server.calls)
+    return {
+        "mode": mode if interval is None else f"streaming_{interval}s",
+        "first_visible_s": round(calls[0]["time"] - start, 3) if calls else None,
+        "complete_s": round(total, 3),
+        "api_calls": len(calls),
+        "edits": sum(1 for call in calls if call["method"] == "editMessageText"),
+        "final_text_ok": server.messages.get(1) == response,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--think", type=float, default=3.0, help="seconds before the answer starts")
+    parser.add_argument("--words", type=int, default=80)
+    parser.add_argument("--tokens-per-second", type=float, default=40)
+    parser.add_argument("--intervals", type=float, nargs="+", default=[0.5, 1.0, 2.0])
+    parser.add_argument("--max-edits", type=int, default=20)
+    parser.add_argument("--rate-limit-every", type=int, default=0)
+    args = parser.parse_args()
+
+    server = FakeTelegramServer(rate_limit_every=args.rate_limit_every).start()
+    settings.TELEGRAM_API_URL = server.url
+    try:
+        report = [run(server, "blocking", args)]
+        report += [run(server, "streaming", args, interval) for interval in args.intervals]
+    finally:
+        server.stop()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -53,3 +53,42 @@ class KnowledgeQAParser(BaseModel):
         if action not in ["respond", "escalate"]:
             raise ValueError("Invalid action. Must be 'respond' or 'escalate'.")
         return values
+
+class KnowledgeGradeAnswerParser(BaseModel):
+    question: str = Field(description="The input question you must answer")
+    thought: str = Field(default=None, description="Short step-by-step reasoning about how relevant the FACTS are to the QUESTION.")
+    score: int = Field(description="Relevance of the FACTS to the QUESTION as an integer from 0 to 10.")
+    action: str = Field(description="Action to take, either 'respond' or 'escalate'")
+    final_answer: str = Field(default="", description="The final answer to the question based solely on the FACTS. Empty when the action is 'escalate'.")
+
+    # --- First validator: unwrap "properties" if the LLM wrapped output ---
+    @model_validator(mode="before")
+    @classmethod
+    def unwrap_properties(cls, values):
+        if isinstance(values, dict) and "properties" in values:
+            return values["properties"]
+        return values
+
+    # --- Second validator: enforce score range and valid action values ---
+    @model_validator(mode="before")
+    @classmethod
+    def validate_score_and_action(cls, values):
+        # "before" validators run in reverse order, this one sees the wrapped output first
+        if isinstance(values, dict) and "properties" in values:
+            values = values["properties"]
+        if not isinstance(values, dict):
+            raise ValueError("Expected a JSON object.")
+        score = values.get("score")
+        if score is None:
+            raise ValueError("Score is required.")
+        try:
+            score = int(score)
+        except ValueError:
+            raise ValueError("Invalid score. Must be a number.")
+        if not (0 <= score <= 10):
+            raise ValueError("Invalid score. Must be between 0 and 10.")
+        if values.get("action") not in ["respond", "escalate"]:
+            raise ValueError("Invalid action. Must be 'respond' or 'escalate'.")
+        if values.get("action") == "respond" and not values.get("final_answer"):
+            raise ValueError("final_answer is required when action is 'respond'.")
+        return values
@@ -0,0 +1,27 @@
+import json
+import re
+
+# Start of the answer in the ReAct format of the connectivity and escalation agents
+REACT_ANSWER = re.compile(r"Final Answer:\s*", re.IGNORECASE)
+# Start of the answer in the JSON output of the knowledge agent
+JSON_ANSWER = re.compile(r'"final_answer"\s*:\s*"')
+# Longest run of complete JSON string characters (no closing quote, no dangling escape)
+JSON_STRING_PREFIX = re.compile(r'(?:[^"\\]|\\u[0-9a-fA-F]{4}|\\[^u])*')
+
+
+def partial_answer(text: str) -> str:
+    """
+    Returns the part of the final answer already present in a partially
+    generated LLM output, or an empty string if the answer has not started yet.
+    """
+    match = REACT_ANSWER.search(text)
+    if match:
+        return text[match.end():].strip()
+    match = JSON_ANSWER.search(text)
+    if match:
+        prefix = JSON_STRING_PREFIX.match(text, match.end()).group(0)
+        try:
+            return json.loads(f'"{prefix}"').strip()
+        except ValueError:
+            return ""
+    return ""
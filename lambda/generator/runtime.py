@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import deque
+from statistics import median
+
+from agents.networksupportchatbot import NetworkSupportChatbot
+
+# Number of warm invocation timings kept for the latency report
+LATENCY_WINDOW = 200
+
+_chatbot = None
+_lock = threading.Lock()
+_stats = {
+    "container_started_at": time.time(),
+    "cold_starts": 0,
+    "resets": 0,
+    "init_seconds": 0.0,
+    "invocations": 0,
+    "cold_invocation_seconds": None,
+}
+_warm_latencies = deque(maxlen=LATENCY_WINDOW)
+
+
+def get_chatbot() -> NetworkSupportChatbot:
+    """
+    Returns the container-wide chatbot, building it on first use.
+    The agents, chat clients and compiled graph are reused by every
+    invocation served by this container.
+    """
+    global _chatbot
+    if _chatbot is not None:
+        return _chatbot
+    with _lock:
+        if _chatbot is None:
+            start = time.perf_counter()
+            _chatbot = NetworkSupportChatbot()
+            _stats["init_seconds"] = time.perf_counter() - start
+            _stats["cold_starts"] += 1
+            print(f"Chatbot initialized in {_stats['init_seconds']:.3f}s")
+    return _chatbot
+
+
+def is_initialized() -> bool:
+    """Returns True if the chatbot has already been built in this container."""
+    return _chatbot is not None
+
+
+def reset_chatbot() -> None:
+    """Drops the cached chatbot so the next call to get_chatbot() rebuilds it."""
+    global _chatbot
+    with _lock:
+        _chatbot = None
+        _stats["resets"] += 1
+        _stats["cold_invocation_seconds"] = None
+        _warm_latencies.clear()
+
+
+def record_invocation(elapsed: float, cold: bool) -> None:
+    """Records the wall time of one handler invocation."""
+    with _lock:
+        _stats["invocations"] += 1
+        if cold:
+            _stats["cold_invocation_seconds"] = elapsed
+        else:
+            _warm_latencies.append(elapsed)
+
+
+def health_check() -> dict:
+    """
+    Reports whether the cached chatbot is built and usable.
+    Does not trigger initialization nor any model call.
+    """
+    chatbot = _chatbot
+    healthy = chatbot is not None and getattr(chatbot, "app", None) is not None
+    return {
+        "status": "ok" if healthy else "cold",
+        "initialized": chatbot is not None,
+        "uptime_seconds": round(time.time() - _stats["container_started_at"], 3),
+        "cold_starts": _stats["cold_starts"],
+        "resets": _stats["resets"],
+        "invocations": _stats["invocations"],
+    }
+
+
+def latency_report() -> dict:
+    """Summarizes cold versus warm invocation latency for this container."""
+    with _lock:
+        warm = sorted(_warm_latencies)
+        report = {
+            "init_seconds": round(_stats["init_seconds"], 4),
+            "cold_invocation_seconds": _stats["cold_invocation_seconds"],
+            "warm_invocations": len(warm),
+            "warm_p50_seconds": None,
+            "warm_p95_seconds": None,
+        }
+    if warm:
+        report["warm_p50_seconds"] = round(median(warm), 4)
+        report["warm_p95_seconds"] = round(warm[min(len(warm) - 1, int(len(warm) * 0.95))], 4)
+    return report
@@ -1,4 +1,5 @@
 from os import getenv
+from pathlib import Path
 from dotenv import load_dotenv
 
 load_dotenv(override=False)
@@ -6,9 +7,101 @@ load_dotenv(override=False)
 ENVIRONMENT = getenv("ENVIRONMENT", "local")
 PINECONE_API_KEY = getenv("PINECONE_API_KEY")
 TELEGRAM_KEY = getenv("TELEGRAM_KEY")
+TELEGRAM_API_URL = getenv("TELEGRAM_API_URL", "https://api.telegram.org")
+TELEGRAM_TIMEOUT = float(getenv("TELEGRAM_TIMEOUT", "10"))
+TELEGRAM_MAX_RETRIES = int(getenv("TELEGRAM_MAX_RETRIES", "3"))
+TELEGRAM_MAX_RETRY_AFTER = float(getenv("TELEGRAM_MAX_RETRY_AFTER", "30"))
+TELEGRAM_POOL_SIZE = int(getenv("TELEGRAM_POOL_SIZE", "10"))
 HUGGING_FACE_API_KEY = getenv("HUGGING_FACE_API_KEY")
 PINECONE_INDEX_NAME = getenv("PINECONE_INDEX_NAME", "network-support-chatbot") + "-" + ENVIRONMENT
 DEBUG_MODE = getenv("DEBUG", "False").lower() == "true"
 LLAMA31_MODEL_ARN = getenv("LLAMA31_MODEL_ARN", "llama3.1:8b")
 LLAMA32_MODEL_ARN = getenv("LLAMA32_MODEL_ARN", "llama3.2:3b")
 TRIAGE_MODEL_ARN = getenv("TRIAGE_MODEL_ARN", "hf.co/sungun19961/Network-Route-Agent:Q4_K_M")
+
+# Bedrock: one boto3 client and connection pool per region, shared by every model
+BEDROCK_REGION = getenv("BEDROCK_REGION", getenv("AWS_REGION", "us-east-1"))
+BEDROCK_POOL_SIZE = int(getenv("BEDROCK_POOL_SIZE", "32"))
+BEDROCK_MAX_ATTEMPTS = int(getenv("BEDROCK_MAX_ATTEMPTS", "20"))
+
+# Vector store
+PINECONE_INDEX_HOST = getenv("PINECONE_INDEX_HOST", "")
+PINECONE_POOL_SIZE = int(getenv("PINECONE_POOL_SIZE", "4"))
+# "pinecone" or "local", the local index is built by train/load_vectordb.py --backend local
+VECTOR_BACKEND = getenv("VECTOR_BACKEND", "pinecone").lower()
+# An empty value (as in .env.example) keeps the default
+LOCAL_INDEX_PATH = getenv("LOCAL_INDEX_PATH") or str(Path(__file__).parent / "models" / "knowledge_index")
+
+# Retrieval: "vector", "hybrid" (BM25 and vector ranks fused, then reranked) or "keyword" (BM25 only)
+RETRIEVAL_MODE = getenv("RETRIEVAL_MODE", "vector").lower()
+# An empty value (as in .env.example) keeps the default
+KEYWORD_INDEX_PATH = getenv("KEYWORD_INDEX_PATH") or str(Path(__file__).parent / "models" / "knowledge_bm25.json")
+HYBRID_CANDIDATES = int(getenv("HYBRID_CANDIDATES", "10"))
+HYBRID_RERANK_WEIGHT = float(getenv("HYBRID_RERANK_WEIGHT", "0.5"))
+HYBRID_MIN_SCORE = float(getenv("HYBRID_MIN_SCORE", "0.75"))
+
+# Knowledge agent: "two_step" grades then answers, "combined" does both in one LLM call
+KNOWLEDGE_MODE = getenv("KNOWLEDGE_MODE", "two_step").lower()
+
+# Local triage router, falls back to the triage LLM below the confidence threshold
+TRIAGE_ROUTER_ENABLED = getenv("TRIAGE_ROUTER_ENABLED", "True").lower() == "true"
+TRIAGE_ROUTER_PATH = getenv("TRIAGE_ROUTER_PATH", str(Path(__file__).parent / "models" / "triage_router.npz"))
+TRIAGE_ROUTER_METHOD = getenv("TRIAGE_ROUTER_METHOD", "knn").lower()
+TRIAGE_ROUTER_K = int(getenv("TRIAGE_ROUTER_K", "7"))
+TRIAGE_ROUTER_THRESHOLD = float(getenv("TRIAGE_ROUTER_THRESHOLD", "0.8"))
+
+# Semantic answer cache for repeated knowledge questions
+ANSWER_CACHE_ENABLED = getenv("ANSWER_CACHE_ENABLED", "True").lower() == "true"
+ANSWER_CACHE_BACKEND = getenv("ANSWER_CACHE_BACKEND", "memory").lower()
+ANSWER_CACHE_PATH = getenv("ANSWER_CACHE_PATH", "/tmp/answer_cache.sqlite")
+ANSWER_CACHE_THRESHOLD = float(getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+ANSWER_CACHE_TTL = float(getenv("ANSWER_CACHE_TTL", str(24 * 60 * 60)))
+ANSWER_CACHE_MAX_ENTRIES = int(getenv("ANSWER_CACHE_MAX_ENTRIES", "512"))
+
+# Query embedding cache, EMBEDDING_CACHE_PATH enables the on-disk store
+EMBEDDING_CACHE_ENABLED = getenv("EMBEDDING_CACHE_ENABLED", "True").lower() == "true"
+EMBEDDING_CACHE_MAX_BYTES = int(getenv("EMBEDDING_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+EMBEDDING_CACHE_PATH = getenv("EMBEDDING_CACHE_PATH", "")
+
+# Parallel tool execution within one agent step
+TOOL_MAX_WORKERS = int(getenv("TOOL_MAX_WORKERS", "16"))
+TOOL_STEP_TIMEOUT = float(getenv("TOOL_STEP_TIMEOUT", "15"))
+TOOL_OUTPUT_MAX_CHARS = int(getenv("TOOL_OUTPUT_MAX_CHARS", "1500"))
+
+# ReAct history sent to the model, older observations are cut once over the budget
+HISTORY_TOKEN_BUDGET = int(getenv("HISTORY_TOKEN_BUDGET", "3000"))
+HISTORY_KEEP_STEPS = int(getenv("HISTORY_KEEP_STEPS", "1"))
+HISTORY_OBSERVATION_CHARS = int(getenv("HISTORY_OBSERVATION_CHARS", "200"))
+
+# SQS batch processing, SQS_MAX_RECEIVE_COUNT should match the queue's redrive policy
+SQS_BATCH_WORKERS = int(getenv("SQS_BATCH_WORKERS", "4"))
+SQS_MAX_RECEIVE_COUNT = int(getenv("SQS_MAX_RECEIVE_COUNT", "3"))
+
+# Run the graph with ainvoke and await the chat models instead of using threads
+ASYNC_MODE = getenv("ASYNC_MODE", "False").lower() == "true"
+
+# Streaming replies: post a placeholder and edit it as the answer is generated
+STREAMING_MODE = getenv("STREAMING_MODE", "False").lower() == "true"
+STREAM_EDIT_INTERVAL = float(getenv("STREAM_EDIT_INTERVAL", "1.0"))
+STREAM_MAX_EDITS = int(getenv("STREAM_MAX_EDITS", "20"))
+
+# Graph checkpoints: "memory", "sqlite" or "none", threads are evicted after CHECKPOINT_TTL seconds
+CHECKPOINT_BACKEND = getenv("CHECKPOINT_BACKEND", "memory").lower()
+CHECKPOINT_PATH = getenv("CHECKPOINT_PATH", "/tmp/checkpoints.sqlite")
+CHECKPOINT_TTL = float(getenv("CHECKPOINT_TTL", str(60 * 60)))
+CHECKPOINT_MAX_THREADS = int(getenv("CHECKPOINT_MAX_THREADS", "1000"))
+CHECKPOINT_COMPACT = getenv("CHECKPOINT_COMPACT", "True").lower() == "true"
+
+# Per-request execution budget, the deadline also follows the Lambda remaining time
+BUDGET_MAX_LLM_CALLS = int(getenv("BUDGET_MAX_LLM_CALLS", "8"))
+BUDGET_MAX_TOOL_CALLS = int(getenv("BUDGET_MAX_TOOL_CALLS", "12"))
+BUDGET_MAX_SECONDS = float(getenv("BUDGET_MAX_SECONDS", "120"))
+BUDGET_DEADLINE_MARGIN = float(getenv("BUDGET_DEADLINE_MARGIN", "15"))
+
+# Per-request metrics, printed as one CloudWatch embedded metric format record
+METRICS_ENABLED = getenv("METRICS_ENABLED", "True").lower() == "true"
+METRICS_NAMESPACE = getenv("METRICS_NAMESPACE", "NetworkSupportChatbot")
+
+# Speculative retrieval: query the knowledge base while triage runs, unused results are discarded
+SPECULATIVE_RETRIEVAL = getenv("SPECULATIVE_RETRIEVAL", "False").lower() == "true"
+SPECULATIVE_WORKERS = int(getenv("SPECULATIVE_WORKERS", "8"))
@@ -0,0 +1,27 @@
+import time
+
+from agents.budget import exhausted, LLM_CALLS, TOOL_CALLS, DEADLINE
+
+
+def state(llm_calls=0, tool_calls=0, deadline=None):
+    return {"budget": {
+        "deadline": deadline or time.time() + 60,
+        "max_llm_calls": 5,
+        "max_tool_calls": 3,
+        LLM_CALLS: llm_calls,
+        TOOL_CALLS: tool_calls,
+    }}
+
+
+def test_tool_cap_leaves_a_final_model_turn():
+    assert exhausted(state(tool_calls=3)) == ""
+    assert exhausted(state(tool_calls=3), tools=True) == TOOL_CALLS
+
+
+def test_llm_cap_and_deadline_stop_every_turn():
+    assert exhausted(state(llm_calls=5)) == LLM_CALLS
+    assert exhausted(state(deadline=time.time() - 1)) == DEADLINE
+
+
+def test_no_budget():
+    assert exhausted({}, tools=True) == ""
@@ -0,0 +1,27 @@
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from agents.history import HistoryManager
+
+
+def conversation(steps):
+    messages = [SystemMessage(content="system"), HumanMessage(content="Question: is 10.0.0.1 up?")]
+    for step in range(steps):
+        call = {"name": "ping_ip", "args": {"ip_address": "10.0.0.1"}, "id": f"call{step}"}
+        messages.append(AIMessage(content=f"Thought: step {step}", tool_calls=[call]))
+        messages.append(ToolMessage(content="x" * 1000, name="ping_ip", tool_call_id=f"call{step}"))
+    return messages
+
+
+def observations(messages):
+    return [len(message.content) for message in messages if isinstance(message, ToolMessage)]
+
+
+def test_keeps_the_last_steps_uncut():
+    compacted = HistoryManager(token_budget=100, keep_steps=1, observation_chars=10).compact(conversation(3))
+    assert observations(compacted)[-1] == 1000
+    assert all(length < 1000 for length in observations(compacted)[:-1])
+
+
+def test_keep_steps_zero_keeps_no_step_uncut():
+    compacted = HistoryManager(token_budget=100, keep_steps=0, observation_chars=10).compact(conversation(3))
+    assert all(length < 1000 for length in observations(compacted))
@@ -0,0 +1,24 @@
+import pytest
+
+from parser.knowledge import KnowledgeGradeAnswerParser
+
+
+def test_grade_answer_parses_wrapped_properties():
+    parsed = KnowledgeGradeAnswerParser.model_validate({
+        "properties": {
+            "question": "How do I reset the phone?",
+            "thought": "The FACTS describe the reset steps.",
+            "score": "8",
+            "action": "respond",
+            "final_answer": "Hold KEY 1 + KEY 9 while it boots.",
+        }
+    })
+    assert parsed.score == 8
+    assert parsed.action == "respond"
+
+
+def test_grade_answer_requires_answer_to_respond():
+    with pytest.raises(ValueError):
+        KnowledgeGradeAnswerParser.model_validate(
+            {"properties": {"question": "q", "score": 9, "action": "respond", "final_answer": ""}}
+        )
@@ -0,0 +1,24 @@
+import pytest
+
+from tools.prerouter import PreRouter
+
+
+@pytest.mark.parametrize("question", [
+    "check port 443 on api.example.com",
+    "Can you ping 10.20.30.40 for me?",
+    "Is mail.contoso.com down?",
+])
+def test_routes_connectivity_checks(question):
+    assert PreRouter().would_route(question)
+
+
+@pytest.mark.parametrize("question", [
+    "Open a ticket: server db01.corp.local is down",
+    "Is www.cisco.com serving the down-rated firmware page?",
+    "Enable port 5 on the access switch 10.0.0.2",
+    "Is gi1/0/4 on 10.0.0.2 up?",
+    "What is a DNS MX record?",
+    "my phone GXP2170 is not working, version 1.0.11.3 down",
+])
+def test_leaves_other_intents_to_triage(question):
+    assert not PreRouter().would_route(question)
@@ -0,0 +1,129 @@
+import asyncio
+import itertools
+import time
+
+import pytest
+
+import settings
+from benchmark.fake_telegram import FakeTelegramServer
+from tools.telegram import StreamingReply, TelegramClient, asend_message, split_message, MAX_MESSAGE_LENGTH
+
+_tokens = itertools.count()
+
+
+@pytest.fixture
+def fake_telegram(monkeypatch):
+    """Starts fake Bot API servers, the client points at the last one started"""
+    servers = []
+
+    def start(**params):
+        server = FakeTelegramServer(**params).start()
+        monkeypatch.setattr(settings, "TELEGRAM_API_URL", server.url)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+def token():
+    # A token per test, so no test reuses the pooled client of another one
+    return f"test-{next(_tokens)}"
+
+
+def test_split_message_keeps_chunks_under_the_limit():
+    text = "\n\n".join(" ".join(f"word{i}" for i in range(paragraph * 90)) for paragraph in range(1, 12))
+    chunks = split_message(text)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= MAX_MESSAGE_LENGTH for chunk in chunks)
+    assert " ".join(chunks).split() == text.split()
+
+
+def test_split_message_cuts_text_without_spaces():
+    text = "x" * (2 * MAX_MESSAGE_LENGTH + 10)
+    chunks = split_message(text)
+    assert [len(chunk) for chunk in chunks] == [MAX_MESSAGE_LENGTH, MAX_MESSAGE_LENGTH, 10]
+    assert "".join(chunks) == text
+
+
+def test_long_reply_is_delivered_in_several_messages(fake_telegram):
+    server = fake_telegram()
+    text = " ".join(f"word{i}" for i in range(2000))
+    results = TelegramClient(token()).send_message(1, text)
+    assert len(results) == len(server.messages) > 1
+    assert " ".join(server.messages.values()).split() == text.split()
+
+
+def test_rate_limited_call_is_retried_after_retry_after(fake_telegram):
+    server = fake_telegram(rate_limit_every=2, retry_after=0.2)
+    client = TelegramClient(token())
+    client.send_message(1, "first")
+    client.send_message(1, "second")
+    assert list(server.messages.values()) == ["first", "second"]
+    assert server.calls[2]["time"] - server.calls[1]["time"] >= 0.2
+    assert client.stats() == {"calls": 3, "retries": 1, "rate_limited": 1, "failures": 0}
+
+
+def test_server_errors_are_retried(fake_telegram, monkeypatch):
+    monkeypatch.setattr(settings, "TELEGRAM_MAX_RETRY_AFTER", 0.01)
+    server = fake_telegram(fail_every=2)
+    client = TelegramClient(token())
+    client.send_message(1, "first")
+    client.send_message(1, "second")
+    assert list(server.messages.values()) == ["first", "second"]
+    assert client.stats()["retries"] == 1
+
+
+def test_async_send_retries_rate_limits_and_server_errors(fake_telegram, monkeypatch):
+    monkeypatch.setattr(settings, "TELEGRAM_MAX_RETRY_AFTER", 0.01)
+    server = fake_telegram(rate_limit_every=2, fail_every=3, retry_after=0.01)
+    text = " ".join(f"word{i}" for i in range(1500))
+    asyncio.run(asend_message(token(), 1, text))
+    assert " ".join(server.messages.values()).split() == text.split()
+    assert len(server.calls) > len(server.messages)
+
+
+def test_streaming_reply_posts_the_status_first_and_throttles_edits(fake_telegram):
+    server = fake_telegram()
+    reply = StreamingReply(token(), 1, min_interval=0.2, max_edits=100)
+    reply.update("Pensando...")
+    deadline = time.monotonic() + 1.0
+    words = []
+    while time.monotonic() < deadline:
+        words.append(f"word{len(words)}")
+        reply.update(" ".join(words))
+        time.sleep(0.01)
+    reply.finish(" ".join(words))
+
+    assert server.calls[0]["method"] == "sendMessage"
+    assert server.calls[0]["text"] == "Pensando..."
+    edits = [call["time"] for call in server.calls[1:-1] if call["method"] == "editMessageText"]
+    assert 2 <= len(edits) <= 6
+    assert all(later - earlier >= 0.19 for earlier, later in zip(edits, edits[1:]))
+    assert server.messages == {1: " ".join(words)}
+
+
+def test_streaming_reply_final_edit_survives_a_rate_limit(fake_telegram):
+    server = fake_telegram(rate_limit_every=2, retry_after=0.2)
+    reply = StreamingReply(token(), 1, min_interval=0.0)
+    reply.update("Pensando...")
+    reply.finish("The complete answer")
+
+    assert [call["method"] for call in server.calls] == ["sendMessage", "editMessageText", "editMessageText"]
+    assert server.calls[2]["time"] - server.calls[1]["time"] >= 0.2
+    assert server.messages == {1: "The complete answer"}
+
+
+def test_streaming_reply_final_edit_after_a_rate_limited_update(fake_telegram):
+    server = fake_telegram(rate_limit_every=2, retry_after=0.2)
+    reply = StreamingReply(token(), 1, min_interval=0.0)
+    reply.update("Pensando...")
+    reply.update("The complete")
+    reply.update("The complete ans")
+    reply.finish("The complete answer")
+
+    # The rate-limited edit is not retried, the next update waits for retry_after
+    assert [call["method"] for call in server.calls] == ["sendMessage", "editMessageText", "editMessageText"]
+    assert server.calls[2]["text"] == "The complete answer"
+    assert server.messages == {1: "The complete answer"}
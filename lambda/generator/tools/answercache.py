@@ -0,0 +1,231 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+import settings
+
+
+def normalize_question(question: str) -> str:
+    """Lower-cases the question and collapses whitespace."""
+    return " ".join(question.lower().split())
+
+
+def cache_key(question: str, language: str) -> str:
+    """Returns the exact-match key of a question in a given language."""
+    return hashlib.sha256(f"{language}\n{normalize_question(question)}".encode("utf-8")).hexdigest()
+
+
+class CacheBackend:
+    """Persistent store behind the in-process answer cache."""
+
+    def load(self) -> List[dict]:
+        """Returns every stored entry, oldest first."""
+        return []
+
+    def put(self, entry: dict) -> None:
+        pass
+
+    def delete(self, key: str) -> None:
+        pass
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """Keeps the answer cache in a local SQLite file so it survives restarts."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS answers (
+                key TEXT PRIMARY KEY,
+                language TEXT NOT NULL,
+                question TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def load(self) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, language, question, answer, embedding, created_at FROM answers ORDER BY created_at"
+            ).fetchall()
+        return [
+            {
+                "key": key,
+                "language": language,
+                "question": question,
+                "answer": answer,
+                "embedding": np.frombuffer(embedding, dtype=np.float32),
+                "created_at": created_at,
+            }
+            for key, language, question, answer, embedding, created_at in rows
+        ]
+
+    def put(self, entry: dict) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    entry["key"],
+                    entry["language"],
+                    entry["question"],
+                    entry["answer"],
+                    entry["embedding"].astype(np.float32).tobytes(),
+                    entry["created_at"],
+                ),
+            )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM answers WHERE key = ?", (key,))
+            self._conn.commit()
+
+
+class SemanticAnswerCache:
+    """
+    Answer cache keyed on the question embedding and the user language.
+
+    A question is a hit when a stored question in the same language has a
+    cosine similarity of at least `threshold`. Entries expire after `ttl`
+    seconds and the least recently used entry is evicted beyond
+    `max_entries`. Exact repeats are matched by hash without embedding.
+    """
+
+    def __init__(
+        self,
+        embeddings=None,
+        threshold: float = 0.92,
+        ttl: float = 86400,
+        max_entries: int = 512,
+        backend: Optional[CacheBackend] = None,
+    ):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.backend = backend or CacheBackend()
+        self._embeddings = embeddings
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._stats = {"hits": 0, "exact_hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expired": 0}
+        for entry in self.backend.load():
+            self._entries[entry["key"]] = entry
+        self._evict()
+
+    def embed(self, question: str) -> np.ndarray:
+        """Embeds the question with the runtime embedding model."""
+        if self._embeddings is None:
+            from agents.state import select_embedding_model
+            self._embeddings = select_embedding_model()
+        return np.asarray(self._embeddings.embed_query(question), dtype=np.float32)
+
+    def _expired(self, entry: dict, now: float) -> bool:
+        return self.ttl > 0 and now - entry["created_at"] > self.ttl
+
+    def _evict(self) -> None:
+        """Drops expired entries and trims the cache to max_entries (lock held)."""
+        now = time.time()
+        for key in [key for key, entry in self._entries.items() if self._expired(entry, now)]:
+            del self._entries[key]
+            self.backend.delete(key)
+            self._stats["expired"] += 1
+        while len(self._entries) > self.max_entries:
+            key, _ = self._entries.popitem(last=False)
+            self.backend.delete(key)
+            self._stats["evictions"] += 1
+
+    def lookup(self, question: str, language: str) -> Tuple[Optional[str], Optional[np.ndarray]]:
+        """
+        Returns the cached answer for the question (None on a miss) and the
+        question embedding if one had to be computed, so store() can reuse it.
+        """
+        key = cache_key(question, language)
+        with self._lock:
+            self._evict()
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                self._stats["exact_hits"] += 1
+                return entry["answer"], None
+            candidates = [e for e in self._entries.values() if e["language"] == language]
+
+        best = None
+        embedding = None
+        if candidates:
+            embedding = self.embed(question)
+            query = embedding / (np.linalg.norm(embedding) or 1.0)
+            matrix = np.stack([e["embedding"] for e in candidates])
+            matrix = matrix / np.clip(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12, None)
+            similarities = matrix @ query
+            index = int(np.argmax(similarities))
+            if similarities[index] >= self.threshold:
+                best = candidates[index]
+
+        with self._lock:
+            if best is not None and best["key"] in self._entries:
+                self._entries.move_to_end(best["key"])
+                self._stats["hits"] += 1
+                return best["answer"], embedding
+            self._stats["misses"] += 1
+        return None, embedding
+
+    def store(self, question: str, language: str, answer: str, embedding: np.ndarray = None) -> None:
+        """Stores the answer of a question in the cache and the backend."""
+        entry = {
+            "key": cache_key(question, language),
+            "language": language,
+            "question": question,
+            "answer": answer,
+            "embedding": embedding if embedding is not None else self.embed(question),
+            "created_at": time.time(),
+        }
+        with self._lock:
+            self._entries[entry["key"]] = entry
+            self._entries.move_to_end(entry["key"])
+            self._stats["stores"] += 1
+            self.backend.put(entry)
+            self._evict()
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters and the hit rate."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> Optional[SemanticAnswerCache]:
+    """Returns the process-wide answer cache, or None when it is disabled."""
+    global _cache
+    if not settings.ANSWER_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                backend = None
+                if settings.ANSWER_CACHE_BACKEND == "sqlite":
+                    backend = SQLiteCacheBackend(settings.ANSWER_CACHE_PATH)
+                _cache = SemanticAnswerCache(
+                    threshold=settings.ANSWER_CACHE_THRESHOLD,
+                    ttl=settings.ANSWER_CACHE_TTL,
+                    max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+                    backend=backend,
+                )
+    return _cache
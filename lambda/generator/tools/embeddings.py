@@ -0,0 +1,127 @@
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+def normalize_text(text: str) -> str:
+    """Strips and collapses whitespace so trivially different strings share a key."""
+    return " ".join(text.split())
+
+
+class EmbeddingDiskStore:
+    """SQLite file holding embeddings by key, shared across processes and runs."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._conn.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+        return np.frombuffer(row[0], dtype=np.float32) if row else None
+
+    def put(self, key: str, vector: np.ndarray) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?)", (key, vector.astype(np.float32).tobytes())
+            )
+            self._conn.commit()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that remembers vectors by model id and normalized text.
+
+    Vectors live in an in-memory LRU bounded by `max_bytes` and, when a
+    `disk_store` is given, in a persistent store consulted on memory misses.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_id: str,
+        max_bytes: int = 16 * 1024 * 1024,
+        disk_store: Optional[EmbeddingDiskStore] = None,
+    ):
+        self.embeddings = embeddings
+        self.model_id = model_id
+        self.max_bytes = max_bytes
+        self.disk_store = disk_store
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._bytes = 0
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_id}\n{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        """Adds a vector to the in-memory LRU (lock held)."""
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = vector
+        self._bytes += vector.nbytes
+        while self._bytes > self.max_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self._stats["evictions"] += 1
+
+    def _cached(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self._stats["hits"] += 1
+                return vector
+        if self.disk_store is not None:
+            vector = self.disk_store.get(key)
+            if vector is not None:
+                with self._lock:
+                    self._stats["disk_hits"] += 1
+                    self._remember(key, vector)
+                return vector
+        return None
+
+    def _store(self, key: str, values: List[float]) -> np.ndarray:
+        vector = np.asarray(values, dtype=np.float32)
+        with self._lock:
+            self._stats["misses"] += 1
+            self._remember(key, vector)
+        if self.disk_store is not None:
+            self.disk_store.put(key, vector)
+        return vector
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self.key(text)
+        vector = self._cached(key)
+        if vector is None:
+            vector = self._store(key, self.embeddings.embed_query(text))
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self.key(text) for text in texts]
+        vectors = [self._cached(key) for key in keys]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            computed = self.embeddings.embed_documents([texts[i] for i in missing])
+            for i, values in zip(missing, computed):
+                vectors[i] = self._store(keys[i], values)
+        return [vector.tolist() for vector in vectors]
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters, the hit rate and the memory footprint."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._memory)
+            stats["bytes"] = self._bytes
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
@@ -7,9 +7,10 @@ import socket
 from langchain_core.tools import tool
 from pydantic import BaseModel, Field
 
-import dns.resolver
-from dns import rdatatype
-from whois import whois
+# Tickets are created one at a time to avoid duplicates
+ESCALATION_TOOL_CONCURRENCY = {
+    "escalate_request": 1,
+}
 
 def get_escalation_tools() -> List[tool]:
     """
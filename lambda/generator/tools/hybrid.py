@@ -0,0 +1,256 @@
+import json
+import math
+import re
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import settings
+
+# Model numbers, interface names and CLI keywords stay whole tokens
+# (c9300-nm-2q, gigabitethernet1/0/1, usbflash1), their parts are indexed too
+TOKEN = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it my of on or the this to what when "
+    "where which who why with you your".split()
+)
+# Reciprocal rank fusion constant, damps the weight of the first ranks
+RRF_K = 60
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased terms of a text, compound terms followed by their parts, without stopwords"""
+    terms = []
+    for token in TOKEN.findall(text.lower()):
+        parts = re.split(r"[-_./]", token)
+        for term in ([token] + parts if len(parts) > 1 else [token]):
+            if term in STOPWORDS:
+                continue
+            # Cheap plural folding: ports -> port, modules -> module
+            if len(term) > 3 and term.endswith("s") and not term.endswith("ss") and term.isalpha():
+                term = term[:-1]
+            terms.append(term)
+    return terms
+
+
+def document_key(document: dict) -> Tuple[str, Optional[int], str]:
+    """Identifies a chunk across backends, Pinecone returns pages as floats"""
+    page = document.get("page")
+    return document.get("source", ""), int(page) if page is not None else None, document["page_content"]
+
+
+class KeywordIndex:
+    """
+    BM25 inverted index over the knowledge base chunks, built next to the
+    vector index by train/load_vectordb.py and saved as one JSON file with
+    the chunks and, for every term, the chunks containing it and its
+    frequency in each.
+    """
+
+    def __init__(self, documents: List[dict], postings: Dict[str, list], lengths: List[int],
+                 k1: float = 1.2, b: float = 0.75):
+        self.documents = documents
+        self.k1 = k1
+        self.b = b
+        self.lengths = np.asarray(lengths, dtype=np.float32)
+        average = float(self.lengths.mean()) if len(lengths) else 1.0
+        # Length normalization of BM25, per chunk
+        self._norms = k1 * (1 - b + b * self.lengths / (average or 1.0))
+        self.postings = {
+            term: (np.asarray(ids, dtype=np.int32), np.asarray(frequencies, dtype=np.float32))
+            for term, (ids, frequencies) in postings.items()
+        }
+        count = len(documents)
+        self.idf = {
+            term: math.log(1 + (count - len(ids) + 0.5) / (len(ids) + 0.5))
+            for term, (ids, _) in self.postings.items()
+        }
+        # Terms of every chunk for the rerank, rebuilt from the postings instead of tokenizing again
+        self._terms = [set() for _ in documents]
+        for term, (ids, _) in postings.items():
+            for i in ids:
+                self._terms[i].add(term)
+        self._positions = {document_key(doc): i for i, doc in enumerate(documents)}
+
+    @classmethod
+    def build(cls, documents: List[dict], **params) -> "KeywordIndex":
+        documents = [
+            {"page_content": doc["page_content"], "source": doc.get("source", ""), "page": doc.get("page")}
+            for doc in documents
+        ]
+        postings, lengths = {}, []
+        for i, doc in enumerate(documents):
+            terms = tokenize(doc["page_content"])
+            lengths.append(len(terms))
+            for term, frequency in Counter(terms).items():
+                ids, frequencies = postings.setdefault(term, ([], []))
+                ids.append(i)
+                frequencies.append(frequency)
+        return cls(documents, postings, lengths, **params)
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        artifact = {
+            "k1": self.k1,
+            "b": self.b,
+            "documents": self.documents,
+            "lengths": self.lengths.astype(int).tolist(),
+            "postings": {term: [ids.tolist(), frequencies.astype(int).tolist()]
+                         for term, (ids, frequencies) in self.postings.items()},
+        }
+        path.write_text(json.dumps(artifact, ensure_ascii=False), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Path) -> "KeywordIndex":
+        artifact = json.loads(Path(path).read_text(encoding="utf-8"))
+        return cls(artifact["documents"], artifact["postings"], artifact["lengths"], artifact["k1"], artifact["b"])
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def search(self, question: str, k: int) -> List[dict]:
+        """Returns the k chunks with the highest BM25 score, best first"""
+        scores = np.zeros(len(self.documents), dtype=np.float32)
+        for term in set(tokenize(question)):
+            if term not in self.postings:
+                continue
+            ids, frequencies = self.postings[term]
+            scores[ids] += self.idf[term] * frequencies * (self.k1 + 1) / (frequencies + self._norms[ids])
+        matched = np.flatnonzero(scores)
+        if not len(matched) or k <= 0:
+            return []
+        top = matched[np.argsort(-scores[matched])[:k]]
+        return [{**self.documents[i], "keyword_score": float(scores[i])} for i in top]
+
+    def coverage(self, question: str, document: dict) -> float:
+        """Share of the question's idf weight whose terms appear in `document`, terms unknown to the index are ignored"""
+        terms = {term for term in tokenize(question) if term in self.idf}
+        total = sum(self.idf[term] for term in terms)
+        if not total:
+            return 0.0
+        position = self._positions.get(document_key(document))
+        present = self._terms[position] if position is not None else set(tokenize(document["page_content"]))
+        return sum(self.idf[term] for term in terms if term in present) / total
+
+
+def reciprocal_rank_fusion(rankings: List[List[dict]], k: int = RRF_K) -> List[Tuple[dict, float]]:
+    """
+    Fuses ranked document lists, each document scores sum(1 / (k + rank)) over
+    the lists it is in. The fields of a document found by several lists are
+    merged, so it keeps both the vector score and the keyword score.
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, document in enumerate(ranking, start=1):
+            key = document_key(document)
+            entry = fused.setdefault(key, [{}, 0.0])
+            entry[0] = {**document, **entry[0]}
+            entry[1] += 1.0 / (k + rank)
+    return sorted(((document, score) for document, score in fused.values()), key=lambda item: -item[1])
+
+
+class HybridRetriever:
+    """
+    Retrieval manager fusing BM25 over the chunk texts with the vector
+    store's ranking (reciprocal rank fusion), then reranking the fused
+    candidates by how much of the question's rare terms each one contains.
+    Exact terms like model numbers and CLI commands are what the embedding
+    model ranks worst and the keyword side ranks best.
+
+    mode "hybrid" queries both sides, "keyword" only BM25 (no embedding,
+    no network). It has the search/reset/stats interface of
+    VectorStoreManager.
+    """
+
+    def __init__(self, keyword_index: KeywordIndex, vector_manager=None, mode: str = "hybrid",
+                 candidates: int = None, rerank_weight: float = None, min_score: float = None):
+        self.keyword_index = keyword_index
+        self.vector_manager = vector_manager
+        self.mode = mode
+        self.candidates = candidates or settings.HYBRID_CANDIDATES
+        self.rerank_weight = settings.HYBRID_RERANK_WEIGHT if rerank_weight is None else rerank_weight
+        self.min_score = settings.HYBRID_MIN_SCORE if min_score is None else min_score
+        self._lock = threading.Lock()
+        self._stats = {
+            "queries": 0,
+            "query_seconds": 0.0,
+            "keyword_seconds": 0.0,
+            "last_query_seconds": 0.0,
+            "documents_returned": 0,
+        }
+
+    def rerank(self, question: str, fused: List[Tuple[dict, float]]) -> List[dict]:
+        """
+        Orders fused candidates by (1 - w) * fusion score relative to the best
+        one + w * term coverage, and drops those below min_score of the best.
+        "score" stays the vector similarity (0.0 for chunks only the keyword
+        side found), the fused and reranked scores get their own keys.
+        """
+        if not fused:
+            return []
+        best_fused = fused[0][1]
+        reranked = [
+            {
+                "score": 0.0,
+                **document,
+                "fusion_score": fusion,
+                "rerank_score": (1 - self.rerank_weight) * fusion / best_fused
+                + self.rerank_weight * self.keyword_index.coverage(question, document),
+            }
+            for document, fusion in fused
+        ]
+        reranked.sort(key=lambda document: -document["rerank_score"])
+        cutoff = reranked[0]["rerank_score"] * self.min_score
+        return [document for document in reranked if document["rerank_score"] >= cutoff]
+
+    def search(self, question: str, num_results: int = 5, lambda_mult: float = 0.25) -> List[dict]:
+        """
+        Returns up to num_results documents. lambda_mult is ignored, candidates
+        come from the vector store ranked by similarity alone.
+        """
+        start = time.perf_counter()
+        keyword = self.keyword_index.search(question, self.candidates)
+        keyword_seconds = time.perf_counter() - start
+        rankings = [keyword]
+        if self.mode == "hybrid" and self.vector_manager is not None:
+            rankings.append(self.vector_manager.search(question, num_results=self.candidates, lambda_mult=1.0))
+        results = self.rerank(question, reciprocal_rank_fusion(rankings))[:num_results]
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._stats["queries"] += 1
+            self._stats["query_seconds"] += elapsed
+            self._stats["keyword_seconds"] += keyword_seconds
+            self._stats["last_query_seconds"] = elapsed
+            self._stats["documents_returned"] += len(results)
+        return results
+
+    def reset(self) -> None:
+        if self.vector_manager is not None:
+            self.vector_manager.reset()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["mode"] = self.mode
+        stats["avg_query_seconds"] = stats["query_seconds"] / stats["queries"] if stats["queries"] else 0.0
+        stats["avg_documents"] = stats["documents_returned"] / stats["queries"] if stats["queries"] else 0.0
+        if self.vector_manager is not None:
+            stats["vector"] = self.vector_manager.stats()
+        return stats
+
+
+def load_hybrid_retriever(path: str, vector_manager, mode: str) -> Optional[HybridRetriever]:
+    """Wraps vector_manager with the keyword index at `path`, or returns None if it is missing"""
+    if not path or not Path(path).is_file():
+        print(f"Keyword index not found: {path!r}, using vector retrieval")
+        return None
+    start = time.perf_counter()
+    keyword_index = KeywordIndex.load(path)
+    print(f"Keyword index loaded from {path} ({len(keyword_index)} documents, "
+          f"{time.perf_counter() - start:.2f}s)")
+    return HybridRetriever(keyword_index, vector_manager, mode)
@@ -1,5 +1,3 @@
-from langdetect import detect
-
 
 def detect_language(text: str) -> str:
     """Detects the language of the input text and returns a supported language.
@@ -18,6 +16,8 @@ def detect_language(text: str) -> str:
         "th": "Thai",
     }
     try:
+        # Imported on first use, langdetect loads its language profiles at import
+        from langdetect import detect
         detected_lang = detect(text)
         return supported_languages.get(
             detected_lang, "Spanish"
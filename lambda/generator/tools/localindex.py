@@ -0,0 +1,159 @@
+import json
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from tools.vectordb import maximal_marginal_relevance, MMR_FETCH_K
+
+EMBEDDINGS_FILE = "embeddings.npy"
+DOCUMENTS_FILE = "documents.json"
+
+
+def build_local_index(path: Path, documents: List[dict], embeddings, embedding_model: str, dtype: str = "float16") -> None:
+    """
+    Writes a local vector index (see LocalVectorIndex) to the `path` directory.
+    `documents` are dicts with page_content, source and page keys, in the
+    same order as the rows of `embeddings`.
+    """
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    if len(matrix) != len(documents):
+        raise ValueError(f"{len(documents)} documents but {len(matrix)} embeddings")
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    np.save(path / EMBEDDINGS_FILE, (matrix / norms).astype(dtype))
+    manifest = {
+        "embedding_model": embedding_model,
+        "dtype": dtype,
+        "dimension": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+        "documents": [
+            {"page_content": doc["page_content"], "source": doc.get("source", ""), "page": doc.get("page")}
+            for doc in documents
+        ],
+    }
+    (path / DOCUMENTS_FILE).write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+
+
+class LocalVectorIndex:
+    """
+    Vector index shipped inside the container (see train/load_vectordb.py
+    --backend local). The directory holds:
+
+        embeddings.npy:  (N, D) float16 or float32, L2-normalized
+        documents.json:  embedding_model, dtype, dimension and the N documents
+
+    float32 matrices are memory-mapped; float16 ones halve the artifact and
+    are converted to float32 once on load, NumPy has no fast float16 matmul.
+    Queries are scored with a dot product against every row (the corpus is
+    a few thousand chunks) and diversified with the same MMR as the
+    Pinecone path.
+    """
+
+    def __init__(self, path: Path):
+        path = Path(path)
+        manifest = json.loads((path / DOCUMENTS_FILE).read_text(encoding="utf-8"))
+        self.embedding_model = manifest["embedding_model"]
+        self.documents = manifest["documents"]
+        self.matrix = np.load(path / EMBEDDINGS_FILE, mmap_mode="r")
+        if self.matrix.dtype != np.float32:
+            self.matrix = self.matrix.astype(np.float32)
+        if len(self.matrix) != len(self.documents):
+            raise ValueError(f"Corrupt local index {path}: {len(self.documents)} documents, {len(self.matrix)} rows")
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def nearest(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the indices of the k rows most similar to the normalized query,
+        best first, and the similarity of every row.
+        """
+        scores = self.matrix @ query
+        k = min(k, len(scores))
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        return candidates[np.argsort(-scores[candidates])], scores
+
+    def search_vector(
+        self, embedding, num_results: int = 5, lambda_mult: float = 0.25, fetch_k: int = MMR_FETCH_K
+    ) -> List[dict]:
+        """Returns num_results documents picked by MMR among the fetch_k most similar rows"""
+        if not len(self.documents) or num_results <= 0:
+            return []
+        query = np.asarray(embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        candidates, scores = self.nearest(query, max(fetch_k, num_results))
+        selected = maximal_marginal_relevance(
+            query,
+            self.matrix[candidates],
+            k=num_results,
+            lambda_mult=lambda_mult,
+        )
+        return [{**self.documents[candidates[i]], "score": float(scores[candidates[i]])} for i in selected]
+
+
+class LocalVectorStoreManager:
+    """
+    Drop-in replacement of VectorStoreManager backed by a LocalVectorIndex:
+    no network round trip per query, and it works offline.
+    """
+
+    def __init__(self, index: LocalVectorIndex, embeddings=None):
+        self.index = index
+        self._embeddings = embeddings
+        self._lock = threading.Lock()
+        self._stats = {
+            "queries": 0,
+            "query_seconds": 0.0,
+            "last_query_seconds": 0.0,
+        }
+
+    @property
+    def embeddings(self):
+        if self._embeddings is None:
+            from agents.state import select_embedding_model
+            self._embeddings = select_embedding_model()
+        return self._embeddings
+
+    def search(self, question: str, num_results: int = 5, lambda_mult: float = 0.25) -> List[dict]:
+        """Embeds the question and searches the local index, same result format as the Pinecone manager"""
+        start = time.perf_counter()
+        results = self.index.search_vector(self.embeddings.embed_query(question), num_results, lambda_mult)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._stats["queries"] += 1
+            self._stats["query_seconds"] += elapsed
+            self._stats["last_query_seconds"] = elapsed
+        return results
+
+    def reset(self) -> None:
+        """Nothing to reconnect, the index is a local file."""
+
+    def stats(self) -> dict:
+        """Returns query timing counters."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["backend"] = "local"
+        stats["documents"] = len(self.index)
+        stats["avg_query_seconds"] = stats["query_seconds"] / stats["queries"] if stats["queries"] else 0.0
+        return stats
+
+
+def load_local_vector_store(path: str) -> Optional[LocalVectorStoreManager]:
+    """
+    Loads the local index at `path`, or returns None if it is missing or was
+    built with another embedding model than the runtime's.
+    """
+    from agents.state import embedding_model_id
+    if not path or not (Path(path) / DOCUMENTS_FILE).is_file():
+        print(f"Local vector index not found: {path!r}")
+        return None
+    index = LocalVectorIndex(path)
+    if index.embedding_model != embedding_model_id():
+        print(f"Local vector index disabled: built with {index.embedding_model}, runtime uses {embedding_model_id()}")
+        return None
+    print(f"Local vector index loaded from {path} ({len(index)} documents)")
+    return LocalVectorStoreManager(index)
@@ -1,21 +1,117 @@
+import asyncio
 import platform
 import subprocess
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
-from typing import Annotated, List, Optional
+from typing import Annotated, Any, List, Optional, Tuple
 import socket
 
-from langchain_core.tools import tool
+from langchain_core.tools import tool, StructuredTool
 from pydantic import BaseModel, Field
 
-import dns.resolver
-from dns import rdatatype
-from whois import whois
+# dnspython and python-whois are imported on the first lookup, not at cold start
 
 
 PING_COUNT = 2
 PING_TIMEOUT = 1  # seconds
 PORT_CHECK_TIMEOUT = 1.0  # seconds, used in check_port function
 
+# Maximum number of concurrent calls per tool within one diagnostic step
+NETWORK_TOOL_CONCURRENCY = {
+    "ping_ip": 8,
+    "check_port": 16,
+    "query_dns_record": 8,
+    "get_domain_metadata": 2,  # WHOIS servers rate-limit aggressively
+}
+
+# Result cache TTLs in seconds, DNS answers use min(record TTL, DNS_MAX_TTL)
+PING_CACHE_TTL = 10
+PORT_CACHE_TTL = 10
+DNS_MAX_TTL = 300
+DNS_NEGATIVE_TTL = 60  # NXDOMAIN / no answer
+WHOIS_CACHE_TTL = 6 * 60 * 60
+WHOIS_NEGATIVE_TTL = 5 * 60
+TOOL_CACHE_MAX_ENTRIES = 1024
+
+# Name servers and status codes kept in the WHOIS observation
+WHOIS_MAX_ITEMS = 4
+
+
+class ToolResultCache:
+    """
+    Bounded TTL cache shared by the network tools, so repeated questions
+    about the same host or domain within a short window reuse the result
+    instead of going back to the network. With `enabled` off every lookup
+    misses without being counted and nothing is stored (benchmarks).
+    """
+
+    def __init__(self, max_entries: int = TOOL_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._stats = {}
+
+    def _tool_stats(self, tool_name: str) -> dict:
+        return self._stats.setdefault(tool_name, {"hits": 0, "misses": 0, "negative_hits": 0})
+
+    def get(self, tool_name: str, key: str) -> Tuple[bool, Any]:
+        """Returns (True, value) on a fresh hit, otherwise (False, None)."""
+        if not self.enabled:
+            return False, None
+        with self._lock:
+            stats = self._tool_stats(tool_name)
+            entry = self._entries.get((tool_name, key))
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end((tool_name, key))
+                stats["hits"] += 1
+                if entry[2]:
+                    stats["negative_hits"] += 1
+                return True, entry[0]
+            if entry is not None:
+                del self._entries[(tool_name, key)]
+            stats["misses"] += 1
+        return False, None
+
+    def put(self, tool_name: str, key: str, value: Any, ttl: float, negative: bool = False) -> None:
+        """Caches a result for `ttl` seconds; a non-positive ttl is not cached."""
+        if ttl <= 0 or not self.enabled:
+            return
+        with self._lock:
+            self._entries[(tool_name, key)] = (value, time.monotonic() + ttl, negative)
+            self._entries.move_to_end((tool_name, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Returns hits, misses and negative hits per tool."""
+        with self._lock:
+            stats = {name: dict(values) for name, values in self._stats.items()}
+            entries = len(self._entries)
+        for values in stats.values():
+            lookups = values["hits"] + values["misses"]
+            values["hit_rate"] = values["hits"] / lookups if lookups else 0.0
+        return {"entries": entries, "tools": stats}
+
+
+tool_cache = ToolResultCache()
+
+
+def tool_cache_stats() -> dict:
+    """Returns the per-tool hit/miss counters of the network tool cache."""
+    return tool_cache.stats()
+
+
+def _host_key(host: str) -> str:
+    return host.strip().lower().rstrip(".")
+
+
 def get_network_tools() -> List[tool]:
     """
     Returns a list of network-related tools that can be used for diagnostics.
@@ -30,12 +126,8 @@ def get_network_tool_names() -> str:
     return ", ".join([tool.name for tool in get_network_tools()])
 
 
-@tool
-def ping_ip(ip_address: Annotated[str, "The IP address to ping."]) -> bool:
-    """
-    Pings an IP address using the system's ping command.
-    Returns True if the host is reachable, otherwise False.
-    """
+def _ping_command(ip_address: str):
+    """Returns the ping command for the current OS and the OS name."""
     ping_count = PING_COUNT
     timeout_sec = PING_TIMEOUT
     app_os = platform.system().lower()
@@ -54,22 +146,59 @@ def ping_ip(ip_address: Annotated[str, "The IP address to ping."]) -> bool:
     else:
         # Linux/macOS use -W in seconds (and -c for ping_count)
         command = ["ping", "-c", str(ping_count), "-W", str(timeout_sec), ip_address]
+    return command, app_os
+
+
+def _ping_reachable(output: str, app_os: str) -> bool:
+    output = output.lower()
+    if app_os == "windows":
+        return "ttl=" in output
+    return "ttl=" in output or "bytes from" in output
+
 
+def _ping_ip(ip_address: Annotated[str, "The IP address to ping."]) -> bool:
+    """
+    Pings an IP address using the system's ping command.
+    Returns True if the host is reachable, otherwise False.
+    """
+    hit, reachable = tool_cache.get("ping_ip", _host_key(ip_address))
+    if hit:
+        return reachable
+    command, app_os = _ping_command(ip_address)
     try:
         result = subprocess.run(
             command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
         )
-        output = result.stdout.lower()
-        if app_os == "windows":
-            return "ttl=" in output
-        return "ttl=" in output or "bytes from" in output
+        reachable = _ping_reachable(result.stdout, app_os)
+    except Exception as e:
+        print(f"Error executing ping: {e}")
+        return False
+    tool_cache.put("ping_ip", _host_key(ip_address), reachable, PING_CACHE_TTL)
+    return reachable
+
+
+async def _aping_ip(ip_address: str) -> bool:
+    hit, reachable = tool_cache.get("ping_ip", _host_key(ip_address))
+    if hit:
+        return reachable
+    command, app_os = _ping_command(ip_address)
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        stdout, _ = await process.communicate()
+        reachable = _ping_reachable(stdout.decode(errors="replace"), app_os)
     except Exception as e:
         print(f"Error executing ping: {e}")
         return False
+    tool_cache.put("ping_ip", _host_key(ip_address), reachable, PING_CACHE_TTL)
+    return reachable
+
+
+ping_ip = StructuredTool.from_function(func=_ping_ip, coroutine=_aping_ip, name="ping_ip")
 
 
-@tool
-def check_port(
+def _check_port(
     host: Annotated[str, "The hostname or IP address to check."],
     port: Annotated[int, "The port number to check."],
 ) -> bool:
@@ -78,21 +207,79 @@ def check_port(
     Returns True if the port is open, otherwise False.
     """
 
+    key = f"{_host_key(host)}:{int(port)}"
+    hit, is_open = tool_cache.get("check_port", key)
+    if hit:
+        return is_open
+
     timeout = PORT_CHECK_TIMEOUT
     sck = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     sck.settimeout(timeout)
     try:
         sck.connect((host, int(port)))
         sck.shutdown(socket.SHUT_RDWR)
-        return True
+        is_open = True
     except:
-        return False
+        is_open = False
     finally:
         sck.close()
+    tool_cache.put("check_port", key, is_open, PORT_CACHE_TTL)
+    return is_open
+
+
+async def _acheck_port(host: str, port: int) -> bool:
+    key = f"{_host_key(host)}:{int(port)}"
+    hit, is_open = tool_cache.get("check_port", key)
+    if hit:
+        return is_open
+    try:
+        _, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, int(port)), timeout=PORT_CHECK_TIMEOUT
+        )
+        is_open = True
+    except Exception:
+        is_open = False
+    if is_open:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except Exception:
+            pass
+    tool_cache.put("check_port", key, is_open, PORT_CACHE_TTL)
+    return is_open
 
 
-@tool
-def query_dns_record(
+check_port = StructuredTool.from_function(func=_check_port, coroutine=_acheck_port, name="check_port")
+
+
+def _dns_error(error: Exception, record_type: str) -> Tuple[List[str], float]:
+    """
+    Converts a resolver exception into the message returned to the agent and
+    how long it may be cached. Transient failures are not cached.
+    """
+    import dns.resolver
+    from dns import rdatatype
+
+    if isinstance(error, dns.resolver.NoAnswer):
+        return [f"No {record_type} records found."], DNS_NEGATIVE_TTL
+    if isinstance(error, dns.resolver.NXDOMAIN):
+        return ["Domain does not exist."], DNS_NEGATIVE_TTL
+    if isinstance(error, rdatatype.UnknownRdatatype):
+        return [f"Unknown record type: {record_type}"], DNS_NEGATIVE_TTL
+    return [f"DNS query failed: {error}"], 0
+
+
+def _dns_key(domain_name: str, record_type: str) -> str:
+    return f"{_host_key(domain_name)}/{record_type.strip().upper()}"
+
+
+def _dns_ttl(answers) -> float:
+    """Honors the TTL of the answer, capped at DNS_MAX_TTL."""
+    rrset = getattr(answers, "rrset", None)
+    return min(rrset.ttl, DNS_MAX_TTL) if rrset is not None else DNS_NEGATIVE_TTL
+
+
+def _query_dns_record(
     domain_name: Annotated[str, "The domain to query"],
     record_type: Annotated[
         str, "The DNS record type to query (e.g., 'A', 'MX', 'NS', 'TXT', etc.)"
@@ -105,18 +292,42 @@ def query_dns_record(
     Queries DNS records of a specified type for a given domain.
     Returns a list of record data or error messages if the query fails.
     """
+    key = _dns_key(domain_name, record_type)
+    hit, answer = tool_cache.get("query_dns_record", key)
+    if hit:
+        return answer
     try:
+        import dns.resolver
         answers = dns.resolver.resolve(domain_name, record_type)
         answer = [rdata.to_text() for rdata in answers]
+        tool_cache.put("query_dns_record", key, answer, _dns_ttl(answers))
         return answer
-    except dns.resolver.NoAnswer:
-        return [f"No {record_type} records found."]
-    except dns.resolver.NXDOMAIN:
-        return ["Domain does not exist."]
-    except rdatatype.UnknownRdatatype:
-        return [f"Unknown record type: {record_type}"]
     except Exception as e:
-        return [f"DNS query failed: {e}"]
+        answer, ttl = _dns_error(e, record_type)
+        tool_cache.put("query_dns_record", key, answer, ttl, negative=True)
+        return answer
+
+
+async def _aquery_dns_record(domain_name: str, record_type: str) -> List[str]:
+    key = _dns_key(domain_name, record_type)
+    hit, answer = tool_cache.get("query_dns_record", key)
+    if hit:
+        return answer
+    try:
+        import dns.asyncresolver
+        answers = await dns.asyncresolver.resolve(domain_name, record_type)
+        answer = [rdata.to_text() for rdata in answers]
+        tool_cache.put("query_dns_record", key, answer, _dns_ttl(answers))
+        return answer
+    except Exception as e:
+        answer, ttl = _dns_error(e, record_type)
+        tool_cache.put("query_dns_record", key, answer, ttl, negative=True)
+        return answer
+
+
+query_dns_record = StructuredTool.from_function(
+    func=_query_dns_record, coroutine=_aquery_dns_record, name="query_dns_record"
+)
 
 
 class WhoisRecord(BaseModel):
@@ -158,16 +369,59 @@ class WhoisRecord(BaseModel):
         description="Two-letter country code (ISO 3166) of the registrant"
     )
 
+    def to_observation(self) -> dict:
+        """
+        The fields the agents reason about, trimmed for the prompt: dates as
+        ISO days, status codes without their ICANN links, and no contact data.
+        """
+        def day(value: Optional[datetime]) -> str:
+            return value.date().isoformat() if value else ""
+
+        observation = {
+            "domain_name": self.domain_name,
+            "registrar": self.registrar,
+            "creation_date": day(self.creation_date),
+            "expiration_date": day(self.expiration_date),
+            "updated_date": day(max(self.updated_date)) if self.updated_date else "",
+            "name_servers": sorted({server.lower().rstrip(".") for server in self.name_servers})[:WHOIS_MAX_ITEMS],
+            "status": sorted({status.split()[0] for status in self.status if status})[:WHOIS_MAX_ITEMS],
+            "dnssec": self.dnssec,
+            "org": self.org,
+            "country": self.country,
+        }
+        return {key: value for key, value in observation.items() if value}
+
 
-@tool
-def get_domain_metadata(
+def _get_domain_metadata(
     domain: Annotated[str, "The domain name to query (e.g., 'example.com')"],
-) -> WhoisRecord:
+) -> dict:
     """
     Useful for retrieving general information about a domain name, such as its registrar, creation date, expiration date, and more.
     This function uses the `whois` library to fetch the WHOIS record for the specified domain.
     """
+    return domain_metadata(domain).to_observation()
+
+
+def domain_metadata(domain: str) -> WhoisRecord:
+    """Returns the full WHOIS record of a domain, cached"""
+    hit, record = tool_cache.get("get_domain_metadata", _host_key(domain))
+    if hit:
+        return record
+    record = _whois_lookup(domain)
+    found = bool(record.registrar or record.creation_date or record.name_servers)
+    tool_cache.put(
+        "get_domain_metadata",
+        _host_key(domain),
+        record,
+        WHOIS_CACHE_TTL if found else WHOIS_NEGATIVE_TTL,
+        negative=not found,
+    )
+    return record
+
+
+def _whois_lookup(domain: str) -> WhoisRecord:
     try:
+        from whois import whois
         w = whois(domain)
     except Exception as e:
         # WHOIS lookup failed completely
@@ -229,4 +483,15 @@ def get_domain_metadata(
         name=w.name or "",
         org=w.org or "",
         country=w.country or "",
-    )
\ No newline at end of file
+    )
+
+
+async def _aget_domain_metadata(domain: str) -> dict:
+    # python-whois has no async API, run it on the default executor
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, _get_domain_metadata, domain)
+
+
+get_domain_metadata = StructuredTool.from_function(
+    func=_get_domain_metadata, coroutine=_aget_domain_metadata, name="get_domain_metadata"
+)
@@ -0,0 +1,145 @@
+import ipaddress
+import re
+import threading
+from typing import Tuple
+
+IPV4_PATTERN = re.compile(r"(?<![\w.])(?:\d{1,3}\.){3}\d{1,3}(?:/\d{1,2})?(?![\w.]*\w)")
+# Dotted firmware versions ("version 1.0.11.3") look like IPv4 addresses
+VERSION_PREFIX_PATTERN = re.compile(r"\b(?:version|firmware|fw|v)\s*[:=]?\s*$", re.IGNORECASE)
+IPV6_PATTERN = re.compile(r"(?<![\w:])(?:[0-9a-f]{0,4}:){2,7}[0-9a-f]{0,4}(?![\w:])", re.IGNORECASE)
+FQDN_PATTERN = re.compile(
+    r"(?<![\w@.-])(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z][a-z0-9-]{1,62}(?![\w-])",
+    re.IGNORECASE,
+)
+QUOTED_HOST_PATTERN = re.compile(r"['\"`]([a-z0-9][a-z0-9._-]{1,252})['\"`]", re.IGNORECASE)
+PORT_PATTERN = re.compile(r"\bports?\s*(?:number\s*)?\(?(\d{1,5})\b|(?<=[a-z0-9\]]):(\d{2,5})\b", re.IGNORECASE)
+RECORD_PATTERN = re.compile(r"\b(A|AAAA|MX|NS|TXT|CNAME|SOA|PTR|SRV)\s+records?\b", re.IGNORECASE)
+# Hyphenated words ("down-rated", "up-to-date") are not diagnostic intents
+ACTION_PATTERN = re.compile(
+    r"(?<![\w-])(ping(?:s|ing|ed)?|reachable|unreachable|online|offline|alive|up|down|responding|responsive"
+    r"|listening|accepting|open|resolv(?:e|es|ing|ed)|dns|lookup|look it up|nslookup|dig|whois"
+    r"|ip(?: address)? (?:for|of)|latency|packet loss|mail servers?|name servers?|propagated)(?![\w-])",
+    re.IGNORECASE,
+)
+# Requests to change or inspect device configuration belong to the device agent
+DEVICE_PATTERN = re.compile(
+    r"\b(vlan\w*|configur\w*|trunk|shut(?: down)?|no shut|enable|disable|static route|dhcp|poe"
+    r"|duplex|interface statistics|mac address(?:es)?|port security|portfast|bpdu|etherchannel"
+    r"|port-channel\d*|mirror|bounce|reboot|power cycle|description|counters|error-disabled"
+    r"|ports? \d+ (?:on|of) (?:the )?(?:\w+ )?switch|(?:gi|te|fa|gigabitethernet|tengigabitethernet|fastethernet)\d)\b",
+    re.IGNORECASE,
+)
+# Tickets and requests for a person belong to the escalation agent, even with a target
+ESCALATION_PATTERN = re.compile(
+    r"\b(tickets?|escalat\w*|incidents?|support case|human|person|technician|someone from|talk to|call me)\b",
+    re.IGNORECASE,
+)
+# Conceptual questions ("What is a 'port scan'?") belong to the knowledge agent
+DEFINITION_PATTERN = re.compile(
+    r"^\s*(what(?:'s| is| are) (?:a|an|the difference)\b|what(?:'s| is) the ['\"`]|what does\b|what do\b|why\b"
+    r"|how (?:do|does|can)\b)",
+    re.IGNORECASE,
+)
+FILE_EXTENSIONS = {"pdf", "md", "txt", "doc", "docx", "xls", "xlsx", "csv", "json", "png", "jpg", "exe", "zip"}
+TOOL_WORDS = {"ping", "tracert", "traceroute", "nslookup", "dig", "whois", "localhost"}
+
+
+def _is_ip(candidate: str) -> bool:
+    try:
+        ipaddress.ip_interface(candidate)
+        return True
+    except ValueError:
+        return False
+
+
+def extract_network_entities(text: str) -> dict:
+    """
+    Extracts IP addresses, hostnames, ports and DNS record types mentioned
+    in the text. Every value is a de-duplicated list in order of appearance.
+    """
+    ips = [
+        m.group() for m in IPV4_PATTERN.finditer(text)
+        if _is_ip(m.group()) and not VERSION_PREFIX_PATTERN.search(text[max(m.start() - 20, 0):m.start()])
+    ]
+    ips += [m for m in IPV6_PATTERN.findall(text) if m.count(":") >= 2 and _is_ip(m)]
+
+    hostnames = []
+    for match in FQDN_PATTERN.findall(text):
+        if match.rsplit(".", 1)[-1].lower() not in FILE_EXTENSIONS and not _is_ip(match):
+            hostnames.append(match)
+    for match in QUOTED_HOST_PATTERN.findall(text):
+        has_host_shape = any(ch.isdigit() or ch in "-." for ch in match)
+        if match.lower() == "localhost" or (has_host_shape and match.lower() not in TOOL_WORDS):
+            if not _is_ip(match):
+                hostnames.append(match)
+    if re.search(r"\blocalhost\b", text, re.IGNORECASE):
+        hostnames.append("localhost")
+
+    ports = []
+    for groups in PORT_PATTERN.findall(text):
+        port = int(groups[0] or groups[1])
+        if 0 < port < 65536:
+            ports.append(port)
+
+    return {
+        "ips": list(dict.fromkeys(ips)),
+        "hostnames": list(dict.fromkeys(hostnames)),
+        "ports": list(dict.fromkeys(ports)),
+        "record_types": list(dict.fromkeys(r.upper() for r in RECORD_PATTERN.findall(text))),
+    }
+
+
+class PreRouter:
+    """
+    Pattern-based router that sends questions naming a concrete network
+    target together with a diagnostic intent straight to the connectivity
+    agent, without a triage model call.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {"evaluated": 0, "fired": 0}
+
+    def _evaluate(self, text: str) -> Tuple[bool, dict]:
+        entities = extract_network_entities(text)
+        has_target = bool(entities["ips"] or entities["hostnames"])
+        has_intent = bool(entities["ports"] or entities["record_types"] or ACTION_PATTERN.search(text))
+        fired = (
+            has_target
+            and has_intent
+            and not DEVICE_PATTERN.search(text)
+            and not ESCALATION_PATTERN.search(text)
+            and not DEFINITION_PATTERN.search(text)
+        )
+        return fired, entities
+
+    def would_route(self, text: str) -> bool:
+        """Like match, without counting the question in the stats"""
+        return self._evaluate(text)[0]
+
+    def match(self, text: str) -> Tuple[bool, dict]:
+        """
+        Returns whether the question unambiguously needs the connectivity
+        tools, and the network entities found in the text.
+        """
+        fired, entities = self._evaluate(text)
+        with self._lock:
+            self._stats["evaluated"] += 1
+            if fired:
+                self._stats["fired"] += 1
+        return fired, entities
+
+    def stats(self) -> dict:
+        """Returns how many questions were evaluated and how many were routed."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["fire_rate"] = stats["fired"] / stats["evaluated"] if stats["evaluated"] else 0.0
+        return stats
+
+
+_prerouter = PreRouter()
+
+
+def get_prerouter() -> PreRouter:
+    """Returns the process-wide pre-router."""
+    return _prerouter
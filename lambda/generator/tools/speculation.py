@@ -0,0 +1,122 @@
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional
+
+from tools.vectordb import retrieve_documents, KNOWLEDGE_NUM_RESULTS
+
+import settings
+
+
+class SpeculativeRetrieval:
+    """
+    Runs the knowledge base query of a question while triage decides where
+    to route it. The knowledge agent claims the documents if the question
+    reaches it; otherwise the chatbot discards them once the run is over.
+
+    Only the speculation id goes into the graph state, the futures stay
+    here so checkpoints never hold them. When every worker is busy the
+    question is not speculated on: a queued query would not beat triage.
+    """
+
+    def __init__(self, workers: int = None, num_results: int = KNOWLEDGE_NUM_RESULTS):
+        self.num_results = num_results
+        self.workers = workers or settings.SPECULATIVE_WORKERS
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="speculative-retrieval")
+        self._pending = {}
+        self._running = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "started": 0,
+            "skipped": 0,
+            "used": 0,
+            "wasted": 0,
+            "failed": 0,
+            "wait_seconds": 0.0,
+            "saved_seconds": 0.0,
+        }
+
+    def _retrieve(self, question: str) -> tuple:
+        start = time.perf_counter()
+        try:
+            docs = retrieve_documents(question=question, num_results=self.num_results)
+        finally:
+            with self._lock:
+                self._running -= 1
+        return docs, time.perf_counter() - start
+
+    def start(self, question: str) -> str:
+        """
+        Starts retrieving the documents of `question`, returns the id to claim
+        them with, or an empty string if every worker is busy.
+        """
+        speculation_id = uuid.uuid4().hex
+        with self._lock:
+            if self._running >= self.workers:
+                self._stats["skipped"] += 1
+                return ""
+            self._running += 1
+            self._stats["started"] += 1
+            self._pending[speculation_id] = self._executor.submit(self._retrieve, question)
+        return speculation_id
+
+    def claim(self, speculation_id: str) -> Optional[List[dict]]:
+        """
+        Returns the documents of a speculation, waiting for the query if it is
+        still running, or None if there is no such speculation or it failed.
+        """
+        with self._lock:
+            future: Future = self._pending.pop(speculation_id, None)
+        if future is None:
+            return None
+        start = time.perf_counter()
+        try:
+            docs, seconds = future.result()
+        except Exception as e:
+            print(f"Speculative retrieval failed, querying again: {e}")
+            with self._lock:
+                self._stats["failed"] += 1
+            return None
+        wait = time.perf_counter() - start
+        with self._lock:
+            self._stats["used"] += 1
+            self._stats["wait_seconds"] += wait
+            # Part of the query that ran off the critical path
+            self._stats["saved_seconds"] += max(seconds - wait, 0.0)
+        return docs
+
+    def discard(self, speculation_id: str) -> None:
+        """Drops a speculation nobody claimed, e.g. the question went to another agent"""
+        with self._lock:
+            future = self._pending.pop(speculation_id, None)
+            if future is not None:
+                self._stats["wasted"] += 1
+        if future is not None and future.cancel():
+            with self._lock:
+                self._running -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = len(self._pending)
+        finished = stats["used"] + stats["wasted"]
+        stats["use_rate"] = stats["used"] / finished if finished else 0.0
+        stats["avg_wait_seconds"] = stats["wait_seconds"] / stats["used"] if stats["used"] else 0.0
+        return stats
+
+
+_speculation = None
+_speculation_lock = threading.Lock()
+
+
+def get_speculative_retrieval() -> Optional[SpeculativeRetrieval]:
+    """Returns the process-wide speculative retrieval, or None when it is disabled."""
+    global _speculation
+    if not settings.SPECULATIVE_RETRIEVAL:
+        return None
+    if _speculation is None:
+        with _speculation_lock:
+            if _speculation is None:
+                _speculation = SpeculativeRetrieval()
+    return _speculation
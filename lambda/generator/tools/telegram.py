@@ -1,16 +1,265 @@
 
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+
+import settings
+
+# Longest text Telegram accepts in one message
+MAX_MESSAGE_LENGTH = 4096
+
+
+class TelegramError(Exception):
+    """Error answered by the Bot API, `retry_after` is set when rate limited"""
+
+    def __init__(self, status_code: int, description: str, retry_after: Optional[float] = None):
+        super().__init__(f"Telegram API error {status_code}: {description}")
+        self.status_code = status_code
+        self.description = description
+        self.retry_after = retry_after
+
+
+def api_url(token, method):
+    return f"{settings.TELEGRAM_API_URL}/bot{token}/{method}"
+
+
+def split_message(text: str, limit: int = MAX_MESSAGE_LENGTH) -> List[str]:
+    """
+    Splits a reply into chunks Telegram accepts, preferring paragraph, line
+    and word boundaries over cutting in the middle of a word.
+    """
+    chunks = []
+    while len(text) > limit:
+        window = text[:limit]
+        cut = max(window.rfind("\n\n"), window.rfind("\n"), window.rfind(" "))
+        if cut < limit // 2:
+            cut = limit
+        chunks.append(text[:cut].rstrip())
+        text = text[cut:].lstrip()
+    if text or not chunks:
+        chunks.append(text)
+    return chunks
+
+
+def _error(response) -> TelegramError:
+    """Builds the TelegramError of a failed Bot API response"""
+    try:
+        body = response.json()
+    except ValueError:
+        body = {}
+    description = body.get("description") or response.text
+    retry_after = body.get("parameters", {}).get("retry_after")
+    if response.status_code == 429 and retry_after is None:
+        retry_after = 1
+    return TelegramError(response.status_code, description, retry_after)
+
+
+def _retry_delay(error: Exception, attempt: int) -> Optional[float]:
+    """
+    Seconds to wait before retrying a failed call, or None if it must not be
+    retried: client errors, exhausted retries or a retry_after too long to
+    wait for inside the Lambda (SQS redelivers the message instead).
+    """
+    if attempt >= settings.TELEGRAM_MAX_RETRIES:
+        return None
+    if isinstance(error, TelegramError):
+        if error.retry_after is not None:
+            return error.retry_after if error.retry_after <= settings.TELEGRAM_MAX_RETRY_AFTER else None
+        if error.status_code < 500:
+            return None
+    return min(0.5 * 2 ** attempt, settings.TELEGRAM_MAX_RETRY_AFTER)
+
+
+class TelegramClient:
+    """
+    Bot API client on a keep-alive session shared by all the sends of the
+    container. Calls time out, 429 answers are retried after `retry_after`,
+    5xx and connection errors with exponential backoff, and replies longer
+    than Telegram's limit are sent as several messages.
+    """
+
+    def __init__(self, token: str, timeout: float = None, pool_size: int = None):
+        self.token = token
+        self.timeout = timeout or settings.TELEGRAM_TIMEOUT
+        self.pool_size = pool_size or settings.TELEGRAM_POOL_SIZE
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "retries": 0, "rate_limited": 0, "failures": 0}
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def call(self, method: str, payload: dict, retry: bool = True) -> dict:
+        """Calls a Bot API method, with retry=False a failure raises TelegramError at once"""
+        attempt = 0
+        while True:
+            self._count("calls")
+            try:
+                response = self.session.post(api_url(self.token, method), data=payload, timeout=self.timeout)
+                if response.status_code == 200:
+                    return response.json()
+                error = _error(response)
+            except requests.RequestException as e:
+                error = e
+            if isinstance(error, TelegramError) and error.status_code == 429:
+                self._count("rate_limited")
+            delay = _retry_delay(error, attempt) if retry else None
+            if delay is None:
+                self._count("failures")
+                raise error
+            self._count("retries")
+            time.sleep(delay)
+            attempt += 1
+
+    def send_message(self, chat_id, text: str) -> List[dict]:
+        """Sends a reply, split into several messages if needed, returns one result per message"""
+        return [self.call("sendMessage", {"chat_id": chat_id, "text": chunk}) for chunk in split_message(text)]
+
+    def edit_message_text(self, chat_id, message_id, text: str, retry: bool = True) -> dict:
+        return self.call("editMessageText", {"chat_id": chat_id, "message_id": message_id, "text": text}, retry=retry)
+
+    def send_batch(self, messages: Iterable[Tuple[object, str]]) -> List[object]:
+        """
+        Sends (chat_id, text) replies concurrently on the session pool.
+        Returns, in order, the results of each reply or the exception it raised.
+        """
+        def send(message):
+            try:
+                return self.send_message(*message)
+            except Exception as e:
+                return e
+
+        messages = list(messages)
+        if not messages:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.pool_size, len(messages))) as executor:
+            return list(executor.map(send, messages))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_telegram_client(token: str) -> TelegramClient:
+    """Returns the container-wide client of a bot token, creating it on first use"""
+    client = _clients.get(token)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(token)
+            if client is None:
+                client = _clients[token] = TelegramClient(token)
+    return client
+
+
 def send_message(token, chat_id, message):
+    """Sends a reply and returns the result of its first message"""
+    return get_telegram_client(token).send_message(chat_id, message)[0]
+
+
+async def asend_message(token, chat_id, message, client: httpx.AsyncClient = None):
+    """Async variant of send_message, reuses `client` connections when given"""
+    if client is None:
+        async with httpx.AsyncClient(timeout=settings.TELEGRAM_TIMEOUT) as client:
+            return await asend_message(token, chat_id, message, client=client)
+
+    results = []
+    for chunk in split_message(message):
+        attempt = 0
+        while True:
+            try:
+                response = await client.post(api_url(token, "sendMessage"), data={"chat_id": chat_id, "text": chunk})
+                if response.status_code == 200:
+                    results.append(response.json())
+                    break
+                error = _error(response)
+            except httpx.HTTPError as e:
+                error = e
+            delay = _retry_delay(error, attempt)
+            if delay is None:
+                raise error
+            await asyncio.sleep(delay)
+            attempt += 1
+    return results[0]
+
+
+class StreamingReply:
+    """
+    Telegram message edited in place while the answer is generated.
+
+    The first update posts the message, later ones edit it at most once every
+    `min_interval` seconds and at most `max_edits` times: texts arriving in
+    between are coalesced into the latest one. finish() always delivers the
+    complete answer.
+    """
+
+    def __init__(self, token, chat_id, min_interval: float = None, max_edits: int = None):
+        self.client = get_telegram_client(token)
+        self.chat_id = chat_id
+        self.min_interval = settings.STREAM_EDIT_INTERVAL if min_interval is None else min_interval
+        self.max_edits = settings.STREAM_MAX_EDITS if max_edits is None else max_edits
+        self.message_id = None
+        self.sent_text = ""
+        self.edits = 0
+        self._next_edit = 0.0
+
+    def update(self, text: str) -> None:
+        """Shows a partial answer if the throttle allows it, otherwise drops it"""
+        text = text[:MAX_MESSAGE_LENGTH]
+        if self.message_id is None:
+            self._post(text)
+        elif self.edits < self.max_edits and time.monotonic() >= self._next_edit:
+            self._edit(text)
 
-    url = f"https://api.telegram.org/bot{token}/sendMessage"
-    payload = {
-        "chat_id": chat_id,
-        "text": message
-    }
+    def finish(self, text: str) -> None:
+        """Replaces the message with the final answer, continuing in new messages if too long"""
+        head, *rest = split_message(text)
+        if self.message_id is None:
+            self._post(head)
+        elif not self._edit(head):
+            # Rate limited: wait once for Telegram, the final answer must not be lost
+            time.sleep(max(self._next_edit - time.monotonic(), 0))
+            if not self._edit(head):
+                self.client.send_message(self.chat_id, head)
+        for chunk in rest:
+            self.client.send_message(self.chat_id, chunk)
 
-    response = requests.post(url, data=payload)
+    def _post(self, text: str) -> None:
+        result = self.client.send_message(self.chat_id, text)[0]
+        self.message_id = result["result"]["message_id"]
+        self.sent_text = text
+        self._next_edit = time.monotonic() + self.min_interval
 
-    if response.status_code == 200:
-        return response.json()
-    else:
-        raise Exception(f"Failed to send message: {response.text}")
\ No newline at end of file
+    def _edit(self, text: str) -> bool:
+        """Edits the message, returns False if Telegram rejected the edit"""
+        if text == self.sent_text:
+            return True
+        self.edits += 1
+        try:
+            self.client.edit_message_text(self.chat_id, self.message_id, text, retry=False)
+        except TelegramError as e:
+            if e.retry_after is not None:
+                self._next_edit = time.monotonic() + e.retry_after
+                return False
+            if "message is not modified" not in e.description:
+                print(f"Failed to edit message: {e}")
+                return False
+        except requests.RequestException as e:
+            print(f"Failed to edit message: {e}")
+            return False
+        self.sent_text = text
+        self._next_edit = time.monotonic() + self.min_interval
+        return True
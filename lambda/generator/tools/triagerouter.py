@@ -0,0 +1,129 @@
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+import settings
+
+CENTROID_METHOD = "centroid"
+KNN_METHOD = "knn"
+
+
+class TriageRouter:
+    """
+    Local nearest-neighbour router over precomputed embeddings of the
+    labeled triage examples (see train/build_triage_router.py).
+
+    The artifact is a compressed .npz file with:
+        embeddings:      (N, D) float16, L2-normalized example embeddings
+        labels:          (N,) int16 index into label_names
+        label_names:     (C,) agent names, e.g. "CONNECTIVITY"
+        centroids:       (C, D) float32, L2-normalized per-label means
+        embedding_model: id of the embedding model used to build it
+    """
+
+    def __init__(self, path: Path, method: str = KNN_METHOD, k: int = 7, embeddings=None):
+        artifact = np.load(path)
+        self.embeddings = artifact["embeddings"].astype(np.float32)
+        self.labels = artifact["labels"].astype(np.int64)
+        self.label_names = [str(name) for name in artifact["label_names"]]
+        self.centroids = artifact["centroids"].astype(np.float32)
+        self.embedding_model = str(artifact["embedding_model"])
+        self.method = method
+        self.k = min(k, len(self.labels))
+        self._embedding_model = embeddings
+        self._lock = threading.Lock()
+        self._stats = {"classified": 0, "classify_seconds": 0.0}
+
+    def classify(self, embedding) -> Tuple[str, float]:
+        """
+        Returns the predicted agent name and a confidence in [0, 1].
+        kNN confidence is the similarity-weighted vote share of the winning
+        label; centroid confidence is a softmax over label similarities.
+        """
+        query = np.asarray(embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        if self.method == CENTROID_METHOD:
+            similarities = self.centroids @ query
+            weights = np.exp((similarities - similarities.max()) / 0.05)
+            probabilities = weights / weights.sum()
+            best = int(np.argmax(probabilities))
+            return self.label_names[best], float(probabilities[best])
+
+        similarities = self.embeddings @ query
+        top = np.argpartition(-similarities, self.k - 1)[: self.k]
+        votes = np.zeros(len(self.label_names), dtype=np.float32)
+        np.add.at(votes, self.labels[top], np.clip(similarities[top], 0.0, None))
+        best = int(np.argmax(votes))
+        total = float(votes.sum())
+        return self.label_names[best], float(votes[best] / total) if total else 0.0
+
+    def classify_text(self, text: str) -> Tuple[str, float]:
+        """Embeds the text with the runtime embedding model and classifies it."""
+        if self._embedding_model is None:
+            from agents.state import select_embedding_model
+            self._embedding_model = select_embedding_model()
+        start = time.perf_counter()
+        label, confidence = self.classify(self._embedding_model.embed_query(text))
+        with self._lock:
+            self._stats["classified"] += 1
+            self._stats["classify_seconds"] += time.perf_counter() - start
+        return label, confidence
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+
+def held_out_summary(path: Path) -> str:
+    """Held-out accuracy of the router's method from the build report, if it was shipped"""
+    report_path = path.with_suffix(".json")
+    if not report_path.exists():
+        return ""
+    report = json.loads(report_path.read_text(encoding="utf-8")).get(settings.TRIAGE_ROUTER_METHOD, {})
+    confident = report.get("thresholds", {}).get(str(settings.TRIAGE_ROUTER_THRESHOLD), {})
+    return (
+        f", held-out accuracy {report.get('accuracy', 0):.3f}, "
+        f"{confident.get('accuracy_when_confident')} on the {confident.get('coverage')} "
+        f"above the {settings.TRIAGE_ROUTER_THRESHOLD} threshold"
+    )
+
+
+_router = None
+_router_loaded = False
+_router_lock = threading.Lock()
+
+
+def get_triage_router() -> Optional[TriageRouter]:
+    """
+    Returns the process-wide triage router, or None when it is disabled or
+    its artifact has not been built.
+    """
+    global _router, _router_loaded
+    if _router_loaded:
+        return _router
+    with _router_lock:
+        if not _router_loaded:
+            path = Path(settings.TRIAGE_ROUTER_PATH)
+            if settings.TRIAGE_ROUTER_ENABLED and path.exists():
+                from agents.state import embedding_model_id
+                router = TriageRouter(
+                    path,
+                    method=settings.TRIAGE_ROUTER_METHOD,
+                    k=settings.TRIAGE_ROUTER_K,
+                )
+                if router.embedding_model == embedding_model_id():
+                    _router = router
+                    print(f"Triage router loaded from {path} ({len(router.labels)} examples{held_out_summary(path)})")
+                else:
+                    print(
+                        f"Triage router disabled: built with {router.embedding_model}, "
+                        f"runtime uses {embedding_model_id()}"
+                    )
+            elif settings.TRIAGE_ROUTER_ENABLED:
+                print(f"Triage router artifact not found: {path}")
+            _router_loaded = True
+    return _router
@@ -1,36 +1,240 @@
-from pinecone import Pinecone, ServerlessSpec
+import threading
+import time
+
+import numpy as np
 from agents.state import select_embedding_model
-from langchain_pinecone import PineconeVectorStore
-from typing import Annotated, List
+from typing import Annotated, List, TYPE_CHECKING
+
+# The Pinecone SDKs are imported when the vector store is first built
+if TYPE_CHECKING:
+    from pinecone import Pinecone
+    from langchain_pinecone import PineconeVectorStore
 
 import settings
 
-def init_vector_db() -> PineconeVectorStore:
-    # Initialize Pinecone
-    print("Initializing Pinecone...")
-    pc = Pinecone(
-        api_key=settings.PINECONE_API_KEY,
-    )
-    index_name = settings.PINECONE_INDEX_NAME
+MMR_FETCH_K = 20
+# Documents the knowledge agent retrieves per question
+KNOWLEDGE_NUM_RESULTS = 3
+
+
+def maximal_marginal_relevance(
+    query_embedding: np.ndarray,
+    embeddings: np.ndarray,
+    k: int = 4,
+    lambda_mult: float = 0.5,
+) -> List[int]:
+    """
+    Selects k row indices of `embeddings` balancing similarity to the query
+    against similarity to the rows already selected.
+    """
+    if min(k, len(embeddings)) <= 0:
+        return []
+    query = query_embedding / (np.linalg.norm(query_embedding) or 1.0)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix = embeddings / norms
+    to_query = matrix @ query
+    selected = [int(np.argmax(to_query))]
+    # Highest similarity of every candidate to any selected row
+    redundancy = matrix @ matrix[selected[0]]
+    while len(selected) < min(k, len(matrix)):
+        scores = lambda_mult * to_query - (1 - lambda_mult) * redundancy
+        scores[selected] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        redundancy = np.maximum(redundancy, matrix @ matrix[best])
+    return selected
+
+
+def ensure_index(pc: "Pinecone", index_name: str) -> None:
+    """Creates the Pinecone index if it does not exist (control-plane call)."""
+    from pinecone import ServerlessSpec
     if not pc.has_index(index_name):
         print(f"Creating Pinecone index: {index_name}")
         pc.create_index(
-            name=index_name, 
+            name=index_name,
             metric="cosine",
             dimension=768,
             spec=ServerlessSpec(cloud="aws", region="us-east-1"),
         )
-    print(f"Using Pinecone index: {index_name}")
-    index = pc.Index(index_name)
-    print("Initializing embedding...")
-    embeddings = select_embedding_model()
-    print("Creating Pinecone vector store...")
-    vector_store = PineconeVectorStore(
-        index=index,
-        embedding=embeddings,
-    )
-    print("Pinecone vector store initialized.")
-    return vector_store
+
+
+class VectorStoreManager:
+    """
+    Process-wide owner of the Pinecone client, index handle, embedding model
+    and vector store. Everything is built once on first use and reused by
+    every query, so the HTTP connection pool stays warm between questions.
+    """
+
+    def __init__(self, index_name: str = "", ensure_index_exists: bool = False):
+        self.index_name = index_name or settings.PINECONE_INDEX_NAME
+        self.ensure_index_exists = ensure_index_exists
+        self._lock = threading.Lock()
+        self._vector_store = None
+        self._stats = {
+            "initializations": 0,
+            "init_seconds": 0.0,
+            "queries": 0,
+            "query_seconds": 0.0,
+            "last_query_seconds": 0.0,
+        }
+
+    def _initialize(self) -> "PineconeVectorStore":
+        from pinecone import Pinecone
+        from langchain_pinecone import PineconeVectorStore
+
+        start = time.perf_counter()
+        print("Initializing Pinecone...")
+        pc = Pinecone(
+            api_key=settings.PINECONE_API_KEY,
+            pool_threads=settings.PINECONE_POOL_SIZE,
+        )
+        if self.ensure_index_exists:
+            ensure_index(pc, self.index_name)
+        print(f"Using Pinecone index: {self.index_name}")
+        # Passing the host skips the describe_index round trip
+        index = pc.Index(
+            self.index_name,
+            host=settings.PINECONE_INDEX_HOST,
+            pool_threads=settings.PINECONE_POOL_SIZE,
+            connection_pool_maxsize=settings.PINECONE_POOL_SIZE,
+        )
+        print("Initializing embedding...")
+        embeddings = select_embedding_model()
+        vector_store = PineconeVectorStore(
+            index=index,
+            embedding=embeddings,
+        )
+        self._stats["initializations"] += 1
+        self._stats["init_seconds"] += time.perf_counter() - start
+        print("Pinecone vector store initialized.")
+        return vector_store
+
+    @property
+    def vector_store(self) -> "PineconeVectorStore":
+        """Returns the cached vector store, initializing it on first access."""
+        if self._vector_store is None:
+            with self._lock:
+                if self._vector_store is None:
+                    self._vector_store = self._initialize()
+        return self._vector_store
+
+    def search(self, question: str, num_results: int = 5, lambda_mult: float = 0.25) -> List[dict]:
+        """
+        Embeds the question once, fetches candidates from the index and
+        selects `num_results` of them with max marginal relevance.
+        Returns the page content, source metadata and cosine score of each.
+        """
+        vector_store = self.vector_store
+        start = time.perf_counter()
+        embedding = vector_store.embeddings.embed_query(question)
+        response = vector_store.index.query(
+            vector=embedding,
+            top_k=max(MMR_FETCH_K, num_results),
+            include_values=True,
+            include_metadata=True,
+        )
+        matches = response["matches"]
+        selected = []
+        if matches:
+            selected = maximal_marginal_relevance(
+                np.array(embedding, dtype=np.float32),
+                np.array([match["values"] for match in matches], dtype=np.float32),
+                k=num_results,
+                lambda_mult=lambda_mult,
+            )
+        results = [to_document(matches[i]) for i in selected]
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._stats["queries"] += 1
+            self._stats["query_seconds"] += elapsed
+            self._stats["last_query_seconds"] = elapsed
+        return results
+
+    def reset(self) -> None:
+        """Drops the cached client so the next query rebuilds it."""
+        with self._lock:
+            self._vector_store = None
+
+    def stats(self) -> dict:
+        """Returns initialization and query timing counters."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["avg_query_seconds"] = (
+            stats["query_seconds"] / stats["queries"] if stats["queries"] else 0.0
+        )
+        return stats
+
+
+def to_document(match) -> dict:
+    """Converts a Pinecone match into the document dict kept in AgentState."""
+    metadata = dict(match["metadata"] or {})
+    return {
+        "page_content": metadata.pop("text", ""),
+        "source": metadata.get("source", ""),
+        "page": metadata.get("page"),
+        "score": float(match["score"] or 0.0),
+    }
+
+
+def format_documents(documents: List[dict], max_chars: int = 0) -> str:
+    """Joins retrieved documents into the FACTS/CONTEXT block used by the prompts."""
+    contents = [
+        doc["page_content"][:max_chars] if max_chars else doc["page_content"]
+        for doc in documents
+    ]
+    return "\n\n\n -ENTRY: ".join(contents)
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_vector_store_manager() -> VectorStoreManager:
+    """
+    Returns the process-wide vector store manager: the local index when
+    VECTOR_BACKEND is "local" and the index is usable, Pinecone otherwise,
+    wrapped in a HybridRetriever unless RETRIEVAL_MODE is "vector".
+    """
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                manager = None
+                if settings.VECTOR_BACKEND == "local":
+                    from tools.localindex import load_local_vector_store
+                    manager = load_local_vector_store(settings.LOCAL_INDEX_PATH)
+                if manager is None:
+                    manager = VectorStoreManager()
+                if settings.RETRIEVAL_MODE in ("hybrid", "keyword"):
+                    from tools.hybrid import load_hybrid_retriever
+                    manager = load_hybrid_retriever(settings.KEYWORD_INDEX_PATH, manager, settings.RETRIEVAL_MODE) or manager
+                _manager = manager
+    return _manager
+
+
+def init_vector_db() -> "PineconeVectorStore":
+    """
+    Returns the shared Pinecone vector store. Raises RuntimeError when the
+    knowledge base is served by another backend (VECTOR_BACKEND=local,
+    RETRIEVAL_MODE=hybrid or keyword), use retrieve_documents instead.
+    """
+    manager = get_vector_store_manager()
+    if not isinstance(manager, VectorStoreManager):
+        raise RuntimeError(
+            f"init_vector_db needs the Pinecone backend, the knowledge base uses {type(manager).__name__}"
+        )
+    return manager.vector_store
+
+
+def set_vector_store_manager(manager) -> None:
+    """
+    Replaces the process-wide manager, e.g. with an in-memory store for
+    offline benchmarks. It needs search(question, num_results) and stats().
+    """
+    global _manager
+    with _manager_lock:
+        _manager = manager
 
 
 def knowledge_base(
@@ -47,8 +251,15 @@ def knowledge_base(
     Returns:
         List[str]: A list of page contents from the most relevant documents.
     """
-    vectordb = init_vector_db()
-    results = vectordb.max_marginal_relevance_search(query=question, 
-                                                     k=num_results, lambda_mult=0.25)
-    return [doc.page_content for doc in results]
+    return [doc["page_content"] for doc in retrieve_documents(question, num_results)]
+
 
+def retrieve_documents(
+    question: Annotated[str, "The query string to search for in the knowledge base."],
+    num_results: Annotated[int, "The number of top results to return. Defaults to 5."] = 5
+) -> Annotated[List[dict], "Documents with page_content, source, page and score keys."]:
+    """
+    Queries the knowledge base and returns the retrieved documents with their
+    source metadata and similarity score, ready to be stored in AgentState.
+    """
+    return get_vector_store_manager().search(question, num_results=num_results)
@@ -0,0 +1,171 @@
+"""
+Builds the local triage router artifact (models/triage_router.npz) from
+the labeled routing examples and reports its accuracy and latency on a
+held-out split.
+
+The examples are embedded with the same model the runtime uses
+(agents.state.select_embedding_model), so run it with the ENVIRONMENT
+of the target deployment:
+
+    ENVIRONMENT=production python train/build_triage_router.py
+
+lambda/lambda_ecr.sh runs it before building the generator image, which
+fails without the artifact. The held-out report is also written next to
+the artifact (models/triage_router.json).
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from statistics import median
+from typing import List, Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from agents.state import select_embedding_model, embedding_model_id  # noqa: E402
+from tools.triagerouter import TriageRouter, KNN_METHOD, CENTROID_METHOD  # noqa: E402
+
+DATA_DIR = Path(__file__).parent / "data" / "json"
+DEFAULT_OUTPUT = Path(__file__).resolve().parent.parent / "models" / "triage_router.npz"
+THRESHOLDS = [0.5, 0.6, 0.7, 0.8, 0.9]
+
+
+def load_examples() -> List[Tuple[str, str]]:
+    """
+    Loads (question, label) pairs from the training files, skipping
+    duplicated questions. Labels are upper-cased agent names.
+    """
+    examples = dict()
+    for json_path in [DATA_DIR / "triage_train.json", DATA_DIR / "intent_train_low.json"]:
+        with open(json_path, encoding="utf-8") as f:
+            for row in json.load(f)["DataArray"]:
+                question = row["Question"].strip()
+                if question and question not in examples:
+                    examples[question] = row["intent"].strip().upper()
+    return list(examples.items())
+
+
+def stratified_split(examples, holdout: float, seed: int):
+    """Splits the examples keeping the label proportions in both sets."""
+    by_label = defaultdict(list)
+    for example in examples:
+        by_label[example[1]].append(example)
+    rng = random.Random(seed)
+    train, test = [], []
+    for rows in by_label.values():
+        rng.shuffle(rows)
+        cut = max(1, int(len(rows) * holdout)) if len(rows) > 1 else 0
+        test.extend(rows[:cut])
+        train.extend(rows[cut:])
+    return train, test
+
+
+def embed(questions: List[str]) -> Tuple[np.ndarray, List[float]]:
+    """Embeds each question as a query and returns the timings too."""
+    model = select_embedding_model()
+    vectors, timings = [], []
+    for question in questions:
+        start = time.perf_counter()
+        vectors.append(model.embed_query(question))
+        timings.append(time.perf_counter() - start)
+    matrix = np.asarray(vectors, dtype=np.float32)
+    matrix /= np.clip(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12, None)
+    return matrix, timings
+
+
+def save_artifact(path: Path, embeddings: np.ndarray, labels: List[str]) -> None:
+    label_names = sorted(set(labels))
+    label_ids = np.array([label_names.index(label) for label in labels], dtype=np.int16)
+    centroids = np.stack([embeddings[label_ids == i].mean(axis=0) for i in range(len(label_names))])
+    centroids /= np.clip(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12, None)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(
+        path,
+        embeddings=embeddings.astype(np.float16),
+        labels=label_ids,
+        label_names=np.array(label_names),
+        centroids=centroids.astype(np.float32),
+        embedding_model=np.array(embedding_model_id()),
+    )
+
+
+def evaluate(router: TriageRouter, embeddings: np.ndarray, labels: List[str]) -> dict:
+    predictions, timings = [], []
+    for vector in embeddings:
+        start = time.perf_counter()
+        predictions.append(router.classify(vector))
+        timings.append(time.perf_counter() - start)
+
+    report = {
+        "accuracy": sum(p[0] == y for p, y in zip(predictions, labels)) / len(labels),
+        "classify_p50_ms": round(median(timings) * 1000, 4),
+        "classify_max_ms": round(max(timings) * 1000, 4),
+        "per_label_accuracy": {},
+        "thresholds": {},
+    }
+    for label in sorted(set(labels)):
+        idx = [i for i, y in enumerate(labels) if y == label]
+        report["per_label_accuracy"][label] = round(
+            sum(predictions[i][0] == label for i in idx) / len(idx), 4
+        )
+    for threshold in THRESHOLDS:
+        covered = [(p, y) for p, y in zip(predictions, labels) if p[1] >= threshold]
+        report["thresholds"][threshold] = {
+            "coverage": round(len(covered) / len(labels), 4),
+            "accuracy_when_confident": round(
+                sum(p[0] == y for p, y in covered) / len(covered), 4
+            ) if covered else None,
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the local triage router artifact.")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--holdout", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--k", type=int, default=7)
+    args = parser.parse_args()
+
+    examples = load_examples()
+    print(f"Loaded {len(examples)} examples: {dict(Counter(label for _, label in examples))}")
+    train, test = stratified_split(examples, args.holdout, args.seed)
+
+    print("Embedding examples...")
+    train_embeddings, _ = embed([q for q, _ in train])
+    test_embeddings, embed_timings = embed([q for q, _ in test])
+
+    # Evaluate a router fitted on the training split only
+    eval_path = args.output.with_name(args.output.stem + "_eval.npz")
+    save_artifact(eval_path, train_embeddings, [label for _, label in train])
+    report = {
+        "train_examples": len(train),
+        "test_examples": len(test),
+        "embedding_model": embedding_model_id(),
+        "embed_p50_ms": round(median(embed_timings) * 1000, 2),
+    }
+    for method in [KNN_METHOD, CENTROID_METHOD]:
+        router = TriageRouter(eval_path, method=method, k=args.k)
+        report[method] = evaluate(router, test_embeddings, [label for _, label in test])
+    eval_path.unlink()
+    print(json.dumps(report, indent=2))
+    # Shipped next to the artifact, the runtime logs it when loading the router
+    report_path = args.output.with_suffix(".json")
+    report_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    # The shipped artifact uses every example
+    save_artifact(
+        args.output,
+        np.concatenate([train_embeddings, test_embeddings]),
+        [label for _, label in train] + [label for _, label in test],
+    )
+    print(f"Saved triage router to {args.output} ({args.output.stat().st_size / 1024:.1f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,14 +5,21 @@ from langchain_community.document_loaders import PyMuPDFLoader, TextLoader
 from langchain_core.documents import Document  # or langchain.schema.Document depending on your version
 from langchain_huggingface.embeddings import HuggingFaceEmbeddings
 from langchain_ollama.embeddings import OllamaEmbeddings
-from langchain_pinecone import PineconeVectorStore
 
-from pinecone import Pinecone, ServerlessSpec
 from dotenv import load_dotenv
 from os import getenv
+import argparse
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from tools.embeddings import CachedEmbeddings, EmbeddingDiskStore
 
 load_dotenv(Path(__file__).parent.parent / ".env")
 
+EMBEDDING_MODEL = "qllama/multilingual-e5-base:q4_k_m"
+# Re-running the ingestion only embeds chunks that changed
+EMBEDDING_CACHE_PATH = getenv("EMBEDDING_CACHE_PATH") or str(Path(__file__).parent / "embedding_cache.sqlite")
+
 def pdf_loader(pdf_dir: Path) -> List[Document]:
     """
     Load a PDF file and return its content as a list of documents.
@@ -52,6 +59,8 @@ def md_loader(md_dir: Path) -> List[Document]:
     return docs
 
 def initialize_pinecone():
+    from pinecone import Pinecone, ServerlessSpec
+
     # Initialize Pinecone
     print("Initializing Pinecone...")
     pc = Pinecone(
@@ -69,9 +78,51 @@ def initialize_pinecone():
     index = pc.Index(index_name)
     return index
 
-def main():
+def load_pinecone(docs: List[Document]) -> None:
+    from langchain_pinecone import PineconeVectorStore
+
+    embeddings = CachedEmbeddings(
+        OllamaEmbeddings(model=EMBEDDING_MODEL),
+        model_id=EMBEDDING_MODEL,
+        disk_store=EmbeddingDiskStore(EMBEDDING_CACHE_PATH),
+    )
+    index = initialize_pinecone()
+    vector_store = PineconeVectorStore(
+        index=index,
+        embedding=embeddings,
+    )
+    print("Adding documents to Pinecone index...")
+    vector_store.add_documents(docs)
+    print("Documents added to Pinecone index.")
+    print(f"Embedding cache: {embeddings.stats()}")
+
+def load_local(docs: List[Document], output: Path, dtype: str) -> None:
+    """
+    Writes the local vector index read when VECTOR_BACKEND=local. The chunks
+    are embedded with the model the runtime uses, so run it with the
+    ENVIRONMENT of the target deployment.
+    """
+    from agents.state import select_embedding_model, embedding_model_id
+    from tools.localindex import build_local_index
+
+    embeddings = select_embedding_model()
+    print(f"Embedding {len(docs)} documents with {embedding_model_id()}...")
+    vectors = embeddings.embed_documents([doc.page_content for doc in docs])
+    build_local_index(
+        output,
+        [{"page_content": doc.page_content, **doc.metadata} for doc in docs],
+        vectors,
+        embedding_model=embedding_model_id(),
+        dtype=dtype,
+    )
+    print(f"Local vector index written to {output}")
+
+def load_documents() -> List[Document]:
+    """
+    Loads the PDF pages and Markdown files of data/, one document each,
+    keeping the file name as source and dropping those under 10 words.
+    """
     # Define the path to the directory containing PDF and Markdown files
-    print("Loading documents...") 
     data_dir = Path(__file__).parent / "data"
 
     docs = list()
@@ -83,19 +134,35 @@ def main():
         docs[i].metadata["source"] = Path(docs[i].metadata["source"]).name
 
     # Remove entries that contain less than 10 words
-    docs = [doc for doc in docs if len(doc.page_content.split()) >= 10]
+    return [doc for doc in docs if len(doc.page_content.split()) >= 10]
+
+def load_keyword_index(docs: List[Document], output: Path) -> None:
+    """Writes the BM25 index read when RETRIEVAL_MODE is hybrid or keyword"""
+    from tools.hybrid import KeywordIndex
+
+    KeywordIndex.build([{"page_content": doc.page_content, **doc.metadata} for doc in docs]).save(output)
+    print(f"Keyword index written to {output}")
+
+def main():
+    models_dir = Path(__file__).resolve().parent.parent / "models"
+    parser = argparse.ArgumentParser(description="Loads the knowledge base documents into the vector store")
+    parser.add_argument("--backend", choices=["pinecone", "local"], default="pinecone")
+    parser.add_argument("--output", type=Path, default=models_dir / "knowledge_index")
+    parser.add_argument("--dtype", choices=["float16", "float32"], default="float16")
+    parser.add_argument("--keyword-output", type=Path, default=models_dir / "knowledge_bm25.json")
+    args = parser.parse_args()
+
+    print("Loading documents...")
+    docs = load_documents()
 
     # Print the number of documents loaded
     print(f"Number of documents loaded: {len(docs)}")
-    embeddings = OllamaEmbeddings(model="qllama/multilingual-e5-base:q4_k_m")
-    index = initialize_pinecone()
-    vector_store = PineconeVectorStore(
-        index=index,
-        embedding=embeddings,
-    )
-    print("Adding documents to Pinecone index...")
-    vector_store.add_documents(docs)
-    print("Documents added to Pinecone index.")
+    if args.backend == "local":
+        load_local(docs, args.output, args.dtype)
+    else:
+        load_pinecone(docs)
+    # Built from the same chunks so hybrid retrieval can fuse both rankings
+    load_keyword_index(docs, args.keyword_output)
 
 if __name__ == "__main__":
     main()
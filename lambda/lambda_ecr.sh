@@ -15,6 +15,11 @@ if [ -z "${AWS_ACCOUNT_ID:-}" ]; then
 fi
 cd "$SOURCE_FOLDER"
 
+# The generator image ships the local triage router, built with the production embedding model
+if [ "$SOURCE_FOLDER" = "generator" ]; then
+  ENVIRONMENT=production EMBEDDING_CACHE_PATH=train/embedding_cache.sqlite python train/build_triage_router.py
+fi
+
 aws ecr get-login-password --region $AWS_REGION | podman login --username AWS --password-stdin $AWS_ACCOUNT_ID.dkr.ecr.$AWS_REGION.amazonaws.com
 
 podman build --platform linux/amd64 -t $AWS_ACCOUNT_ID.dkr.ecr.$AWS_REGION.amazonaws.com/$SOURCE_FOLDER-function:latest .
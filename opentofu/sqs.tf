@@ -1,17 +1,36 @@
+resource "aws_sqs_queue" "dead_letter" {
+  name                      = "network-support-queue-dlq"
+  message_retention_seconds = 4 * 86400 # 4 days
+
+  tags = {
+    Name = "network-support-chatbot"
+  }
+}
+
 resource "aws_sqs_queue" "main" {
   name                       = "network-support-queue"
   visibility_timeout_seconds = 10 * 60 # 10 minutes
   message_retention_seconds  = 86400 # 1 day
 
+  # Keep in sync with SQS_MAX_RECEIVE_COUNT, the last attempt answers with an apology
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.dead_letter.arn
+    maxReceiveCount     = 3
+  })
+
   tags = {
     Name = "network-support-chatbot"
   }
 }
 
 resource "aws_lambda_event_source_mapping" "sqs_trigger" {
-  event_source_arn = aws_sqs_queue.main.arn
-  function_name    = module.generator_function.function_name
-  batch_size       = 1 # Number of messages to process in one batch
+  event_source_arn                   = aws_sqs_queue.main.arn
+  function_name                      = module.generator_function.function_name
+  batch_size                         = 10 # Number of messages to process in one batch
+  maximum_batching_window_in_seconds = 1  # Wait at most 1s to fill a batch
+
+  # Only the messages listed in batchItemFailures are retried
+  function_response_types = ["ReportBatchItemFailures"]
 
   scaling_config {
     maximum_concurrency = 5